@@ -10,10 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
-from packaging.utils import _
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,7 +36,15 @@ ALLOWED_HOSTS = [
 
 # Application definition
 
-INSTALLED_APPS = [
+# Rollar bo'yicha profil (DJANGO_SETTINGS_PROFILE): har jarayon faqat kerakli applarni yuklaydi.
+#   api    — REST API workerlari (admin, ckeditor, swagger yo'q)
+#   admin  — admin panel (unfold, ckeditor)
+#   worker — cron / management buyruqlari (faqat modellar)
+#   full   — hammasi (dev va bitta jarayonli deploy)
+# Cold start: manage.py profile_startup
+SETTINGS_PROFILE = os.environ.get('DJANGO_SETTINGS_PROFILE', 'full')
+
+ALL_APPS = [
     'unfold',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -57,6 +64,22 @@ INSTALLED_APPS = [
 
 ]
 
+_BASE_APPS = {'django.contrib.auth', 'django.contrib.contenttypes', 'users.apps.UsersConfig', 'main.apps.MainConfig'}
+PROFILE_APPS = {
+    'full': set(ALL_APPS),
+    'api': _BASE_APPS | {'rest_framework', 'rest_framework_simplejwt', 'corsheaders'},
+    'admin': _BASE_APPS | {
+        'unfold', 'django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages',
+        'django.contrib.staticfiles', 'django_ckeditor_5',
+    },
+    'worker': _BASE_APPS,
+}
+
+if SETTINGS_PROFILE not in PROFILE_APPS:
+    raise ValueError(f"Unknown DJANGO_SETTINGS_PROFILE {SETTINGS_PROFILE!r}, expected one of {sorted(PROFILE_APPS)}")
+
+INSTALLED_APPS = [app for app in ALL_APPS if app in PROFILE_APPS[SETTINGS_PROFILE]]
+
 
 
 
@@ -84,13 +107,42 @@ UNFOLD = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.RevocationAwareJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    # X-Forwarded-For dagi ishonchli proksilar soni (nginx orqasida 1); 0 -> faqat REMOTE_ADDR
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # DecimalField (pul) JSON da son bo'lib qoladi, string emas
+    'COERCE_DECIMAL_TO_STRING': False,
+    'DEFAULT_RENDERER_CLASSES': [
+        'main.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# msgpack o'rnatilgan bo'lsa "Accept: application/msgpack" bilan binary javob
+from importlib.util import find_spec
+
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('main.renderers.MessagePackRenderer')
+
+# Katalog narx fasetlari chegaralari (effective_price bo'yicha, oxirgisi "dan yuqori")
+PRODUCT_PRICE_BUCKETS = [0, 500_000, 1_000_000, 3_000_000, 5_000_000, 10_000_000, 20_000_000]
+
+# Login / register token-bucket cheklovlari: scope -> bucket -> (sig'im, daqiqada to'ladigan token)
+AUTH_RATE_LIMITS = {
+    'login': {'ip': (20, 10), 'username': (5, 1)},
+    'register': {'ip': (5, 1), 'username': (3, 1)},
 }
 
+# /metrics/ (Prometheus) faqat shu manzillardan ochiladi
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# CompressionMiddleware: shundan kichik javoblar siqilmaydi (baytlarda)
+COMPRESSION_MIN_SIZE = 1024
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -98,6 +150,12 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=90),
 }
 
+# users/revocation.py: bekor qilingan JTI lar Bloom filtri (har jarayonda) va sinxronlash oralig'i
+# (boshqa workerlar logoutni shu oraliqqacha kechikib ko'radi)
+TOKEN_REVOCATION_SYNC_SECONDS = 30
+TOKEN_REVOCATION_BLOOM_CAPACITY = 100_000
+TOKEN_REVOCATION_BLOOM_ERROR_RATE = 0.001
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -106,22 +164,38 @@ SWAGGER_SETTINGS = {
             'in': 'header',
         }
     },
-    'PERSIST_AUTH': True
+    'PERSIST_AUTH': True,
+    # UI har safar introspeksiya qilmasin: manage.py generate_schema natijasi
+    'SPEC_URL': 'openapi-schema',
 }
 
+# generate_schema yozadigan OpenAPI fayli (repoda; main/tests.py jonli sxema bilan solishtiradi)
+OPENAPI_SCHEMA_PATH = BASE_DIR / 'main' / 'openapi.json'
+
 
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# profil applari o'rnatilmagan bo'lsa, ularning middleware'lari ham ulanmaydi
+_MIDDLEWARE_APPS = {
+    'django.contrib.sessions.middleware.SessionMiddleware': 'django.contrib.sessions',
+    'corsheaders.middleware.CorsMiddleware': 'corsheaders',
+    'django.contrib.auth.middleware.AuthenticationMiddleware': 'django.contrib.sessions',
+    'django.contrib.messages.middleware.MessageMiddleware': 'django.contrib.messages',
+}
+MIDDLEWARE = [m for m in MIDDLEWARE if _MIDDLEWARE_APPS.get(m, 'django.contrib.auth') in INSTALLED_APPS]
+
 ROOT_URLCONF = 'core.urls'
 
 
@@ -148,6 +222,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# ASGI deployda katalog o'qish endpointlarini native async viewlarga ulash (main/async_urls.py)
+ASYNC_CATALOGUE_VIEWS = False
+
 CKEDITOR_5_CUSTOM_CSS = 'path/to/custom.css'  # optional
 
 CKEDITOR_5_CONFIGS = {
@@ -193,6 +270,26 @@ CKEDITOR_5_CONFIGS = {
 
 
 
+# Cache
+# Rate limit bucketlari, metrics counterlari va faset indeksi barcha workerlar uchun
+# umumiy bo'lishi kerak: REDIS_URL berilsa Redis, aks holda (dev) lokal xotira.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -203,6 +300,19 @@ DATABASES = {
     }
 }
 
+# o'qish replikasi (replikatsiya DB darajasida); testlarda default ning ko'zgusi
+if os.environ.get('DATABASE_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DATABASE_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+# ochiq (AllowAny) viewlarning GET so'rovlari shu aliaslardan o'qiydi (main/db_router.py)
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['main.db_router.ReplicaRouter']
+# yozuvdan keyin shu mijozning o'qishlari shuncha soniya primaryda (read-your-writes)
+REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -223,6 +333,27 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# argon2-cffi o'rnatilgan bo'lsa argon2, aks holda stdlib scrypt. Ro'yxatdagi qolgan
+# hasherlar eski (PBKDF2) hashlarni tekshirish uchun; ular JWT loginda fonda qayta hashlanadi.
+# Parametrlar: manage.py bench_hashers natijasiga qarab tanlanadi.
+# Parametrlar hash ichida saqlanadi: hostga bog'liq qiymat (masalan os.cpu_count()) turli
+# serverlarda must_update ni almashtirib, har loginda qayta hashlashga olib keladi — faqat konstanta.
+PASSWORD_HASHING = {
+    'argon2': {'time_cost': 2, 'memory_cost': 65536, 'parallelism': 2},
+    'scrypt': {'work_factor': 2 ** 14, 'block_size': 8, 'parallelism': 1},
+}
+
+PASSWORD_HASHERS = [
+    'users.hashers.TunedScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+if find_spec('argon2') is not None:
+    PASSWORD_HASHERS.insert(0, 'users.hashers.TunedArgon2PasswordHasher')
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -239,13 +370,73 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 
-import os
 
 STATIC_ROOT = '/var/www/PRIMETECH/static/'
 MEDIA_ROOT = '/var/www/PRIMETECH/media/'
 
 STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
+
+# archive_sales: shundan eski sotuvlar oylik .csv.gz fayllarga ko'chiriladi
+SALES_ARCHIVE_DIR = BASE_DIR / 'data' / 'sales_archive'
+SALES_ARCHIVE_HORIZON_DAYS = 730
+
+# export_columnar: offline tahlil uchun .npy ustunlar
+COLUMNAR_EXPORT_DIR = BASE_DIR / 'data' / 'columnar'
+
+# P&L hisobotlari keshi (MonthlyStats.version bo'yicha)
+REPORTS_DIR = BASE_DIR / 'data' / 'reports'
+# admin fon yig'ishlari: thread soni va navbatdagi (takrorlanmas) hisobotlar chegarasi
+REPORTS_WORKERS = 2
+REPORTS_MAX_PENDING = 8
+
+# refresh_related_products: co-occurrence matritsasi holati va har mahsulot uchun qo'shnilar soni
+RECOMMENDATIONS_DIR = BASE_DIR / 'data' / 'recommendations'
+RELATED_PRODUCTS_TOP_K = 10
+# inkremental ishga tushishda created_at watermark idan shuncha oldingi qatorlar qayta o'qiladi
+# (kech commit bo'lgan tranzaksiyalar) va shuncha soatda bir matritsa noldan quriladi
+# (o'chirilgan sotuv/savatlar faqat to'liq qayta qurishda chiqib ketadi)
+RECOMMENDATIONS_LOOKBACK_MINUTES = 15
+RECOMMENDATIONS_FULL_REBUILD_HOURS = 24
+
+# HashedMediaStorage: kontent-adresli fayllar katalogi va rasmlarning maksimal tomoni (px)
+MEDIA_CONTENT_DIR = 'content'
+IMAGE_MAX_DIMENSION = 2048
+
+# gc_media: shundan yangi fayllar tegilmaydi (soat); --quarantine fayllari shu katalogga ko'chadi
+MEDIA_GC_GRACE_HOURS = 24
+MEDIA_GC_QUARANTINE_DIR = BASE_DIR / 'data' / 'media_quarantine'
+# MEDIA_ROOT ga nisbatan aylanilmaydigan kataloglar
+MEDIA_GC_EXCLUDE = []
+
+# media backendi: 'filesystem' (MEDIA_ROOT) yoki 'object' (S3-mos ombor, main/object_storage.py)
+MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'filesystem')
+MEDIA_OBJECT_STORAGE = {
+    # BUCKET bo'sh -> LocalObjectStore (LOCAL_ROOT dagi emulyator), aks holda boto3 bilan S3 / MinIO
+    'BUCKET': os.environ.get('MEDIA_S3_BUCKET', ''),
+    'ENDPOINT_URL': os.environ.get('MEDIA_S3_ENDPOINT_URL', ''),
+    'REGION': os.environ.get('MEDIA_S3_REGION', ''),
+    'ACCESS_KEY': os.environ.get('MEDIA_S3_ACCESS_KEY', ''),
+    'SECRET_KEY': os.environ.get('MEDIA_S3_SECRET_KEY', ''),
+    'LOCAL_ROOT': BASE_DIR / 'data' / 'object_store',
+    # bo'sh bo'lsa URL lar imzolanadi (muddati SIGNED_URL_EXPIRE soniya oynasiga yaxlitlanadi;
+    # katalog ETag i shu oyna bilan almashadi)
+    'PUBLIC_URL': os.environ.get('MEDIA_PUBLIC_URL', ''),
+    'SIGNED_URL_EXPIRE': 3600,
+    'MULTIPART_THRESHOLD': 8 * 1024 * 1024,
+    'MULTIPART_CHUNK_SIZE': 8 * 1024 * 1024,
+    # jarayon ichidagi metadata (hajm, vaqt) LRU keshi hajmi
+    'METADATA_CACHE_SIZE': 10_000,
+}
+
+STORAGES = {
+    # fayllar kontent hashi bo'yicha saqlanadi -> dublikatlar bitta fayl, media immutable keshlanadi
+    "default": {
+        "BACKEND": "main.object_storage.ObjectStorage" if MEDIA_STORAGE == 'object'
+        else "main.storage.HashedMediaStorage"
+    },
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
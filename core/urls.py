@@ -1,33 +1,71 @@
-from django.contrib import admin
+from functools import lru_cache
+
+from django.apps import apps
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Prime-Tech",
-      default_version='v1',
-      description="e-commerce website",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="contact@snippets.local"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
-
-
-
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('', include('main.urls')),
-    path('auth/', include('users.urls')),
-    path("docs/", schema_view.with_ui('swagger', cache_timeout=0), name="schema-swagger-ui"),
-    path('ckeditor5/', include('django_ckeditor_5.urls')),
-]
-
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+
+
+@lru_cache(maxsize=None)
+def _swagger_ui():
+    # drf_yasg birinchi /docs/ so'rovida yuklanadi (worker startida emas); UI sxemani
+    # SWAGGER_SETTINGS['SPEC_URL'] (oldindan generatsiya qilingan fayl) dan oladi
+    from drf_yasg.views import get_schema_view
+    from main.schema import api_info, schema_view_kwargs
+
+    return get_schema_view(api_info(), **schema_view_kwargs()).with_ui('swagger', cache_timeout=0)
+
+
+def swagger_ui(request, *args, **kwargs):
+    return _swagger_ui()(request, *args, **kwargs)
+
+
+def openapi_schema(request):
+    from main.schema import serve_schema
+
+    return serve_schema(request)
+
+
+def media(request, path, document_root=None):
+    # main.views (DRF) faqat API profilida import qilinadi; drf_yasg ni u faqat full profilda
+    # yuklaydi (main/swagger.py)
+    from main.views import serve_media
+
+    return serve_media(request, path, document_root=document_root)
+
+
+def object_media(request, path):
+    from main.views import serve_object_media
+
+    return serve_object_media(request, path)
+
+
+# settings.SETTINGS_PROFILE: faqat o'rnatilgan applarning yo'llari ulanadi
+urlpatterns = []
+
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if apps.is_installed('rest_framework'):
+    urlpatterns += [
+        path('', include('main.async_urls' if settings.ASYNC_CATALOGUE_VIEWS else 'main.urls')),
+        path('auth/', include('users.urls')),
+    ]
+
+if apps.is_installed('drf_yasg'):
+    urlpatterns += [
+        path("docs/", swagger_ui, name="schema-swagger-ui"),
+        path("docs/openapi.json", openapi_schema, name="openapi-schema"),
+    ]
+
+if apps.is_installed('django_ckeditor_5'):
+    urlpatterns.append(path('ckeditor5/', include('django_ckeditor_5.urls')))
+
+if settings.MEDIA_STORAGE == 'object':
+    # LocalObjectStore emulyatori uchun; S3 bucketida URL lar bucketning o'ziga ishora qiladi
+    if not settings.MEDIA_OBJECT_STORAGE.get('BUCKET'):
+        urlpatterns.append(path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", object_media))
+else:
+    urlpatterns += static(settings.MEDIA_URL, view=media, document_root=settings.MEDIA_ROOT)
@@ -1,13 +1,18 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.models import Group
-from drf_yasg.openapi import Contact
+from django.http import FileResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
 from unfold.admin import ModelAdmin
+from unfold.decorators import action
 
 from users.models import User
-from .forms import SaleForm
+from .forms import ProductImportForm, SaleForm
+from . import importer, reports
 from .models import (
     Customer, Category, Product,
     Sale, MonthlyStats, Expense, Purchase, Salary, Images, About, Announcement, AboutImage, AnnouncementImage,
+    StockMovement, StockSnapshot, LowStockAlert, SaleArchive, CustomerStats, SellerMonthlyStats,
+    PriceSchedule, PriceHistory, RelatedProduct,
 )
 
 
@@ -36,7 +41,7 @@ class RoleRestrictedAdminMixin(ModelAdmin):
         if user.is_superuser or user.role == User.Role.ADMIN:
             return True
         if user.role == User.Role.MANAGER:
-            return self.model in [Salary]
+            return self.model in [Salary, SellerMonthlyStats]
         return False
 
     def has_view_permission(self, request, obj=None):
@@ -46,7 +51,7 @@ class RoleRestrictedAdminMixin(ModelAdmin):
         if user.is_superuser or user.role == User.Role.ADMIN:
             return True
         if user.role == User.Role.MANAGER:
-            return self.model in [Salary]
+            return self.model in [Salary, SellerMonthlyStats]
         return False
 
     def has_add_permission(self, request):
@@ -83,7 +88,7 @@ class RoleRestrictedAdminMixin(ModelAdmin):
         if user.is_superuser or user.role == User.Role.ADMIN:
             return qs
         if user.role == User.Role.MANAGER:
-            if self.model in [Salary]:
+            if self.model in [Salary, SellerMonthlyStats]:
                 return qs
             return qs.none()
         return qs.none()
@@ -98,6 +103,14 @@ class CustomerAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
     ordering = ("-created_at",)
 
 
+@admin.register(CustomerStats)
+class CustomerStatsAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("customer", "lifetime_revenue", "order_count", "first_sale_at", "last_sale_at")
+    search_fields = ("customer__name", "customer__phone_number")
+    ordering = ("-lifetime_revenue",)
+    list_select_related = ("customer",)
+
+
 # ------------------ Category admin ------------------
 @admin.register(Category)
 class CategoryAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
@@ -116,11 +129,80 @@ class ProductAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
     inlines = [ProductImageInline]
     list_display = (
         "title", "description", "brand", "price",
-        "discount_percentage", "discount_price", "image",
-        "amount", "created_at", "updated_at", "category"
+        "discount_percentage", "discount_price", "effective_price", "image",
+        "amount", "low_stock_threshold", "created_at", "updated_at", "category"
     )
-    search_fields = ("title", "description", "brand", "category__title")
+    search_fields = ("title", "sku", "description", "brand", "category__title")
+    ordering = ("-created_at",)
+    actions_list = ["import_products"]
+
+    @action(description="Import products (CSV / XLSX)", url_path="import-products", permissions=["add"])
+    def import_products(self, request):
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            archive = form.cleaned_data.get("images")
+            images = importer.ImageSource(fileobj=archive) if archive else None
+
+            # natija oqim bilan: katta fayl importida brauzer progressni darhol ko'radi
+            def stream():
+                try:
+                    rows = importer.read_rows(upload.file, upload.name)
+                    for event in importer.import_products(rows, images=images):
+                        yield importer.format_event(event) + "\n"
+                except Exception as e:
+                    # javob sarlavhalari allaqachon yuborilgan: xato matn sifatida oxirida
+                    yield f"Import aborted: {e}\n"
+                    raise
+                finally:
+                    if images is not None:
+                        images.close()
+
+            return StreamingHttpResponse(stream(), content_type="text/plain; charset=utf-8")
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import products",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/main/product/import_products.html", context)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # amount forma ochilgandan keyingi sotuvlarni yo'qotmasligi uchun faqat F() orqali:
+        # qo'lda o'zgartirilgan amount ledgerga ADJUSTMENT sifatida yoziladi
+        delta = obj.amount - form.initial["amount"] if "amount" in form.changed_data else 0
+        obj.save(update_fields=[
+            field.name for field in obj._meta.concrete_fields if not field.primary_key and field.name != "amount"
+        ])
+        if delta:
+            obj.adjust_stock(delta, StockMovement.Kind.ADJUSTMENT, note=f"Admin: {request.user.username}")
+
+
+@admin.register(PriceSchedule)
+class PriceScheduleAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("title", "discount_percentage", "category", "starts_at", "ends_at", "state")
+    list_filter = ("state",)
+    search_fields = ("title",)
+    ordering = ("-starts_at",)
+    filter_horizontal = ("products",)
+
+
+@admin.register(PriceHistory)
+class PriceHistoryAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("product", "price", "discount_price", "effective_price", "schedule", "created_at")
+    search_fields = ("product__title",)
     ordering = ("-created_at",)
+    list_select_related = ("product", "schedule")
+
+
+@admin.register(RelatedProduct)
+class RelatedProductAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("product", "rank", "related", "score")
+    search_fields = ("product__title", "related__title")
+    ordering = ("product", "rank")
+    list_select_related = ("product", "related")
 
 
 # ------------------ Sale admin ------------------
@@ -132,12 +214,103 @@ class SaleAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
     ordering = ("-sale_date",)
 
 
+# ------------------ Inventory admin ------------------
+@admin.register(StockMovement)
+class StockMovementAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("product", "kind", "quantity", "balance", "note", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("product__title",)
+    ordering = ("-created_at",)
+    list_select_related = ("product",)
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("product", "amount", "taken_at")
+    search_fields = ("product__title",)
+    ordering = ("-taken_at",)
+    list_select_related = ("product",)
+
+
+@admin.register(LowStockAlert)
+class LowStockAlertAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("product", "amount", "threshold", "created_at", "resolved_at")
+    list_filter = (("resolved_at", admin.EmptyFieldListFilter),)
+    search_fields = ("product__title",)
+    ordering = ("-created_at",)
+    list_select_related = ("product",)
+
+
+@admin.register(SaleArchive)
+class SaleArchiveAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("year", "month", "rows", "total_price", "path", "updated_at")
+    ordering = ("-year", "-month")
+
+
+@admin.register(SellerMonthlyStats)
+class SellerMonthlyStatsAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
+    list_display = ("seller", "year", "month", "revenue", "units", "sale_count")
+    list_filter = ("year", "month")
+    search_fields = ("seller__username", "seller__first_name", "seller__last_name")
+    ordering = ("-year", "-month", "-revenue")
+    list_select_related = ("seller",)
+
+
 # ------------------ MonthlyStats admin ------------------
+def _report_response(modeladmin, request, fmt, keys, path_for, schedule):
+    """Bitta tayyor fayl bo'lsa yuklab beriladi, aks holda hisobotlar fon navbatiga qo'yiladi"""
+    if len(keys) == 1:
+        path = path_for(*keys[0], fmt)
+        if path.exists():
+            return FileResponse(open(path, "rb"), as_attachment=True, filename=path.name,
+                                content_type=reports.CONTENT_TYPES[fmt])
+    queued = sum(schedule(*key, fmt) is not None for key in keys)
+    if queued:
+        modeladmin.message_user(
+            request, f"{queued} report(s) are being generated in the background. Run the action again to download.",
+            messages.INFO,
+        )
+    if queued < len(keys):
+        modeladmin.message_user(
+            request, f"{len(keys) - queued} report(s) were not queued: too many reports are being generated. "
+            "Try again later or run manage.py generate_reports.",
+            messages.WARNING,
+        )
+
+
+def _pl_report_action(fmt):
+    def action(modeladmin, request, queryset):
+        stats = {(item.year, item.month): item for item in queryset}
+        return _report_response(
+            modeladmin, request, fmt, list(stats),
+            lambda year, month, fmt: reports.month_report_path(stats[(year, month)], fmt), reports.schedule_month_report,
+        )
+
+    action.__name__ = f"download_pl_{fmt}"
+    action.short_description = f"Download P&L report ({fmt.upper()})"
+    return action
+
+
+def _pl_year_report_action(fmt):
+    def action(modeladmin, request, queryset):
+        years = sorted(set(queryset.values_list("year", flat=True)))
+        return _report_response(
+            modeladmin, request, fmt, [(year,) for year in years], reports.year_report_path, reports.schedule_year_report,
+        )
+
+    action.__name__ = f"download_pl_year_{fmt}"
+    action.short_description = f"Download yearly P&L report ({fmt.upper()})"
+    return action
+
+
 @admin.register(MonthlyStats)
 class MonthlyStatsAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
     list_display = ("year", "month", "net_profit", "total_sales", "total_purchases", "total_salaries","expenses")
     search_fields = ("year", "month")
     ordering = ("-year", "-month")
+    actions = [_pl_report_action(fmt) for fmt in reports.REPORT_FORMATS] + [
+        _pl_year_report_action(fmt) for fmt in reports.REPORT_FORMATS
+    ]
 
 
 # ------------------ Expense admin ------------------
@@ -169,7 +342,7 @@ class AboutImageInline(admin.TabularInline):
 
 @admin.register(About)
 class AboutAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
-    list_display = ("title","image","description")
+    list_display = ("title","image","excerpt")
     search_fields = ("title",)
     inlines = [AboutImageInline]
 
@@ -180,6 +353,6 @@ class AnnouncementImageInline(admin.TabularInline):
 
 @admin.register(Announcement)
 class AnnouncementAdmin(CustomAdminMixin, RoleRestrictedAdminMixin):
-    list_display = ("title", "description","image","created_at")
+    list_display = ("title", "excerpt","image","created_at")
     search_fields = ("title",)
     inlines = [AnnouncementImageInline]
@@ -0,0 +1,172 @@
+# main/archive.py
+# Eski sotuvlarni Sale jadvalidan oylik siqilgan CSV fayllarga ko'chirish
+# va hisobotlar uchun jonli + arxiv ma'lumotlarni birlashtirib o'qish.
+import csv
+import gzip
+import hashlib
+import io
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Sale, SaleArchive
+from .money import money
+from .suppression import stats_updates_suppressed
+
+ARCHIVE_FIELDS = [
+    'id', 'customer_id', 'product_id', 'description', 'quantity', 'total_price',
+    'sale_date', 'created_at', 'updated_at', 'sold_by_id',
+]
+_INT_FIELDS = {'id', 'customer_id', 'product_id', 'quantity', 'sold_by_id'}
+_DATE_FIELDS = {'sale_date', 'created_at', 'updated_at'}
+
+
+def archive_dir():
+    return Path(settings.SALES_ARCHIVE_DIR)
+
+
+def month_bounds(year, month):
+    start = datetime(year, month, 1, tzinfo=timezone.get_current_timezone())
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=start.tzinfo)
+    return start, end
+
+
+def archive_cutoff(horizon_days=None, now=None):
+    """Horizondan eski bo'lgan to'liq oylar chegarasi (oy boshigacha yaxlitlanadi)"""
+    if horizon_days is None:
+        horizon_days = settings.SALES_ARCHIVE_HORIZON_DAYS
+    edge = timezone.localtime(now or timezone.now()) - timedelta(days=horizon_days)
+    return month_bounds(edge.year, edge.month)[0]
+
+
+def months_to_archive(cutoff):
+    return [(d.year, d.month) for d in Sale.objects.filter(created_at__lt=cutoff).dates('created_at', 'month')]
+
+
+def _encode(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode(row):
+    sale = {}
+    for field, value in zip(ARCHIVE_FIELDS, row):
+        if value == '' and field != 'description':
+            value = None
+        elif field in _INT_FIELDS:
+            value = int(value)
+        elif field in _DATE_FIELDS:
+            value = datetime.fromisoformat(value)
+        elif field == 'total_price':
+            value = Decimal(value)
+        sale[field] = value
+    return sale
+
+
+def read_archive(archive):
+    with gzip.open(archive_dir() / archive.path, 'rt', newline='', encoding='utf-8') as fh:
+        reader = csv.reader(fh)
+        next(reader)  # header
+        for row in reader:
+            yield _decode(row)
+
+
+def archive_month(year, month):
+    """Bir oylik sotuvlarni arxivga ko'chiradi; ko'chirilgan qatorlar sonini qaytaradi"""
+    start, end = month_bounds(year, month)
+    live = Sale.objects.filter(created_at__gte=start, created_at__lt=end)
+    live_ids = set(live.values_list('id', flat=True))
+    if not live_ids:
+        return 0
+
+    previous = SaleArchive.objects.filter(year=year, month=month).first()
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    buffer = io.BytesIO()
+    total, rows = Decimal(0), 0
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gz:
+        text = io.TextIOWrapper(gz, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        writer.writerow(ARCHIVE_FIELDS)
+        if previous is not None:
+            for sale in read_archive(previous):
+                if sale['id'] in live_ids:  # avvalgi tugallanmagan urinishdan qolgan
+                    continue
+                writer.writerow([_encode(sale[f]) for f in ARCHIVE_FIELDS])
+                total += sale['total_price']
+                rows += 1
+        for values in live.order_by('id').values_list(*ARCHIVE_FIELDS).iterator(chunk_size=5000):
+            writer.writerow([_encode(v) for v in values])
+            total += values[ARCHIVE_FIELDS.index('total_price')]
+            rows += 1
+        text.flush()
+        text.detach()
+
+    data = buffer.getvalue()
+    checksum = hashlib.sha256(data).hexdigest()
+    # nom kontentga bog'liq: eski fayl tranzaksiya muvaffaqiyatli tugaguncha joyida qoladi
+    name = f"sales-{year}-{month:02d}.{checksum[:12]}.csv.gz"
+    tmp = directory / (name + '.tmp')
+    with open(tmp, 'wb') as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, directory / name)
+
+    with transaction.atomic(), stats_updates_suppressed():
+        SaleArchive.objects.update_or_create(
+            year=year, month=month,
+            defaults={'path': name, 'rows': rows, 'total_price': money(total), 'checksum': checksum},
+        )
+        live.filter(id__in=live_ids).delete()
+        if previous is not None and previous.path != name:
+            old = directory / previous.path
+            transaction.on_commit(lambda: old.unlink(missing_ok=True))
+    return len(live_ids)
+
+
+# ------------------ Query façade ------------------
+def iter_sales(start=None, end=None):
+    """[start, end) oralig'idagi barcha sotuvlar (jonli va arxiv) dict ko'rinishida"""
+    archives = SaleArchive.objects.order_by('year', 'month')
+    for archive in archives:
+        month_start, month_end = month_bounds(archive.year, archive.month)
+        if (start and month_end <= start) or (end and month_start >= end):
+            continue
+        for sale in read_archive(archive):
+            if (start and sale['created_at'] < start) or (end and sale['created_at'] >= end):
+                continue
+            yield sale
+
+    live = Sale.objects.order_by('created_at')
+    if start:
+        live = live.filter(created_at__gte=start)
+    if end:
+        live = live.filter(created_at__lt=end)
+    yield from live.values(*ARCHIVE_FIELDS).iterator(chunk_size=5000)
+
+
+def sales_total(start, end):
+    """Oraliq bo'yicha sotuvlar summasi; to'liq arxivlangan oylar uchun faylni o'qimaydi"""
+    total = Sale.objects.filter(created_at__gte=start, created_at__lt=end).aggregate(t=Sum('total_price'))['t'] or 0
+    for archive in SaleArchive.objects.all():
+        month_start, month_end = month_bounds(archive.year, archive.month)
+        if month_end <= start or month_start >= end:
+            continue
+        if start <= month_start and month_end <= end:
+            total += archive.total_price
+        else:
+            total += sum(
+                (s['total_price'] for s in read_archive(archive) if start <= s['created_at'] < end), Decimal(0)
+            )
+    return money(total)
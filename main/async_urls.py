@@ -0,0 +1,28 @@
+# main/async_urls.py
+# main/urls.py bilan bir xil yo'llar, lekin katalog viewlari native async.
+# settings.ASYNC_CATALOGUE_VIEWS = True bo'lsa core/urls.py shu faylni ulaydi.
+from django.urls import path
+from main import async_views
+from main.views import (
+    CartListAPIView, CartCreateAPIView, CartDeleteAPIView, TopCustomersAPIView, CustomerSaleListAPIView,
+    SellerLeaderboardAPIView, RelatedProductListAPIView, metrics_view,
+)
+
+urlpatterns = [
+    path('category/', async_views.category_list, name='api-category-list'),
+    path('products/', async_views.product_list, name='api-product-list'),
+    path('category/<int:pk>/', async_views.category_detail, name='api-category-detail'),
+    path('product/<int:pk>/', async_views.product_detail, name='api-product-detail'),
+    path("carts/", CartListAPIView.as_view(), name="carts-list"),
+    path("cart-add/", CartCreateAPIView.as_view(), name="cart-add"),
+    path("cart/<int:pk>/delete/", CartDeleteAPIView.as_view(), name="cart-delete"),
+    path("about/", async_views.about, name="about"),
+    path("announcements/", async_views.announcement_list, name="announcement-list"),
+    path("product/<int:pk>/related/", RelatedProductListAPIView.as_view(), name="product-related"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("customers/top/", TopCustomersAPIView.as_view(), name="customer-top"),
+    path("customer/<int:pk>/sales/", CustomerSaleListAPIView.as_view(), name="customer-sales"),
+    path("sellers/leaderboard/", SellerLeaderboardAPIView.as_view(), name="seller-leaderboard"),
+    path("announcement/<int:pk>/", async_views.announcement_detail, name="announcement-detail"),
+
+]
@@ -0,0 +1,185 @@
+# main/async_views.py
+# ASGI ostida sync_to_async thread hopsiz ishlaydigan katalog (faqat o'qish) viewlari.
+# Serializerlar prefetch qilingan obyektlar ustida ishlaydi, shuning uchun DB so'rovi yubormaydi.
+# Javob shartnomasi DRF viewlari bilan bir xil: DEFAULT_RENDERER_CLASSES dan Accept bo'yicha
+# renderer (Browsable API dan tashqari), ETag/Last-Modified va 304 (main/caching.py), JSON 404/406.
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import aprefetch_related_objects
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .caching import ConditionalGetMixin, add_validators, make_validators, not_modified_response, validator_aggregates
+from .db_router import replica_reads
+from .models import Category, Product, About, Announcement
+from .serializers import (
+    CategorySerializer, ProductSerializer, AboutSerializer, AnnouncementSerializer, AnnouncementListSerializer,
+)
+from .views import filter_categories, filter_products, product_facets, search_products, wants_facets
+
+
+class NotFound(Exception):
+    def __init__(self, model):
+        super().__init__(f"No {model._meta.object_name} matches the given query.")
+
+
+def _renderers():
+    return [
+        renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+        if not issubclass(renderer, BrowsableAPIRenderer)
+    ]
+
+
+def _render(request, data, status=200, validators=None):
+    renderer, media_type = request.accepted_renderer, request.accepted_media_type
+    content_type = f"{media_type}; charset={renderer.charset}" if renderer.charset else media_type
+    response = HttpResponse(renderer.render(data, media_type, {}), status=status, content_type=content_type)
+    if validators is not None and status == 200:
+        add_validators(response, validators, ConditionalGetMixin.cache_max_age)
+    return response
+
+
+async def _validators(request, queryset, related=()):
+    stats = await queryset.order_by().aaggregate(**validator_aggregates(related=related))
+    return make_validators(request, stats)
+
+
+def _api_view(view):
+    """APIView kabi: avval Accept bo'yicha renderer (yo'q bo'lsa 406), topilmasa JSON 404"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        renderers = _renderers()
+        try:
+            request.accepted_renderer, request.accepted_media_type = (
+                DefaultContentNegotiation().select_renderer(Request(request), renderers)
+            )
+        except NotAcceptable as exc:
+            request.accepted_renderer, request.accepted_media_type = renderers[0], renderers[0].media_type
+            return _render(request, {'detail': exc.detail}, status=exc.status_code)
+        try:
+            return await view(request, *args, **kwargs)
+        except NotFound as exc:
+            return _render(request, {'detail': str(exc)}, status=404)
+    return wrapper
+
+
+def _not_modified(request, validators):
+    response = not_modified_response(request, validators)
+    if response is not None:
+        add_validators(response, validators, ConditionalGetMixin.cache_max_age)
+    return response
+
+
+async def _fetch_list(queryset, *prefetch):
+    objects = [obj async for obj in queryset.aiterator(chunk_size=2000)]
+    if prefetch:
+        await aprefetch_related_objects(objects, *prefetch)
+    return objects
+
+
+async def _fetch_one(queryset, *prefetch, **lookup):
+    try:
+        obj = await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise NotFound(queryset.model)
+    if prefetch:
+        await aprefetch_related_objects([obj], *prefetch)
+    return obj
+
+
+@replica_reads
+@require_GET
+@_api_view
+async def category_list(request):
+    queryset = filter_categories(Category.objects.all(), request.GET)
+    validators = await _validators(request, queryset)
+    if response := _not_modified(request, validators):
+        return response
+    categories = await _fetch_list(queryset)
+    return _render(request, CategorySerializer(categories, many=True).data, validators=validators)
+
+
+@replica_reads
+@require_GET
+@_api_view
+async def category_detail(request, pk):
+    queryset = Category.objects.filter(pk=pk)
+    validators = await _validators(request, queryset)
+    if response := _not_modified(request, validators):
+        return response
+    category = await _fetch_one(queryset, pk=pk)
+    return _render(request, CategorySerializer(category, context={'request': request}).data, validators=validators)
+
+
+@replica_reads
+@require_GET
+@_api_view
+async def product_list(request):
+    queryset = filter_products(Product.objects.all(), request.GET)
+    # fasetlar tanlangan filtrdan tashqaridagi mahsulotlarni ham sanaydi
+    validated = search_products(Product.objects.all(), request.GET) if wants_facets(request.GET) else queryset
+    validators = await _validators(request, validated, ('images',))
+    if response := _not_modified(request, validators):
+        return response
+    products = await _fetch_list(queryset, 'images')
+    data = ProductSerializer(products, many=True).data
+    if wants_facets(request.GET):
+        # indeks bo'sh bo'lsa DBdan quriladi, shuning uchun sync kod thread ichida
+        data = {'results': data, 'facets': await sync_to_async(product_facets)(request.GET)}
+    return _render(request, data, validators=validators)
+
+
+@replica_reads
+@require_GET
+@_api_view
+async def product_detail(request, pk):
+    queryset = Product.objects.filter(pk=pk)
+    validators = await _validators(request, queryset, ('images',))
+    if response := _not_modified(request, validators):
+        return response
+    product = await _fetch_one(queryset, 'images', pk=pk)
+    return _render(request, ProductSerializer(product, context={'request': request}).data, validators=validators)
+
+
+@replica_reads
+@require_GET
+@_api_view
+async def about(request):
+    validators = await _validators(request, About.objects.all(), ('images',))
+    if response := _not_modified(request, validators):
+        return response
+    obj = await About.objects.afirst()
+    if obj is not None:
+        await aprefetch_related_objects([obj], 'images')
+    return _render(request, AboutSerializer(obj, context={'request': request}).data, validators=validators)
+
+
+@replica_reads
+@require_GET
+@_api_view
+async def announcement_list(request):
+    queryset = Announcement.objects.defer('description', 'description_html')
+    validators = await _validators(request, queryset, ('images',))
+    if response := _not_modified(request, validators):
+        return response
+    announcements = await _fetch_list(queryset, 'images')
+    data = AnnouncementListSerializer(announcements, many=True, context={'request': request}).data
+    return _render(request, data, validators=validators)
+
+
+@replica_reads
+@require_GET
+@_api_view
+async def announcement_detail(request, pk):
+    queryset = Announcement.objects.filter(pk=pk)
+    validators = await _validators(request, queryset, ('images',))
+    if response := _not_modified(request, validators):
+        return response
+    announcement = await _fetch_one(queryset, 'images', pk=pk)
+    return _render(request, AnnouncementSerializer(announcement, context={'request': request}).data, validators=validators)
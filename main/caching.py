@@ -0,0 +1,100 @@
+# main/caching.py
+# Conditional GET (ETag / Last-Modified) for the public catalogue views.
+# Validators come from one MAX(updated_at) + COUNT query, including the serialized related
+# tables (images), so a 304 is returned before the queryset is serialized.
+# The module-level helpers are shared with main/async_views.py.
+# Media URLs signed with an expiry (ObjectStorage without PUBLIC_URL) are part of the body, so the
+# current signing window is added to the ETag / Last-Modified and caps max-age.
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def validator_aggregates(last_modified_field='updated_at', related=()):
+    """
+    Validator uchun aggregate lar. related — serializerga kiradigan bog'liq jadvallar
+    (masalan 'images'): ularning MAX(updated_at) va soni ham hisobga olinadi, JOIN tufayli COUNT DISTINCT.
+    """
+    aggregates = {'last_modified': Max(last_modified_field), 'count': Count('pk', distinct=bool(related))}
+    for name in related:
+        aggregates[f'{name}_modified'] = Max(f'{name}__updated_at')
+        aggregates[f'{name}_count'] = Count(name, distinct=True)
+    return aggregates
+
+
+def media_signing_window():
+    """Media URL lari muddatli imzolansa joriy (oyna raqami, soniya), aks holda None"""
+    signing_window = getattr(default_storage, 'signing_window', None)
+    return signing_window() if signing_window is not None else None
+
+
+def make_validators(request, stats):
+    """validator_aggregates() natijasidan (etag, timestamp)"""
+    last_modified = max(
+        (value for name, value in stats.items() if name.endswith('modified') and value is not None), default=None
+    )
+    state = '|'.join(
+        f"{name}={value.isoformat() if hasattr(value, 'isoformat') else value}" for name, value in sorted(stats.items())
+    )
+    key = f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}|{state}"
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    window = media_signing_window()
+    if window is not None:
+        # oldingi oynadagi javob (URL lari tugashi mumkin) 304 bilan tasdiqlanmaydi
+        number, seconds = window
+        key += f"|media_window={number}"
+        timestamp = max(timestamp or 0, number * seconds)
+    etag = 'W/"%s"' % hashlib.md5(key.encode()).hexdigest()
+    return etag, timestamp
+
+
+def not_modified_response(request, validators):
+    etag, timestamp = validators
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def add_validators(response, validators, max_age):
+    etag, timestamp = validators
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    window = media_signing_window()
+    if window is not None:
+        max_age = min(max_age, window[1])
+    patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ('Accept',))
+
+
+class ConditionalGetMixin:
+    last_modified_field = 'updated_at'
+    related_validators = ()
+    cache_max_age = 60
+    _validators = None
+
+    def get_conditional_queryset(self):
+        queryset = self.get_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def check_not_modified(self, request, queryset):
+        """304/412 javobini qaytaradi yoki None (davom etish kerak)"""
+        stats = queryset.order_by().aggregate(**validator_aggregates(self.last_modified_field, self.related_validators))
+        self._validators = make_validators(request, stats)
+        return not_modified_response(request, self._validators)
+
+    def get(self, request, *args, **kwargs):
+        response = self.check_not_modified(request, self.get_conditional_queryset())
+        if response is not None:
+            return response
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self._validators and response.status_code in (200, 304):
+            add_validators(response, self._validators, self.cache_max_age)
+        return response
@@ -0,0 +1,158 @@
+# main/columnar.py
+# Offline tahlil uchun ustunli (columnar) snapshot: har bir ustun alohida .npy fayl,
+# o'qishda memory-map qilinadi (nusxa olinmaydi), guruhlab yig'ish NumPy da vektorli.
+import json
+import shutil
+from array import array
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .archive import iter_sales
+from .models import Expense, Product, Purchase, Salary
+from .money import to_cents
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NULL_ID = -1
+
+# jadval -> ustunlar (hammasi int64; pul tiyinda, month = YYYYMM, vaqt = unix sekund)
+TABLES = {
+    'sale': ['id', 'product_id', 'category_id', 'customer_id', 'sold_by_id', 'quantity', 'total_price', 'month', 'created_at'],
+    'purchase': ['id', 'product_id', 'category_id', 'quantity', 'total_cost', 'month', 'created_at'],
+    'expense': ['id', 'created_by_id', 'price', 'month', 'created_at'],
+    'salary': ['id', 'gave_by_id', 'taken_by_id', 'salary_price', 'month', 'created_at'],
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for columnar snapshots (pip install numpy)")
+
+
+def default_dir():
+    return Path(settings.COLUMNAR_EXPORT_DIR)
+
+
+def _month(dt):
+    dt = timezone.localtime(dt)
+    return dt.year * 100 + dt.month
+
+
+def _id(value):
+    return NULL_ID if value is None else value
+
+
+def _sale_rows():
+    categories = dict(Product.objects.values_list('id', 'category_id'))
+    for s in iter_sales():
+        yield (
+            s['id'], _id(s['product_id']), _id(categories.get(s['product_id'])), _id(s['customer_id']),
+            _id(s['sold_by_id']), s['quantity'], to_cents(s['total_price']),
+            _month(s['created_at']), int(s['created_at'].timestamp()),
+        )
+
+
+def _purchase_rows():
+    qs = Purchase.objects.values_list('id', 'product_id', 'product__category_id', 'quantity', 'total_cost', 'purchase_date')
+    for pk, product_id, category_id, quantity, total_cost, date in qs.iterator(chunk_size=5000):
+        yield pk, product_id, _id(category_id), quantity, to_cents(total_cost), _month(date), int(date.timestamp())
+
+
+def _expense_rows():
+    qs = Expense.objects.values_list('id', 'created_by_id', 'price', 'created_at')
+    for pk, created_by_id, price, date in qs.iterator(chunk_size=5000):
+        yield pk, _id(created_by_id), to_cents(price), _month(date), int(date.timestamp())
+
+
+def _salary_rows():
+    qs = Salary.objects.values_list(
+        'id', 'gave_by_id', 'taken_by_id', 'salary_price', 'for_month__year', 'for_month__month', 'created_at'
+    )
+    for pk, gave_by_id, taken_by_id, price, year, month, date in qs.iterator(chunk_size=5000):
+        yield pk, gave_by_id, taken_by_id, to_cents(price), year * 100 + month, int(date.timestamp())
+
+
+ROW_SOURCES = {
+    'sale': _sale_rows,
+    'purchase': _purchase_rows,
+    'expense': _expense_rows,
+    'salary': _salary_rows,
+}
+
+
+def export(directory=None):
+    """Barcha jadvallarni yozadi va {jadval: qatorlar soni} qaytaradi"""
+    _require_numpy()
+    directory = Path(directory or default_dir())
+    tmp = directory.with_name(directory.name + '.tmp')
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    counts = {}
+    for table, columns in TABLES.items():
+        buffers = [array('q') for _ in columns]
+        for row in ROW_SOURCES[table]():
+            for buffer, value in zip(buffers, row):
+                buffer.append(value)
+        (tmp / table).mkdir(parents=True)
+        for column, buffer in zip(columns, buffers):
+            np.save(tmp / table / f'{column}.npy', np.frombuffer(buffer, dtype=np.int64))
+        counts[table] = len(buffers[0])
+
+    manifest = {'exported_at': timezone.now().isoformat(), 'rows': counts, 'tables': TABLES}
+    (tmp / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+
+    # eski snapshotni yangisi bilan almashtirish (o'quvchilar yarim yozilgan faylni ko'rmaydi)
+    old = directory.with_name(directory.name + '.old')
+    shutil.rmtree(old, ignore_errors=True)
+    if directory.exists():
+        directory.rename(old)
+    tmp.rename(directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return counts
+
+
+def load(table, directory=None):
+    """Jadval ustunlarini memory-mapped massivlar sifatida qaytaradi"""
+    _require_numpy()
+    directory = Path(directory or default_dir()) / table
+    return {column: np.load(directory / f'{column}.npy', mmap_mode='r') for column in TABLES[table]}
+
+
+def group_sum(table, by, value, directory=None, where=None):
+    """
+    ``by`` ustun(lar)i bo'yicha ``value`` ni yig'adi: {kalit: summa} (pul ustunlari tiyinda).
+    ``where`` ixtiyoriy: ustunlar dict'idan bool mask qaytaruvchi funksiya.
+    Misol: group_sum('sale', ('month', 'sold_by_id'), 'total_price')
+    """
+    columns = load(table, directory)
+    names = (by,) if isinstance(by, str) else tuple(by)
+    mask = where(columns) if where is not None else None
+
+    def column(name):
+        return columns[name] if mask is None else columns[name][mask]
+
+    values = column(value)
+    if not len(values):
+        return {}
+
+    # kalit ustunlari bitta (n, k) massivga nusxalanmaydi: har ustun alohida kodlanadi va
+    # kodlar bitta butun son indeksga yig'iladi (mmap qilingan 1-D ustunlar to'g'ridan-to'g'ri o'qiladi)
+    uniques, codes = [], []
+    for name in names:
+        unique, inverse = np.unique(column(name), return_inverse=True)
+        uniques.append(unique)
+        codes.append(inverse.reshape(-1))
+    shape = tuple(len(unique) for unique in uniques)
+    groups, inverse = np.unique(np.ravel_multi_index(codes, shape), return_inverse=True)
+    # pul tiyinda: bincount(weights=) float64 ga o'tadi, shuning uchun int64 da aniq yig'iladi
+    totals = np.zeros(len(groups), dtype=np.int64)
+    np.add.at(totals, inverse.reshape(-1), values)
+    keys = zip(*(unique[index] for unique, index in zip(uniques, np.unravel_index(groups, shape))))
+    if len(names) == 1:
+        return {int(k[0]): int(t) for k, t in zip(keys, totals)}
+    return {tuple(int(x) for x in k): int(t) for k, t in zip(keys, totals)}
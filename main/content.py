@@ -0,0 +1,143 @@
+# main/content.py
+# CKEditor5 HTML ni saqlash paytida bir marta tozalash (sanitize), siqish (minify)
+# va ro'yxatlar uchun qisqa matn (excerpt) tayyorlash.
+import re
+from html import escape
+from html.parser import HTMLParser
+
+ALLOWED_TAGS = {
+    'p', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b', 'em', 'i', 'u', 's',
+    'a', 'ul', 'ol', 'li', 'span', 'pre', 'code', 'blockquote', 'figure', 'figcaption',
+    'img', 'table', 'thead', 'tbody', 'tr', 'th', 'td', 'label', 'input', 'hr',
+}
+VOID_TAGS = {'br', 'img', 'input', 'hr'}
+# bu teglar ichidagi matn ham tashlanadi
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript'}
+BLOCK_TAGS = {
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'blockquote', 'pre', 'figure', 'figcaption',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td', 'br', 'hr',
+}
+
+ALLOWED_ATTRS = {
+    'a': {'href', 'title', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'span': {'style'},
+    'code': {'class'},
+    'pre': {'class'},
+    'ul': {'class'},
+    'li': {'class'},
+    'label': {'class'},
+    'input': {'type', 'checked', 'disabled'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+}
+ALLOWED_STYLES = {'color', 'background-color', 'font-size'}
+URL_ATTRS = {'href', 'src'}
+SAFE_URL_RE = re.compile(r'^(https?:|mailto:|tel:|/|#|[^:]*$)', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _clean_style(value):
+    declarations = []
+    for declaration in value.split(';'):
+        name, _, val = declaration.partition(':')
+        name, val = name.strip().lower(), val.strip()
+        if name in ALLOWED_STYLES and val and 'url(' not in val.lower() and 'expression' not in val.lower():
+            declarations.append(f'{name}:{val}')
+    return ';'.join(declarations)
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.drop_depth = 0
+        self.pre_depth = 0
+        self.after_block = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth += 1
+            return
+        if self.drop_depth or tag not in ALLOWED_TAGS:
+            return
+
+        allowed = ALLOWED_ATTRS.get(tag, set())
+        parts = [tag]
+        for name, value in attrs:
+            if name not in allowed:
+                continue
+            value = value or ''
+            if name in URL_ATTRS and not SAFE_URL_RE.match(value.strip()):
+                continue
+            if name == 'style':
+                value = _clean_style(value)
+                if not value:
+                    continue
+            parts.append(f'{name}="{escape(value)}"' if value else name)
+        if tag == 'a' and 'target' in dict(attrs):
+            parts.append('rel="noopener noreferrer"')
+
+        self.html.append('<%s>' % ' '.join(dict.fromkeys(parts)))
+        self.after_block = tag in BLOCK_TAGS
+        if self.after_block:
+            self.text.append(' ')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+            if tag == 'pre':
+                self.pre_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and tag in ALLOWED_TAGS and not self.drop_depth:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth = max(0, self.drop_depth - 1)
+            return
+        if self.drop_depth or tag not in self.open_tags:
+            return
+        # yopilmagan ichki teglarni ham yopamiz
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f'</{open_tag}>')
+            if open_tag == 'pre':
+                self.pre_depth -= 1
+            if open_tag == tag:
+                break
+        self.after_block = tag in BLOCK_TAGS
+        if self.after_block:
+            self.text.append(' ')
+
+    def handle_data(self, data):
+        if self.drop_depth:
+            return
+        self.text.append(data)
+        if not self.pre_depth:
+            # bloklar orasidagi bo'sh joy ahamiyatsiz, inline matnda bitta probelga qisqaradi
+            if self.after_block and not data.strip():
+                return
+            data = WHITESPACE_RE.sub(' ', data)
+        self.after_block = False
+        self.html.append(escape(data, quote=False))
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f'</{self.open_tags.pop()}>')
+
+
+def render_content(html, excerpt_length=300):
+    """(tozalangan va siqilgan HTML, oddiy matn excerpt) qaytaradi"""
+    parser = _Sanitizer()
+    parser.feed(html or '')
+    parser.close()
+    rendered = ''.join(parser.html).strip()
+
+    text = WHITESPACE_RE.sub(' ', ''.join(parser.text)).strip()
+    if len(text) > excerpt_length:
+        text = text[:excerpt_length - 1].rsplit(' ', 1)[0] + '…'
+    return rendered, text
@@ -0,0 +1,107 @@
+# main/customers.py
+# CustomerStats ni inkremental yangilash (Sale signallaridan) va to'liq qayta qurish.
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .archive import read_archive
+from .models import CustomerStats, Sale, SaleArchive
+from .money import money
+
+
+def add_sale(customer_id, amount, created_at):
+    CustomerStats.objects.get_or_create(customer_id=customer_id)
+    CustomerStats.objects.filter(customer_id=customer_id).update(
+        lifetime_revenue=F('lifetime_revenue') + amount,
+        order_count=F('order_count') + 1,
+        first_sale_at=Least(Coalesce('first_sale_at', created_at), created_at),
+        last_sale_at=Greatest(Coalesce('last_sale_at', created_at), created_at),
+    )
+
+
+def change_revenue(customer_id, delta):
+    CustomerStats.objects.filter(customer_id=customer_id).update(lifetime_revenue=F('lifetime_revenue') + delta)
+
+
+def _last_archived_sale(customer_id):
+    """Mijozning arxivdagi eng oxirgi sotuvi (arxiv oylari yangidan eskiga, topilguncha)"""
+    for archive in SaleArchive.objects.order_by('-year', '-month'):
+        dates = [sale['created_at'] for sale in read_archive(archive) if sale['customer_id'] == customer_id]
+        if dates:
+            return max(dates)
+    return None
+
+
+def remove_sale(customer_id, amount, created_at):
+    stats = CustomerStats.objects.filter(customer_id=customer_id)
+    stats.update(
+        lifetime_revenue=F('lifetime_revenue') - amount,
+        order_count=Greatest(F('order_count') - 1, 0),
+    )
+    # chegaradagi sotuv o'chdi: qolgan sotuvlardan qayta topamiz. Arxivdagilar jonlilardan eski,
+    # shuning uchun birinchi sotuv faqat jonli sotuv bo'lsa o'zgaradi
+    live = Sale.objects.filter(customer_id=customer_id)
+    stats.filter(first_sale_at=created_at).update(
+        first_sale_at=Subquery(live.order_by('created_at').values('created_at')[:1])
+    )
+    if stats.filter(last_sale_at=created_at).exists():
+        last = live.aggregate(last=Max('created_at'))['last'] or _last_archived_sale(customer_id)
+        stats.filter(last_sale_at=created_at).update(last_sale_at=last)
+
+
+def customer_totals(sale_model=Sale, archive_model=SaleArchive):
+    """
+    {customer_id: {'revenue', 'count', 'first', 'last'}}: jonli sotuvlar (GROUP BY) va arxiv fayllari.
+    Modellar parametr: 0013 migratsiyasi tarixiy modellar bilan boshlang'ich qatorlarni to'ldiradi.
+    """
+    totals = defaultdict(lambda: {'revenue': Decimal(0), 'count': 0, 'first': None, 'last': None})
+
+    def merge(customer_id, revenue, count, first, last):
+        row = totals[customer_id]
+        row['revenue'] += revenue
+        row['count'] += count
+        row['first'] = min(filter(None, (row['first'], first)), default=None)
+        row['last'] = max(filter(None, (row['last'], last)), default=None)
+
+    live = (
+        sale_model.objects.filter(customer_id__isnull=False).values('customer_id')
+        .annotate(revenue=Sum('total_price'), count=Count('id'), first=Min('created_at'), last=Max('created_at'))
+        .order_by()
+    )
+    for row in live:
+        merge(row['customer_id'], row['revenue'] or 0, row['count'], row['first'], row['last'])
+    for archive in archive_model.objects.all():
+        for sale in read_archive(archive):
+            if sale['customer_id'] is not None:
+                merge(sale['customer_id'], sale['total_price'], 1, sale['created_at'], sale['created_at'])
+    return totals
+
+
+def stats_rows(stats_model, totals):
+    return [
+        stats_model(
+            customer_id=customer_id, lifetime_revenue=money(row['revenue']), order_count=row['count'],
+            first_sale_at=row['first'], last_sale_at=row['last'],
+        )
+        for customer_id, row in totals.items()
+    ]
+
+
+def rebuild_customer_stats():
+    """
+    Barcha CustomerStats ni jonli sotuvlar (GROUP BY) va arxiv fayllaridan qayta qurish.
+    Bitta tranzaksiyada, mavjud qatorlar qulflangan holda (main/sellers.py dagi kabi).
+    """
+    with transaction.atomic():
+        list(CustomerStats.objects.select_for_update().values_list('pk', flat=True))
+        totals = customer_totals()
+        rows = stats_rows(CustomerStats, totals)
+        CustomerStats.objects.exclude(customer_id__in=totals).delete()
+        CustomerStats.objects.bulk_create(
+            rows, batch_size=1000, update_conflicts=True, unique_fields=['customer'],
+            update_fields=['lifetime_revenue', 'order_count', 'first_sale_at', 'last_sale_at'],
+        )
+    return len(rows)
@@ -0,0 +1,177 @@
+# main/db_router.py
+# O'qish replikalari (DATABASE_REPLICAS). Faqat ochiq (AllowAny) viewlarning GET/HEAD so'rovlari
+# replikadan o'qiydi; yozuvlar, tranzaksiya ichidagi o'qishlar (Sale.save, Purchase.save, signallar),
+# admin, buyruqlar va boshqa hamma narsa — default (primary).
+# Read-your-writes: so'rov primaryga yozsa, shu mijozning keyingi so'rovlari REPLICA_STICKY_SECONDS
+# davomida primarydan o'qiydi (cookie va kesh kaliti: JWT mijozlari cookie saqlamasa ham).
+# Middleware sync va async: ASGI ostida holat (contextvar) so'rov coroutine ichida o'rnatiladi,
+# async ORM chaqiruvlari (sync_to_async) kontekst nusxasida shu RoutingState obyektini ko'radi.
+import contextvars
+import hashlib
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import AllowAny
+
+STICKY_COOKIE = 'db_primary_until'
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def replica_reads(view):
+    """DRF bo'lmagan ochiq viewlar (main/async_views.py) uchun belgi"""
+    view.replica_reads = True
+    return view
+
+
+def _is_public(view_func):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, 'replica_reads', False)
+    permissions = getattr(view_class, 'permission_classes', ())
+    return bool(permissions) and all(permission is AllowAny for permission in permissions)
+
+
+def _client_key(request, user=None):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        return 'db:primary:' + hashlib.sha1(authorization.encode()).hexdigest()
+    if user is not None and user.is_authenticated:
+        return f'db:primary:user:{user.pk}'
+    return None
+
+
+async def _aclient_key(request):
+    # async yo'lda request.user (lazy, sync DB so'rovi) o'rniga request.auser()
+    auser = getattr(request, 'auser', None)
+    if request.META.get('HTTP_AUTHORIZATION') or auser is None:
+        return _client_key(request)
+    return _client_key(request, await auser())
+
+
+def _pinned_by_cookie(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _is_pinned(request):
+    if _pinned_by_cookie(request):
+        return True
+    key = _client_key(request, getattr(request, 'user', None))
+    return key is not None and cache.get(key) is not None
+
+
+async def _ais_pinned(request):
+    if _pinned_by_cookie(request):
+        return True
+    key = await _aclient_key(request)
+    return key is not None and await cache.aget(key) is not None
+
+
+def _set_cookie(response):
+    window = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+    response.set_cookie(STICKY_COOKIE, f"{time.time() + window:.3f}", max_age=window, httponly=True, samesite='Lax')
+    return window
+
+
+def _pin(request, response):
+    window = _set_cookie(response)
+    key = _client_key(request, getattr(request, 'user', None))
+    if key is not None:
+        cache.set(key, 1, window)
+
+
+async def _apin(request, response):
+    window = _set_cookie(response)
+    key = await _aclient_key(request)
+    if key is not None:
+        await cache.aset(key, 1, window)
+
+
+def _use_replica(request, view_func):
+    return request.method in ('GET', 'HEAD') and _is_public(view_func)
+
+
+class ReplicaRoutingMiddleware:
+    """So'rov uchun replika tanlaydi va yozuvdan keyin mijozni primaryga yopishtiradi"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django sync process_view ni sync_to_async bilan o'raydi: async zanjirda async versiya
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and getattr(settings, 'DATABASE_REPLICAS', None):
+            _pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and getattr(settings, 'DATABASE_REPLICAS', None):
+            await _apin(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        replicas = getattr(settings, 'DATABASE_REPLICAS', None)
+        if state is not None and replicas and _use_replica(request, view_func) and not _is_pinned(request):
+            state.replica = random.choice(replicas)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        replicas = getattr(settings, 'DATABASE_REPLICAS', None)
+        if state is not None and replicas and _use_replica(request, view_func) and not await _ais_pinned(request):
+            state.replica = random.choice(replicas)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None or state.replica is None or state.wrote
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # shu so'rovning qolgan o'qishlari ham primaryda (signallar, javob serializatsiyasi)
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replika primaryning nusxasi: aliaslar orasidagi bog'lanishlar bir xil ma'lumot
+        return True
@@ -0,0 +1,133 @@
+# main/facets.py
+# Katalog fasetlari (category / brand / narx oralig'i bo'yicha sonlar).
+# Sonlar (category_id, brand, narx oralig'i) kataklari bo'yicha yig'iladi: har so'rovda
+# mahsulotlar emas, kataklar (bir necha yuzta) aylanadi. Filtrsiz/faqat category va brand
+# tanlangan so'rovlar keshlangan kataklardan (bitta GROUP BY, avlod kaliti almashganda qayta
+# quriladi), qidiruv yoki ixtiyoriy narx chegarasi bo'lsa — shu filtrlar bilan GROUP BY so'rovidan.
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .models import Product
+
+GENERATION_KEY = 'facets:generation'
+CELLS_KEY = 'facets:cells:%s'
+
+# jarayon ichidagi nusxa: avlod o'zgarmaguncha keshdan qayta unpickle qilinmaydi
+_local = {'generation': None, 'cells': None}
+
+
+def price_buckets():
+    return list(getattr(settings, 'PRODUCT_PRICE_BUCKETS', [0]))
+
+
+def bucket_label(index, bounds):
+    low = bounds[index]
+    if index + 1 < len(bounds):
+        return f"{low}-{bounds[index + 1]}"
+    return f"{low}+"
+
+
+def bucket_expression(bounds):
+    """effective_price -> oraliq indeksi (chegaradan past narxlar 0-oraliqqa)"""
+    return Case(
+        *[When(effective_price__gte=low, then=Value(index)) for index, low in reversed(list(enumerate(bounds)))],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def invalidate():
+    """Indeksni eskirgan deb belgilaydi; keyingi o'qishda qayta quriladi"""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(GENERATION_KEY, generation, None):
+            generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def grouped_cells(queryset, bounds):
+    """[(category_id, brand, bucket, count)] — bitta GROUP BY so'rovi"""
+    return list(
+        queryset.order_by()
+        .annotate(bucket=bucket_expression(bounds))
+        .values_list('category_id', 'brand', 'bucket')
+        .annotate(count=Count('pk'))
+    )
+
+
+def build_cells():
+    # umumiy keshga yoziladi: kechikkan replikadan emas, primarydan o'qiladi
+    return grouped_cells(Product.objects.using(DEFAULT_DB_ALIAS), price_buckets())
+
+
+def get_cells():
+    generation = _generation()
+    if _local['generation'] == generation:
+        return _local['cells']
+    cells = cache.get(CELLS_KEY % generation)
+    if cells is None:
+        cells = build_cells()
+        cache.set(CELLS_KEY % generation, cells, None)
+    _local.update(generation=generation, cells=cells)
+    return cells
+
+
+def facet_counts(queryset=None, categories=(), brands=(), min_price=None, max_price=None):
+    """
+    Fasetlar bo'yicha sonlar. Har bir faset o'zidan boshqa filtrlarni hisobga oladi
+    (multi-select: tanlangan brendlar boshqa brendlarning sonini yashirmaydi).
+    queryset — qidiruv natijasi (None bo'lsa barcha mahsulotlar).
+    """
+    categories = set(categories)
+    brands = set(brands)
+    bounds = price_buckets()
+    if queryset is None and min_price is None and max_price is None:
+        cells = get_cells()
+    else:
+        queryset = Product.objects.all() if queryset is None else queryset
+        if min_price is not None:
+            queryset = queryset.filter(effective_price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(effective_price__lte=max_price)
+        cells = grouped_cells(queryset, bounds)
+
+    by_category, by_brand, by_price = Counter(), Counter(), Counter()
+    for category_id, brand, bucket, count in cells:
+        in_category = not categories or category_id in categories
+        in_brand = not brands or brand in brands
+        if in_brand:
+            by_category[category_id] += count
+        if in_category:
+            by_brand[brand] += count
+        if in_category and in_brand:
+            by_price[bucket] += count
+
+    return {
+        'category': [
+            {'id': category_id, 'count': count}
+            for category_id, count in sorted(by_category.items(), key=lambda item: -item[1])
+        ],
+        'brand': [
+            {'value': brand, 'count': count}
+            for brand, count in sorted(by_brand.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'price': [
+            {
+                'label': bucket_label(index, bounds),
+                'min': bounds[index],
+                'max': bounds[index + 1] if index + 1 < len(bounds) else None,
+                'count': by_price[index],
+            }
+            for index in range(len(bounds))
+        ],
+    }
@@ -19,3 +19,20 @@ class SaleForm(forms.ModelForm):
                     f"Mahsulot yetarli emas! Omborda faqat {product.amount} dona bor."
                 )
         return quantity
+
+
+class ProductImportForm(forms.Form):
+    file = forms.FileField(label="CSV / XLSX", help_text="Columns: sku, title, brand, price, discount_percentage, amount, category, description, image, images")
+    images = forms.FileField(label="Images (zip)", required=False)
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if not upload.name.lower().endswith((".csv", ".xlsx")):
+            raise ValidationError("Faqat .csv yoki .xlsx fayl yuklang.")
+        return upload
+
+    def clean_images(self):
+        upload = self.cleaned_data.get("images")
+        if upload and not upload.name.lower().endswith(".zip"):
+            raise ValidationError("Rasmlar .zip arxiv ko'rinishida yuklanadi.")
+        return upload
@@ -0,0 +1,425 @@
+# main/importer.py
+# Katalogni CSV / XLSX dan ommaviy import qilish (manage.py import_products va ProductAdmin).
+# Mahsulotlar sku bo'yicha bulk_create(update_conflicts=True) bilan upsert qilinadi,
+# mavjud mahsulotlar qoldig'i esa Product.adjust_stock kabi amount = amount + delta bilan o'zgaradi,
+# discount_price butun batch uchun vektorli hisoblanadi, rasmlar (katalog yoki zip dan)
+# HashedMediaStorage orqali saqlanadi va Images qatorlari bulk_create bilan qo'shiladi.
+# import_products() generator: progress va xatolar hodisa (dict) sifatida oqim bilan qaytadi.
+import csv
+import io
+import os
+import re
+import zipfile
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import facets
+from .models import Category, Images, LowStockAlert, Product, StockMovement
+from .money import MONEY_DECIMAL_PLACES, MONEY_MAX_DIGITS, money, to_cents
+from .pricing import reapply_active_schedules, record_history
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+REQUIRED_COLUMNS = ('sku', 'title', 'brand', 'price')
+# ustun sarlavhada bo'lsa yangilanadi, bo'lmasa mavjud qiymat saqlanadi
+OPTIONAL_COLUMNS = ('description', 'discount_percentage', 'amount', 'low_stock_threshold', 'category', 'image', 'images')
+IMAGE_SEPARATOR = re.compile(r'[;|]')
+
+
+class RowError(ValueError):
+    pass
+
+
+# ---------------- o'qish ----------------
+def read_csv(fileobj):
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    yield from csv.DictReader(fileobj)
+
+
+def _column_index(ref):
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _iter_detached(fh, tag):
+    """
+    iterparse bo'yicha tag elementlari. element.clear() elementni ota elementdan uzmaydi, shuning uchun
+    qayta ishlangan element otasidan olib tashlanadi va katta varaqda ham xotira o'smaydi.
+    """
+    ancestors = []
+    for event, element in iterparse(fh, events=('start', 'end')):
+        if event == 'start':
+            ancestors.append(element)
+            continue
+        ancestors.pop()
+        if element.tag == tag:
+            yield element
+            ancestors[-1].remove(element)
+
+
+def read_xlsx(fileobj):
+    """Birinchi varaq qatorlari dict ko'rinishida (iterparse: butun varaq xotiraga yuklanmaydi)"""
+    ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    with zipfile.ZipFile(fileobj) as archive:
+        shared = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            with archive.open('xl/sharedStrings.xml') as fh:
+                for element in _iter_detached(fh, f'{ns}si'):
+                    shared.append(''.join(t.text or '' for t in element.iter(f'{ns}t')))
+
+        sheet = next(name for name in sorted(archive.namelist()) if name.startswith('xl/worksheets/sheet'))
+        header = None
+        with archive.open(sheet) as fh:
+            for element in _iter_detached(fh, f'{ns}row'):
+                values = {}
+                for cell in element.iter(f'{ns}c'):
+                    kind = cell.get('t')
+                    if kind == 'inlineStr':
+                        value = ''.join(t.text or '' for t in cell.iter(f'{ns}t'))
+                    else:
+                        raw = cell.find(f'{ns}v')
+                        value = raw.text if raw is not None else ''
+                        if kind == 's' and value:
+                            value = shared[int(value)]
+                    values[_column_index(cell.get('r', ''))] = value
+                row = [values.get(i, '') for i in range(max(values, default=-1) + 1)]
+                if header is None:
+                    header = [str(name).strip() for name in row]
+                    continue
+                yield {name: row[i] if i < len(row) else '' for i, name in enumerate(header)}
+
+
+def read_rows(fileobj, filename):
+    if filename.lower().endswith('.xlsx'):
+        return read_xlsx(fileobj)
+    return read_csv(fileobj)
+
+
+class ImageSource:
+    """Rasm fayllari: katalog yoki zip; nom bo'yicha (basename ham qabul qilinadi)"""
+
+    def __init__(self, path=None, fileobj=None):
+        self.root = None
+        self.archive = None
+        self.members = {}
+        if fileobj is not None or (path and zipfile.is_zipfile(path)):
+            self.archive = zipfile.ZipFile(fileobj or path)
+            for name in self.archive.namelist():
+                if not name.endswith('/'):
+                    self.members.setdefault(name, name)
+                    self.members.setdefault(os.path.basename(name), name)
+        elif path:
+            self.root = Path(path).resolve()
+
+    def open(self, name):
+        if self.archive is not None:
+            member = self.members.get(name) or self.members.get(os.path.basename(name))
+            if member is None:
+                return None
+            return File(io.BytesIO(self.archive.read(member)), name=os.path.basename(member))
+        if self.root is not None:
+            path = (self.root / name).resolve()
+            if self.root in path.parents and path.is_file():
+                return File(open(path, 'rb'), name=path.name)
+        return None
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+
+# ---------------- tekshirish ----------------
+def _decimal(value, field, required=False):
+    value = (str(value).strip() if value is not None else '').replace(',', '.')
+    if not value:
+        if required:
+            raise RowError(f"{field} is required")
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"{field}: {value!r} is not a number")
+    # nan / inf: money() va taqqoslashlar InvalidOperation beradi
+    if not number.is_finite():
+        raise RowError(f"{field}: {value!r} is not a finite number")
+    return number
+
+
+def _money(value, field, required=False):
+    number = _decimal(value, field, required)
+    if number is not None and abs(number) >= 10 ** (MONEY_MAX_DIGITS - MONEY_DECIMAL_PLACES):
+        raise RowError(f"{field}: {value!r} is too large")
+    return money(number)
+
+
+def parse_row(raw, columns):
+    row = {key.strip().lower(): (value.strip() if isinstance(value, str) else value) for key, value in raw.items() if key}
+    for field in ('sku', 'title', 'brand'):
+        if not row.get(field):
+            raise RowError(f"{field} is required")
+    parsed = {
+        'sku': str(row['sku']),
+        'title': str(row['title'])[:120],
+        'brand': str(row['brand'])[:120],
+        'price': _money(row.get('price'), 'price', required=True),
+    }
+    if parsed['price'] < 0:
+        raise RowError("price must not be negative")
+    if 'description' in columns:
+        parsed['description'] = row.get('description') or None
+    if 'discount_percentage' in columns:
+        discount = _decimal(row.get('discount_percentage'), 'discount_percentage')
+        if discount is not None and not 0 <= discount <= 100:
+            raise RowError("discount_percentage must be between 0 and 100")
+        parsed['discount_percentage'] = money(discount)
+    # bo'sh amount katak: mavjud mahsulot qoldig'i o'zgarmaydi (yangisida 0)
+    amount = _decimal(row.get('amount'), 'amount') if 'amount' in columns else None
+    if amount is not None:
+        parsed['amount'] = float(amount)
+    if 'low_stock_threshold' in columns:
+        threshold = _decimal(row.get('low_stock_threshold'), 'low_stock_threshold')
+        parsed['low_stock_threshold'] = float(threshold) if threshold is not None else None
+    if 'category' in columns:
+        parsed['category'] = row.get('category') or None
+    if 'image' in columns:
+        parsed['image'] = row.get('image') or None
+    if 'images' in columns:
+        parsed['images'] = [name.strip() for name in IMAGE_SEPARATOR.split(row.get('images') or '') if name.strip()]
+    return parsed
+
+
+# ---------------- hisoblash ----------------
+def discount_prices(prices, percentages):
+    """Product.save dagi discount_price formulasi butun batch uchun (tiyinda, ROUND_HALF_UP)"""
+    price_cents = [to_cents(price) for price in prices]
+    basis_points = [to_cents(pct) if pct is not None else 0 for pct in percentages]
+    if np is not None:
+        cents = np.asarray(price_cents, dtype=np.int64)
+        factor = 10000 - np.asarray(basis_points, dtype=np.int64)
+        result = ((cents * factor + 5000) // 10000).tolist()
+    else:
+        result = [(cents * (10000 - bp) + 5000) // 10000 for cents, bp in zip(price_cents, basis_points)]
+    return [Decimal(value) / 100 for value in result]
+
+
+def _category_ids(titles):
+    titles = {title for title in titles if title}
+    ids = dict(Category.objects.filter(title__in=titles).values_list('title', 'pk'))
+    for title in titles - ids.keys():
+        ids[title] = Category.objects.create(title=title).pk
+    return ids
+
+
+def _store_image(images, name, prefix):
+    fh = images.open(name) if images is not None else None
+    if fh is None:
+        raise RowError(f"image {name!r} not found")
+    try:
+        return default_storage.save(f"{prefix}/{fh.name}", fh)
+    finally:
+        fh.close()
+
+
+# ---------------- upsert ----------------
+def _upsert(rows, columns, now):
+    existing = {
+        row['sku']: row for row in Product.objects.filter(sku__in=[r['sku'] for r in rows]).values(
+            'pk', 'sku', 'price', 'discount_percentage', 'category_id', 'amount', 'low_stock_threshold', 'image'
+        )
+    }
+    categories = _category_ids(r.get('category') for r in rows) if 'category' in columns else {}
+    discounts = discount_prices(
+        [r['price'] for r in rows],
+        [r.get('discount_percentage', existing.get(r['sku'], {}).get('discount_percentage')) for r in rows],
+    )
+
+    update_fields = ['title', 'brand', 'price', 'discount_price', 'updated_at']
+    # amount faqat yangi mahsulotlarda insert bilan yoziladi, mavjudlarida pastda F() delta bilan
+    update_fields += [f for f in ('description', 'discount_percentage', 'low_stock_threshold') if f in columns]
+    if 'category' in columns:
+        update_fields.append('category')
+    if 'image' in columns:
+        update_fields.append('image')
+
+    products = []
+    for row, discount_price in zip(rows, discounts):
+        product = Product(
+            sku=row['sku'], title=row['title'], brand=row['brand'], price=row['price'],
+            discount_price=discount_price, effective_price=discount_price, created_at=now, updated_at=now,
+        )
+        before = existing.get(row['sku'])
+        for field in ('description', 'discount_percentage', 'amount', 'low_stock_threshold'):
+            if field in row:
+                setattr(product, field, row[field])
+        if 'category' in columns:
+            product.category_id = categories.get(row['category'])
+        if row.get('image'):
+            product.image = row['stored_image']
+        if 'amount' not in row:
+            product.amount = 0
+        # update_fields butun batch uchun bitta: bo'sh katakli qatorlar mavjud qiymatni qayta yozadi
+        if not row.get('image') and before:
+            product.image = before['image']
+        products.append(product)
+
+    # effective_price yangi mahsulotlarda insertda, mavjudlarida narx o'zgarganda pastda yoziladi
+    Product.objects.bulk_create(products, update_conflicts=True, unique_fields=['sku'], update_fields=update_fields)
+    ids = dict(Product.objects.filter(sku__in=[r['sku'] for r in rows]).values_list('sku', 'pk'))
+
+    repriced, deltas, movements, opened, resolved = [], {}, [], [], []
+    for row, product in zip(rows, products):
+        pk = ids[row['sku']]
+        before = existing.get(row['sku'])
+        if before is None:
+            repriced.append(pk)
+            if product.amount:
+                movements.append(StockMovement(
+                    product_id=pk, kind=StockMovement.Kind.ADJUSTMENT, quantity=product.amount,
+                    balance=product.amount, note="Import",
+                ))
+            continue
+        if (before['price'], before['discount_percentage'], before['category_id']) != (
+            product.price, product.discount_percentage if 'discount_percentage' in row else before['discount_percentage'],
+            product.category_id if 'category' in columns else before['category_id'],
+        ):
+            repriced.append(pk)
+        if 'amount' in row and row['amount'] != before['amount']:
+            deltas[pk] = row['amount'] - before['amount']
+            Product.objects.filter(pk=pk).update(amount=F('amount') + deltas[pk])
+
+    # snapshot o'qilgandan keyingi parallel sotuvlar yo'qolmaydi: ledger qo'llangan delta va
+    # UPDATE dan keyingi haqiqiy qoldiq bilan yoziladi
+    balances = dict(Product.objects.filter(pk__in=deltas).values_list('pk', 'amount'))
+    thresholds = {ids[r['sku']]: r.get('low_stock_threshold', existing[r['sku']]['low_stock_threshold'])
+                  for r in rows if ids[r['sku']] in deltas}
+    for pk, delta in deltas.items():
+        balance = balances[pk]
+        movements.append(StockMovement(
+            product_id=pk, kind=StockMovement.Kind.ADJUSTMENT, quantity=delta, balance=balance, note="Import",
+        ))
+        threshold = thresholds[pk]
+        if threshold is not None:
+            if balance - delta > threshold >= balance:
+                opened.append(LowStockAlert(product_id=pk, amount=balance, threshold=threshold))
+            elif balance - delta <= threshold < balance:
+                resolved.append(pk)
+
+    if repriced:
+        changed = Product.objects.filter(pk__in=repriced)
+        changed.update(effective_price=F('discount_price'))
+        reapply_active_schedules(changed, now)
+        record_history(changed, now)
+    StockMovement.objects.bulk_create(movements, batch_size=1000)
+    LowStockAlert.objects.bulk_create(opened, batch_size=1000)
+    if resolved:
+        LowStockAlert.objects.filter(product_id__in=resolved, resolved_at__isnull=True).update(resolved_at=now)
+
+    if 'images' in columns:
+        replaced = [ids[r['sku']] for r in rows if r.get('images')]
+        Images.objects.filter(product_id__in=replaced).delete()
+        Images.objects.bulk_create(
+            [Images(product_id=ids[r['sku']], image=name) for r in rows for name in r.get('stored_images', [])],
+            batch_size=1000,
+        )
+
+    created = sum(1 for r in rows if r['sku'] not in existing)
+    return created, len(rows) - created
+
+
+def import_products(rows, images=None, batch_size=500):
+    """
+    Hodisalar generatori:
+      {'event': 'error', 'line': 12, 'sku': ..., 'message': ...}
+      {'event': 'progress', 'processed': 500, 'created': 420, 'updated': 80, 'errors': 3}
+      {'event': 'done', ...}
+    Xato qatorlar o'tkazib yuboriladi; har batch alohida tranzaksiyada.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        yield {'event': 'done', 'processed': 0, 'created': 0, 'updated': 0, 'errors': 0}
+        return
+    columns = {key.strip().lower() for key in first if key}
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        yield {'event': 'error', 'line': 1, 'sku': None, 'message': f"missing columns: {', '.join(missing)}"}
+        yield {'event': 'done', 'processed': 0, 'created': 0, 'updated': 0, 'errors': 1}
+        return
+
+    totals = {'processed': 0, 'created': 0, 'updated': 0, 'errors': 0}
+    batch, seen = [], set()
+
+    def all_rows():
+        yield first
+        yield from rows
+
+    for line, raw in enumerate(all_rows(), start=2):
+        totals['processed'] += 1
+        try:
+            row = parse_row(raw, columns)
+            if row['sku'] in seen:
+                raise RowError(f"duplicate sku {row['sku']!r} in file")
+            if row.get('image'):
+                row['stored_image'] = _store_image(images, row['image'], 'products')
+            if row.get('images'):
+                row['stored_images'] = [_store_image(images, name, 'products_images') for name in row['images']]
+        except RowError as e:
+            totals['errors'] += 1
+            yield {'event': 'error', 'line': line, 'sku': raw.get('sku'), 'message': str(e)}
+            continue
+        row['line'] = line
+        seen.add(row['sku'])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield from _flush(batch, columns, totals)
+            yield {'event': 'progress', **totals}
+
+    if batch:
+        yield from _flush(batch, columns, totals)
+    facets.invalidate()
+    yield {'event': 'done', **totals}
+
+
+def _flush(batch, columns, totals):
+    """Batch bitta tranzaksiyada; DB xatosida qatorlar alohida yoziladi va xato qator hodisa bo'ladi"""
+    try:
+        with transaction.atomic():
+            created, updated = _upsert(batch, columns, timezone.now())
+    except DatabaseError:
+        created = updated = 0
+        for row in batch:
+            try:
+                with transaction.atomic():
+                    row_created, row_updated = _upsert([row], columns, timezone.now())
+            except DatabaseError as e:
+                totals['errors'] += 1
+                yield {'event': 'error', 'line': row['line'], 'sku': row['sku'], 'message': f"database error: {e}"}
+                continue
+            created += row_created
+            updated += row_updated
+    totals['created'] += created
+    totals['updated'] += updated
+    batch.clear()
+
+
+def format_event(event):
+    if event['event'] == 'error':
+        return f"line {event['line']}: {event['message']}" + (f" (sku {event['sku']})" if event.get('sku') else '')
+    label = 'Done' if event['event'] == 'done' else 'Progress'
+    return (f"{label}: {event['processed']} rows, {event['created']} created, "
+            f"{event['updated']} updated, {event['errors']} errors")
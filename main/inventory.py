@@ -0,0 +1,31 @@
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Product, StockMovement, StockSnapshot
+
+
+def take_snapshots(when=None):
+    """Barcha mahsulotlar uchun joriy qoldiqni snapshot qilish"""
+    when = when or timezone.now()
+    rows = [
+        StockSnapshot(product_id=pk, amount=amount, taken_at=when)
+        for pk, amount in Product.objects.values_list("id", "amount").iterator()
+    ]
+    StockSnapshot.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def stock_at(product_id, when):
+    """Berilgan vaqtdagi qoldiq: oxirgi snapshot + undan keyingi harakatlar"""
+    snapshot = (
+        StockSnapshot.objects
+        .filter(product_id=product_id, taken_at__lte=when)
+        .order_by("-taken_at")
+        .first()
+    )
+    movements = StockMovement.objects.filter(product_id=product_id, created_at__lte=when)
+    base = 0
+    if snapshot is not None:
+        base = snapshot.amount
+        movements = movements.filter(created_at__gt=snapshot.taken_at)
+    return base + (movements.aggregate(total=Sum("quantity"))["total"] or 0)
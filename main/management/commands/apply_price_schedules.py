@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.pricing import apply_due_schedules
+
+
+class Command(BaseCommand):
+    help = "Start and finish due PriceSchedule windows (run every minute from cron)"
+
+    def handle(self, *args, **options):
+        started, finished = apply_due_schedules()
+        self.stdout.write(self.style.SUCCESS(f"{started} schedule(s) started, {finished} finished"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from main.archive import archive_cutoff, archive_month, months_to_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move sales older than the archive horizon (SALES_ARCHIVE_HORIZON_DAYS) out of the Sale table "
+        "into per-month gzip CSV files under SALES_ARCHIVE_DIR. MonthlyStats are left unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horizon-days", type=int, help="Override SALES_ARCHIVE_HORIZON_DAYS")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options["horizon_days"])
+        months = months_to_archive(cutoff)
+        self.stdout.write(f"Archiving sales before {cutoff:%Y-%m-%d}: {len(months)} month(s)")
+
+        moved = 0
+        for year, month in months:
+            if options["dry_run"]:
+                self.stdout.write(f"  {year}-{month:02d} (dry run)")
+                continue
+            count = archive_month(year, month)
+            moved += count
+            self.stdout.write(f"  {year}-{month:02d}: {count} sales")
+        self.stdout.write(self.style.SUCCESS(f"{moved} sales archived"))
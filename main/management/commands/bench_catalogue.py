@@ -0,0 +1,112 @@
+import asyncio
+import statistics
+import time
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+URLCONFS = {
+    "sync": "main.urls",
+    "async": "main.async_urls",
+}
+
+
+def sync_only_middleware():
+    """ASGI zanjirini sync_to_async thread hopiga majburlaydigan middleware'lar"""
+    return [path for path in settings.MIDDLEWARE if not getattr(import_string(path), 'async_capable', False)]
+
+
+async def _call(app, path, query_string=b""):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string,
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    status = None
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    finished = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    finished.set()
+    return status
+
+
+async def _run(app, paths, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            status = await _call(app, paths[i % len(paths)])
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - started, sorted(latencies), errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark sync (DRF) vs native async catalogue views through the ASGI handler "
+        "in-process. Run against a dev database with representative data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--path", action="append", dest="paths",
+            help="Path to request (repeatable). Default: category, products, about, announcements",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/category/", "/products/", "/about/", "/announcements/"]
+        total, concurrency = options["requests"], options["concurrency"]
+
+        self.stdout.write(f"{total} requests, concurrency {concurrency}, paths: {', '.join(paths)}")
+        sync_only = sync_only_middleware()
+        if sync_only:
+            self.stdout.write(self.style.WARNING(
+                "Sync-only middleware (async numbers include thread hops): " + ", ".join(sync_only)
+            ))
+        self.stdout.write(f"{'mode':<6} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}")
+        for mode, urlconf in URLCONFS.items():
+            with override_settings(ROOT_URLCONF=urlconf, ALLOWED_HOSTS=["localhost"]):
+                app = get_asgi_application()
+                asyncio.run(_run(app, paths, min(total, 20), concurrency))  # warm-up
+                elapsed, latencies, errors = asyncio.run(_run(app, paths, total, concurrency))
+
+            def pct(p):
+                return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+            self.stdout.write(
+                f"{mode:<6} {total / elapsed:>10.1f} {statistics.median(latencies) * 1000:>10.2f} "
+                f"{pct(0.95):>10.2f} {pct(0.99):>10.2f} {errors:>7}"
+            )
@@ -0,0 +1,85 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from main.models import Category, Images, Product
+from main.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from main.serializers import ProductSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DESCRIPTION = (
+    "<h2>Texnik xususiyatlar</h2><p><strong>Protsessor:</strong> 8 yadroli, 3.2 GHz</p>"
+    "<ul><li>Xotira: 16 GB</li><li>SSD: 512 GB</li><li>Ekran: 15.6&quot; IPS</li></ul>"
+    "<p>Kafolat <em>12 oy</em>. Yetkazib berish bepul.</p>"
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark encode time and bytes on the wire for the ProductListAPIView payload. "
+        "Test products are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                data = self._payload(options["products"])
+                self._report(data, options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _payload(self, count):
+        category = Category.objects.create(title="Benchmark")
+        products = Product.objects.bulk_create(
+            Product(
+                title=f"Noutbuk {i}", description=DESCRIPTION, brand=f"Brand {i % 40}",
+                price=100 + i % 900, discount_percentage=10, discount_price=90 + i % 810,
+                category=category, image=f"products/bench_{i}.jpg",
+            )
+            for i in range(count)
+        )
+        Images.objects.bulk_create(
+            Images(product=product, image=f"products_images/bench_{product.pk}.jpg") for product in products
+        )
+        started = time.perf_counter()
+        data = ProductSerializer(
+            Product.objects.filter(category=category).prefetch_related("images"), many=True
+        ).data
+        self.stdout.write(f"{count} products serialized in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return data
+
+    def _report(self, data, repeat):
+        renderers = [("json (stdlib)", JSONRenderer())]
+        if orjson is not None:
+            renderers.append(("json (orjson)", FastJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(("msgpack", MessagePackRenderer()))
+
+        self.stdout.write(f"{'renderer':<15} {'encode ms':>10} {'raw KB':>10} {'gzip KB':>10} {'br KB':>10}")
+        for name, renderer in renderers:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                body = renderer.render(data)
+                timings.append(time.perf_counter() - started)
+            gzipped = len(gzip.compress(body, compresslevel=6))
+            br = f"{len(brotli.compress(body, quality=5)) / 1024:>10.1f}" if brotli is not None else f"{'-':>10}"
+            self.stdout.write(
+                f"{name:<15} {min(timings) * 1000:>10.1f} {len(body) / 1024:>10.1f} {gzipped / 1024:>10.1f} {br}"
+            )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import columnar
+
+
+class Command(BaseCommand):
+    help = (
+        "Export Sale (live + archived), Purchase, Expense and Salary into per-column .npy files "
+        "for memory-mapped offline analytics (see main.columnar)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Target directory (default: COLUMNAR_EXPORT_DIR)")
+
+    def handle(self, *args, **options):
+        if columnar.np is None:
+            raise CommandError("numpy is required: pip install numpy")
+        counts = columnar.export(options["output"])
+        for table, rows in counts.items():
+            self.stdout.write(f"  {table}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(f"Exported to {options['output'] or columnar.default_dir()}"))
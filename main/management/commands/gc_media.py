@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.media_gc import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Delete (or quarantine) media files not referenced by any FileField/ImageField or rich-text field"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only list orphaned files")
+        parser.add_argument("--grace-hours", type=float, default=None,
+                            help="Skip files modified more recently (default: MEDIA_GC_GRACE_HOURS)")
+        parser.add_argument("--quarantine", action="store_true",
+                            help="Move orphans to MEDIA_GC_QUARANTINE_DIR instead of deleting them")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        log = self.stdout.write if options["verbosity"] > 1 or options["dry_run"] else None
+        stats = collect_garbage(
+            dry_run=options["dry_run"],
+            grace_hours=options["grace_hours"],
+            quarantine=settings.MEDIA_GC_QUARANTINE_DIR if options["quarantine"] else None,
+            batch_size=options["batch_size"],
+            log=log,
+        )
+        verb = "would be removed" if options["dry_run"] else ("quarantined" if options["quarantine"] else "removed")
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['scanned']} file(s) scanned, {stats['references']} reference(s), "
+            f"{stats['orphans']} orphan(s) {verb} ({stats['bytes']} bytes), {stats['recent']} within grace period"
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import reports
+from main.models import MonthlyStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Build P&L reports into REPORTS_DIR. Files are keyed by MonthlyStats.version and the category / "
+        "seller names, so unchanged "
+        "months are skipped and a yearly report only recomputes months whose version changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, required=True)
+        parser.add_argument("--month", type=int, help="Only this month (default: every month plus the yearly report)")
+        parser.add_argument("--format", dest="formats", action="append", choices=reports.REPORT_FORMATS)
+
+    def handle(self, *args, **options):
+        year, month = options["year"], options["month"]
+        formats = options["formats"] or ["xlsx"]
+        months = MonthlyStats.objects.filter(year=year).order_by("month")
+        if month:
+            months = months.filter(month=month)
+        if not months.exists():
+            raise CommandError(f"No MonthlyStats for {year}" + (f"-{month:02d}" if month else ""))
+
+        for fmt in formats:
+            for stats in months:
+                self._build(f"{stats.year}-{stats.month:02d} {fmt}", reports.month_report_path(stats, fmt),
+                            reports.build_month_report, stats.year, stats.month, fmt)
+            if not month:
+                self._build(f"{year} {fmt}", reports.year_report_path(year, fmt),
+                            reports.build_year_report, year, fmt)
+
+    def _build(self, label, path, func, *args):
+        if path.exists():
+            self.stdout.write(f"  {label}: cached")
+            return
+        started = time.perf_counter()
+        path = func(*args)
+        self.stdout.write(f"  {label}: built {path.name} in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.schema import generate_schema, schema_path, write_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema served at /docs/openapi.json (run at deploy time, commit the .json)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="Only verify that the saved schema matches live introspection")
+
+    def handle(self, *args, **options):
+        content = generate_schema()
+        path = schema_path()
+        if options["check"]:
+            if not path.exists() or path.read_bytes() != content:
+                raise CommandError(f"{path} is out of date, run manage.py generate_schema")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date"))
+            return
+        write_schema(content)
+        self.stdout.write(self.style.SUCCESS(f"Schema written to {path} ({len(content) // 1024} KB)"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import importer
+
+
+class Command(BaseCommand):
+    help = "Bulk upsert products (by sku) from a CSV or XLSX file, with images from a directory or zip"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV or XLSX file (first sheet)")
+        parser.add_argument("--images", help="Directory or .zip with the files named in image / images columns")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        images = importer.ImageSource(options["images"]) if options["images"] else None
+        try:
+            with open(options["file"], "rb") as fh:
+                rows = importer.read_rows(fh, options["file"])
+                for event in importer.import_products(rows, images=images, batch_size=options["batch_size"]):
+                    line = importer.format_event(event)
+                    if event["event"] == "error":
+                        self.stderr.write(self.style.WARNING(line))
+                    elif event["event"] == "done":
+                        self.stdout.write(self.style.SUCCESS(line))
+                    else:
+                        self.stdout.write(line)
+        except FileNotFoundError as e:
+            raise CommandError(e)
+        finally:
+            if images is not None:
+                images.close()
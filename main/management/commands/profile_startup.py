@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# django.setup() + URLconf: gunicorn worker birinchi so'rovgacha qiladigan ish
+STARTUP_CODE = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def parse_importtime(stderr):
+    """'import time: self [us] | cumulative | imported package' qatorlari -> [(name, self_us, cumulative_us, depth)]"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold start per settings profile (python -X importtime): wall time, "
+        "import time, module count and the slowest top-level packages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("profiles", nargs="*", help="Profiles to measure (default: all)")
+        parser.add_argument("--top", type=int, default=15, help="Number of top-level packages to list")
+
+    def handle(self, *args, **options):
+        for profile in options["profiles"] or sorted(settings.PROFILE_APPS):
+            wall, imports = self._run(profile)
+            total = sum(self_us for _, self_us, _, _ in imports) / 1000
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{profile}: {wall:.0f} ms wall, {total:.0f} ms in imports, {len(imports)} modules"
+            ))
+            # birinchi darajali importlar paket bo'yicha (django, rest_framework, drf_yasg, ...)
+            packages = Counter()
+            for name, _, cumulative_us, depth in imports:
+                if depth == 0:
+                    packages[name.split(".")[0]] += cumulative_us
+            for package, cumulative_us in packages.most_common(options["top"]):
+                self.stdout.write(f"  {cumulative_us / 1000:>8.1f} ms  {package}")
+
+    def _run(self, profile):
+        env = {**os.environ, "DJANGO_SETTINGS_PROFILE": profile}
+        env.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall = (time.perf_counter() - started) * 1000
+        if result.returncode:
+            self.stderr.write(result.stderr[-2000:])
+        return wall, parse_importtime(result.stderr)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.customers import rebuild_customer_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild CustomerStats from live and archived sales (backfill or repair)"
+
+    def handle(self, *args, **options):
+        count = rebuild_customer_stats()
+        self.stdout.write(self.style.SUCCESS(f"{count} customers rebuilt"))
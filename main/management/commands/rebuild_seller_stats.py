@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.sellers import rebuild_seller_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild SellerMonthlyStats from live and archived sales (backfill or repair)"
+
+    def handle(self, *args, **options):
+        count = rebuild_seller_stats()
+        self.stdout.write(self.style.SUCCESS(f"{count} seller-month rows rebuilt"))
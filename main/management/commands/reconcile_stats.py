@@ -0,0 +1,138 @@
+from array import array
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from main.models import Expense, MonthlyStats, Purchase, Salary, Sale, SaleArchive
+from main.money import to_cents
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# MonthlyStats ustuni -> (model, sana maydoni, summa maydoni)
+SOURCES = {
+    "total_sales": (Sale, "created_at", "total_price"),
+    "total_purchases": (Purchase, "purchase_date", "total_cost"),
+    "total_salaries": (Salary, None, "salary_price"),
+    "expenses": (Expense, "created_at", "price"),
+}
+COLUMNS = list(SOURCES) + ["net_profit"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify MonthlyStats totals exactly against source rows. Amounts are loaded as integer "
+        "cents and summed per month in one vectorized pass (NumPy if installed, array('q') otherwise)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int)
+        parser.add_argument("--month", type=int)
+        parser.add_argument("--fix", action="store_true", help="Rewrite mismatched MonthlyStats rows")
+
+    def handle(self, *args, **options):
+        year, month = options["year"], options["month"]
+        if month and not year:
+            raise CommandError("--month requires --year")
+
+        stats_qs = MonthlyStats.objects.all()
+        if year:
+            stats_qs = stats_qs.filter(year=year)
+        if month:
+            stats_qs = stats_qs.filter(month=month)
+        stats = {(row.year, row.month): row for row in stats_qs}
+        index = {key: i for i, key in enumerate(stats)}
+
+        # avval barcha manbalarni yuklaymiz (index shu paytda to'ladi), keyin bir o'tishda yig'amiz
+        loaded = {column: self._load(column, index, year, month) for column in SOURCES}
+        n = len(index)
+        totals = {column: self._sum_by_month(months, cents, n) for column, (months, cents) in loaded.items()}
+        totals["net_profit"] = [
+            totals["total_sales"][i]
+            - totals["total_purchases"][i] - totals["total_salaries"][i] - totals["expenses"][i]
+            for i in range(n)
+        ]
+
+        keys = list(index)
+        mismatched = 0
+        for i, key in enumerate(keys):
+            row = stats.get(key)
+            expected = {column: int(totals[column][i]) for column in COLUMNS}
+            if row is None:
+                mismatched += 1
+                self.stdout.write(self.style.WARNING(f"{key[0]}-{key[1]:02d}: MonthlyStats row missing"))
+                if options["fix"]:
+                    MonthlyStats.objects.create(year=key[0], month=key[1], **self._as_money(expected))
+                continue
+            diff = {c: (to_cents(getattr(row, c)), v) for c, v in expected.items() if to_cents(getattr(row, c)) != v}
+            if diff:
+                mismatched += 1
+                details = ", ".join(f"{c}: {s / 100:.2f} != {v / 100:.2f}" for c, (s, v) in diff.items())
+                self.stdout.write(self.style.WARNING(f"{key[0]}-{key[1]:02d}: {details}"))
+                if options["fix"]:
+                    for column, value in self._as_money(expected).items():
+                        setattr(row, column, value)
+                    row.save()
+
+        engine = "numpy" if np is not None else "array('q')"
+        summary = f"{len(keys)} months checked ({engine}), {mismatched} mismatched"
+        # cron/CI nosozlikni ko'rishi uchun: --fix siz farq topilsa nolga teng bo'lmagan chiqish kodi
+        if mismatched and not options["fix"]:
+            raise CommandError(f"{summary}, run with --fix to rewrite them")
+        self.stdout.write(self.style.SUCCESS(summary + (" (fixed)" if mismatched else "")))
+
+    def _load(self, column, index, year, month):
+        model, date_field, amount_field = SOURCES[column]
+        if date_field is None:  # Salary: oy for_month orqali
+            year_expr, month_expr = "for_month__year", "for_month__month"
+            qs = model.objects.values_list(year_expr, month_expr, amount_field)
+            if year:
+                qs = qs.filter(for_month__year=year)
+            if month:
+                qs = qs.filter(for_month__month=month)
+        else:
+            qs = model.objects.annotate(y=ExtractYear(date_field), m=ExtractMonth(date_field)).values_list(
+                "y", "m", amount_field
+            )
+            if year:
+                qs = qs.filter(**{f"{date_field}__year": year})
+            if month:
+                qs = qs.filter(**{f"{date_field}__month": month})
+
+        months, cents = array("q"), array("q")
+        for y, m, amount in qs.iterator(chunk_size=5000):
+            if (y, m) not in index:
+                index[(y, m)] = len(index)
+            months.append(index[(y, m)])
+            cents.append(to_cents(amount))
+
+        if model is Sale:  # arxivlangan oylar manifestdagi summa bilan qo'shiladi
+            archives = SaleArchive.objects.values_list("year", "month", "total_price")
+            if year:
+                archives = archives.filter(year=year)
+            if month:
+                archives = archives.filter(month=month)
+            for y, m, amount in archives:
+                if (y, m) not in index:
+                    index[(y, m)] = len(index)
+                months.append(index[(y, m)])
+                cents.append(to_cents(amount))
+        return months, cents
+
+    @staticmethod
+    def _sum_by_month(months, cents, n):
+        if np is not None:
+            totals = np.zeros(n, dtype=np.int64)
+            np.add.at(totals, np.frombuffer(months, dtype=np.int64), np.frombuffer(cents, dtype=np.int64))
+            return totals
+        totals = array("q", bytes(8 * n))
+        for i, value in zip(months, cents):
+            totals[i] += value
+        return totals
+
+    @staticmethod
+    def _as_money(cents_by_column):
+        return {column: Decimal(value) / 100 for column, value in cents_by_column.items()}
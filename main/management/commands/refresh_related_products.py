@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from main.recommendations import refresh_related
+
+
+class Command(BaseCommand):
+    help = "Update the product co-occurrence matrix with new sales/cart rows and rewrite changed top-K neighbours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Rebuild from scratch (live and archived sales, all carts). Also done automatically "
+                 "when there is no saved state and every RECOMMENDATIONS_FULL_REBUILD_HOURS",
+        )
+
+    def handle(self, *args, **options):
+        products, rows = refresh_related(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"{products} product(s) refreshed, {rows} related row(s) written"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.inventory import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Write a StockSnapshot row for every product (run periodically, e.g. nightly)"
+
+    def handle(self, *args, **options):
+        count = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"{count} snapshots written"))
@@ -0,0 +1,216 @@
+# main/media_gc.py
+# MEDIA_ROOT dagi hech bir qator ishlatmaydigan (yetim) fayllarni tozalash (manage.py gc_media).
+# Media kontent-adresli (main/storage.py): bitta fayl bir nechta model/qatorga tegishli bo'lishi
+# mumkin, shuning uchun havolalar BARCHA modellarning FileField/ImageField ustunlaridan va
+# CKEditor matnlaridagi MEDIA_URL havolalaridan yig'iladi (values_list().iterator()).
+# Xotira chegaralangan: har nom 8 baytli blake2b kalitga aylanadi (numpy bo'lsa tartiblangan
+# uint64 massiv), katalog daraxti (yoki obyekt ombori ro'yxati) oqimda, batchlab tekshiriladi.
+# Grace davri ichidagi fayllar (hali qatori yozilmagan yuklamalar) tegilmaydi.
+import hashlib
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _key(name):
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), 'little')
+
+
+class ReferenceSet:
+    """Havola qilingan nomlar to'plami: nom o'rniga 8 baytli kalit (to'qnashuv -> fayl saqlanadi)"""
+
+    def __init__(self):
+        self._pending = []
+        self._chunks = []
+        self._keys = set()
+
+    def add(self, name):
+        if np is None:
+            self._keys.add(_key(name))
+            return
+        self._pending.append(_key(name))
+        if len(self._pending) >= 100_000:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._chunks.append(np.unique(np.asarray(self._pending, dtype=np.uint64)))
+            self._pending = []
+
+    def freeze(self):
+        if np is not None:
+            self._flush()
+            merged = np.concatenate(self._chunks) if self._chunks else np.empty(0, dtype=np.uint64)
+            self._keys = np.unique(merged)
+            self._chunks = []
+        return self
+
+    def __len__(self):
+        return len(self._keys)
+
+    def contains_many(self, names):
+        keys = [_key(name) for name in names]
+        if np is None:
+            return [key in self._keys for key in keys]
+        if not len(self._keys):
+            return [False] * len(keys)
+        keys = np.asarray(keys, dtype=np.uint64)
+        positions = np.searchsorted(self._keys, keys).clip(max=len(self._keys) - 1)
+        return (self._keys[positions] == keys).tolist()
+
+
+def media_fields():
+    """(model, field, kind): kind 'file' (FileField/ImageField) yoki 'text' (MEDIA_URL havolali matn)"""
+    for model in apps.get_models():
+        if model._meta.proxy or not model._meta.managed:
+            continue
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field.name, 'file'
+            elif isinstance(field, models.TextField):
+                yield model, field.name, 'text'
+
+
+def referenced_names(chunk_size=2000):
+    media_url = settings.MEDIA_URL
+    url_re = re.compile(re.escape(media_url) + r'([^"\'\s)?#<>]+)')
+    for model, name, kind in media_fields():
+        queryset = model._base_manager.exclude(**{f'{name}__isnull': True}).exclude(**{name: ''})
+        if kind == 'text':
+            queryset = queryset.filter(**{f'{name}__contains': media_url})
+        for value in queryset.values_list(name, flat=True).iterator(chunk_size=chunk_size):
+            if kind == 'file':
+                yield value
+            else:
+                for match in url_re.finditer(value):
+                    yield unquote(match.group(1))
+
+
+def build_references():
+    references = ReferenceSet()
+    for name in referenced_names():
+        references.add(name)
+    return references.freeze()
+
+
+def walk_media(root, exclude=()):
+    """(nisbiy nom, os.DirEntry) oqimi; symlinklar va exclude kataloglari o'tkazib yuboriladi"""
+    stack = ['']
+    while stack:
+        relative = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, relative)) as entries:
+                for entry in entries:
+                    name = f"{relative}/{entry.name}" if relative else entry.name
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir():
+                        if name not in exclude:
+                            stack.append(name)
+                    elif entry.is_file():
+                        yield name, entry
+        except FileNotFoundError:
+            continue
+
+
+def media_entries(root, exclude=()):
+    """(nom, hajm, mtime) oqimi: MEDIA_ROOT yoki obyekt ombori (MEDIA_STORAGE='object')"""
+    store = getattr(default_storage, 'store', None)
+    if store is None:
+        for name, entry in walk_media(root, exclude):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            yield name, stat.st_size, stat.st_mtime
+        return
+    prefixes = tuple(f"{directory}/" for directory in exclude)
+    for info in store.list():
+        if not info.key.startswith(prefixes):
+            yield info.key, info.size, info.modified.timestamp()
+
+
+def _modified(root, name):
+    store = getattr(default_storage, 'store', None)
+    if store is None:
+        return os.stat(os.path.join(root, name)).st_mtime
+    info = store.head(name)
+    if info is None:
+        raise FileNotFoundError(name)
+    return info.modified.timestamp()
+
+
+def _remove(root, name, quarantine):
+    if quarantine is None:
+        default_storage.delete(name)
+        return
+    target = Path(quarantine) / name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if getattr(default_storage, 'store', None) is None:
+        shutil.move(os.path.join(root, name), target)
+        return
+    with default_storage.open(name) as source, open(target, 'wb') as destination:
+        shutil.copyfileobj(source, destination)
+    default_storage.delete(name)
+
+
+def collect_garbage(dry_run=False, grace_hours=None, quarantine=None, batch_size=10_000, log=None):
+    """
+    Yetim fayllarni o'chiradi (yoki quarantine katalogiga ko'chiradi).
+    Havolalar katalog aylanishidan OLDIN yig'iladi: keyin yuklangan fayllar grace ichida,
+    dedup bilan qayta ishlatilgan eski fayllarning mtime i ContentAddressedMixin.save da yangilanadi.
+    """
+    root = str(settings.MEDIA_ROOT)
+    grace_hours = settings.MEDIA_GC_GRACE_HOURS if grace_hours is None else grace_hours
+    cutoff = time.time() - grace_hours * 3600
+    exclude = set(getattr(settings, 'MEDIA_GC_EXCLUDE', ()))
+    if quarantine is not None:
+        relative = os.path.relpath(quarantine, root)
+        if not relative.startswith('..'):
+            exclude.add(relative.replace(os.sep, '/'))
+
+    references = build_references()
+    stats = {'references': len(references), 'scanned': 0, 'orphans': 0, 'bytes': 0, 'recent': 0}
+
+    def sweep(batch):
+        for (name, size, mtime), referenced in zip(batch, references.contains_many([item[0] for item in batch])):
+            if referenced:
+                continue
+            if mtime > cutoff:
+                stats['recent'] += 1
+                continue
+            stats['orphans'] += 1
+            stats['bytes'] += size
+            if log is not None:
+                log(name)
+            if not dry_run:
+                # oxirgi tekshiruv: aylanish davomida dedup bilan "tirilgan" fayl
+                try:
+                    if _modified(root, name) > cutoff:
+                        continue
+                    _remove(root, name, quarantine)
+                except FileNotFoundError:
+                    continue
+        batch.clear()
+
+    batch = []
+    for item in media_entries(root, exclude):
+        stats['scanned'] += 1
+        batch.append(item)
+        if len(batch) >= batch_size:
+            sweep(batch)
+    sweep(batch)
+    return stats
@@ -0,0 +1,59 @@
+# main/metrics.py
+# Oddiy counterlar: umumiy keshda saqlanadi (barcha workerlar yig'indisi),
+# /metrics/ da Prometheus text formatida chiqariladi.
+import re
+
+from django.core.cache import cache
+
+REGISTRY_KEY = 'metrics:registry'
+_LABEL_RE = re.compile(r'[^A-Za-z0-9_.:-]')
+
+# shu jarayonda ro'yxatdan o'tgan kalitlar (registry ni har safar o'qimaslik uchun)
+_known = set()
+
+
+def _key(name, labels):
+    parts = [name] + [f"{k}={_LABEL_RE.sub('_', str(v))}" for k, v in sorted(labels.items())]
+    return 'metrics:' + '|'.join(parts)
+
+
+def _register(key, name, labels):
+    # registry faqat qo'shiladigan ro'yxat: add/incr atomar, parallel workerlar bir-birini o'chirmaydi
+    if cache.add(f"{REGISTRY_KEY}:seen:{key}", 1, None):
+        try:
+            index = cache.incr(f"{REGISTRY_KEY}:size")
+        except ValueError:
+            index = 1 if cache.add(f"{REGISTRY_KEY}:size", 1, None) else cache.incr(f"{REGISTRY_KEY}:size")
+        cache.set(f"{REGISTRY_KEY}:{index}", (key, name, tuple(sorted((k, str(v)) for k, v in labels.items()))), None)
+    _known.add(key)
+
+
+def incr(name, amount=1, **labels):
+    key = _key(name, labels)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, None):
+            cache.incr(key, amount)
+    if key not in _known:
+        _register(key, name, labels)
+
+
+def snapshot():
+    """[(name, labels, value)] ro'yxati"""
+    size = cache.get(f"{REGISTRY_KEY}:size") or 0
+    entries = cache.get_many([f"{REGISTRY_KEY}:{index}" for index in range(1, size + 1)])
+    registry = {key: (name, labels) for key, name, labels in entries.values()}
+    values = cache.get_many(list(registry))
+    return [(name, labels, values.get(key, 0)) for key, (name, labels) in sorted(registry.items())]
+
+
+def render():
+    lines, typed = [], set()
+    for name, labels, value in snapshot():
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return '\n'.join(lines) + '\n'
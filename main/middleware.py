@@ -0,0 +1,96 @@
+# main/middleware.py
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def encoding_weights(accept_encoding):
+    """Accept-Encoding -> {kodlash: q}; q noto'g'ri yozilgan bo'lsa 0 (qabul qilinmaydi)"""
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+def choose_encoding(accept_encoding, available):
+    """available tartibida eng yuqori q li (q > 0) kodlash; aniq nom bo'lmasa '*' qiymati"""
+    weights = encoding_weights(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Katta javoblarni Brotli (mavjud bo'lsa) yoki gzip bilan siqadi.
+    COMPRESSION_MIN_SIZE dan kichik javoblar siqilmaydi: ular uchun CPU sarfi foyda bermaydi.
+    Sync va async: ASGI ostida zanjir thread hopsiz qoladi (main/async_views.py).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < self.min_size
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        available = ('br', 'gzip') if brotli is not None else ('gzip',)
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), available)
+        if encoding == 'br':
+            content = brotli.compress(response.content, quality=self.brotli_quality)
+        elif encoding == 'gzip':
+            content = gzip.compress(response.content, compresslevel=self.gzip_level, mtime=0)
+        else:
+            return response
+
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
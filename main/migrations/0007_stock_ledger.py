@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """Mavjud mahsulotlar uchun boshlang'ich ADJUSTMENT: harakatlar yig'indisi amount ga teng bo'ladi"""
+    Product = apps.get_model('main', 'Product')
+    StockMovement = apps.get_model('main', 'StockMovement')
+    now = django.utils.timezone.now()
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(
+                product_id=pk, kind='ADJUSTMENT', quantity=amount, balance=amount,
+                note="Opening balance", created_at=now,
+            )
+            for pk, amount in Product.objects.exclude(amount=0).values_list('pk', 'amount').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_announcementimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='low_stock_threshold',
+            field=models.FloatField(blank=True, null=True, verbose_name='Low stock threshold'),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.FloatField(verbose_name='Amount')),
+                ('threshold', models.FloatField(verbose_name='Threshold')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='Resolved at')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='main.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Low stock alert',
+                'verbose_name_plural': 'Low stock alerts',
+                'indexes': [models.Index(fields=['resolved_at', 'created_at'], name='main_lowsto_resolve_3e4ed0_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SALE', 'Sale'), ('PURCHASE', 'Purchase'), ('ADJUSTMENT', 'Adjustment')], max_length=20, verbose_name='Kind')),
+                ('quantity', models.FloatField(verbose_name='Quantity')),
+                ('balance', models.FloatField(verbose_name='Balance after')),
+                ('note', models.CharField(blank=True, max_length=255, verbose_name='Note')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Created at')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='main.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Stock movement',
+                'verbose_name_plural': 'Stock movements',
+                'indexes': [models.Index(fields=['product', 'created_at'], name='main_stockm_product_e6d902_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.FloatField(verbose_name='Amount')),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Taken at')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='main.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Stock snapshot',
+                'verbose_name_plural': 'Stock snapshots',
+                'indexes': [models.Index(fields=['product', 'taken_at'], name='main_stocks_product_0034b4_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
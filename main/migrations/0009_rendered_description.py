@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:22
+
+from django.db import migrations, models
+
+from main.content import render_content
+
+
+def render_existing(apps, schema_editor):
+    for model_name in ('About', 'Announcement'):
+        model = apps.get_model('main', model_name)
+        rows = list(model.objects.only('id', 'description'))
+        for row in rows:
+            row.description_html, row.excerpt = render_content(row.description)
+        model.objects.bulk_update(rows, ['description_html', 'excerpt'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_about_announcement_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='about',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Rendered description'),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Excerpt'),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Rendered description'),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Excerpt'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
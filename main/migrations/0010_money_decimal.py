@@ -0,0 +1,122 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:23
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import Round
+
+from main.money import money
+
+
+# tur o'zgarishidan oldin float qiymatlar 2 xonaga yaxlitlanadi (0.1 + 0.2 -> 0.30000000000000004 emas)
+MONEY_COLUMNS = {
+    'Expense': ('price',),
+    'Product': ('price', 'discount_percentage', 'discount_price'),
+    'Purchase': ('purchase_price', 'total_cost'),
+    'Salary': ('salary_price',),
+    'Sale': ('total_price',),
+}
+
+
+def quantize_money(apps, schema_editor):
+    for model_name, columns in MONEY_COLUMNS.items():
+        model = apps.get_model('main', model_name)
+        model.objects.update(**{column: Round(F(column), 2) for column in columns})
+
+
+def recompute_monthly_stats(apps, schema_editor):
+    """Float yig'indilaridagi xatolarni tuzatish: har bir oyni Decimal bilan qayta hisoblash"""
+    MonthlyStats = apps.get_model('main', 'MonthlyStats')
+    Sale = apps.get_model('main', 'Sale')
+    Purchase = apps.get_model('main', 'Purchase')
+    Salary = apps.get_model('main', 'Salary')
+    Expense = apps.get_model('main', 'Expense')
+
+    for stats in MonthlyStats.objects.all():
+        year, month = stats.year, stats.month
+        stats.total_sales = money(Sale.objects.filter(
+            created_at__year=year, created_at__month=month).aggregate(t=Sum('total_price'))['t'] or 0)
+        stats.total_purchases = money(Purchase.objects.filter(
+            purchase_date__year=year, purchase_date__month=month).aggregate(t=Sum('total_cost'))['t'] or 0)
+        stats.total_salaries = money(Salary.objects.filter(
+            for_month=stats).aggregate(t=Sum('salary_price'))['t'] or 0)
+        stats.expenses = money(Expense.objects.filter(
+            created_at__year=year, created_at__month=month).aggregate(t=Sum('price'))['t'] or 0)
+        stats.net_profit = stats.total_sales - (stats.total_purchases + stats.total_salaries + stats.expenses)
+        stats.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_rendered_description'),
+    ]
+
+    operations = [
+        migrations.RunPython(quantize_money, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='expense',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Price'),
+        ),
+        migrations.AlterField(
+            model_name='monthlystats',
+            name='expenses',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Expenses'),
+        ),
+        migrations.AlterField(
+            model_name='monthlystats',
+            name='net_profit',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Net profit'),
+        ),
+        migrations.AlterField(
+            model_name='monthlystats',
+            name='total_purchases',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total purchases'),
+        ),
+        migrations.AlterField(
+            model_name='monthlystats',
+            name='total_salaries',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total salaries'),
+        ),
+        migrations.AlterField(
+            model_name='monthlystats',
+            name='total_sales',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total sales'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='discount_percentage',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Discount percentage'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='discount_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True, verbose_name='Discount price'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Price'),
+        ),
+        migrations.AlterField(
+            model_name='purchase',
+            name='purchase_price',
+            field=models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Purchase price'),
+        ),
+        migrations.AlterField(
+            model_name='purchase',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=14, verbose_name='Total cost'),
+        ),
+        migrations.AlterField(
+            model_name='salary',
+            name='salary_price',
+            field=models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Salary price'),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=14, verbose_name='Total price'),
+        ),
+        migrations.RunPython(recompute_monthly_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_money_decimal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Year')),
+                ('month', models.PositiveIntegerField(verbose_name='Month')),
+                ('path', models.CharField(max_length=255, verbose_name='File')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Rows')),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total price')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+            options={
+                'verbose_name': 'Sale archive',
+                'verbose_name_plural': 'Sale archives',
+                'unique_together': {('year', 'month')},
+            },
+        ),
+    ]
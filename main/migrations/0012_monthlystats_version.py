@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_sale_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlystats',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Version'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from main.customers import customer_totals, stats_rows
+
+
+def backfill_customer_stats(apps, schema_editor):
+    """Mavjud (jonli va arxivlangan) sotuvlardan boshlang'ich qatorlar: rebuild_customer_stats bilan bir xil hisob"""
+    CustomerStats = apps.get_model('main', 'CustomerStats')
+    totals = customer_totals(apps.get_model('main', 'Sale'), apps.get_model('main', 'SaleArchive'))
+    CustomerStats.objects.bulk_create(stats_rows(CustomerStats, totals), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_monthlystats_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerStats',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='main.customer', verbose_name='Customer')),
+                ('lifetime_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Lifetime revenue')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='Order count')),
+                ('first_sale_at', models.DateTimeField(blank=True, null=True, verbose_name='First sale')),
+                ('last_sale_at', models.DateTimeField(blank=True, null=True, verbose_name='Last sale')),
+            ],
+            options={
+                'verbose_name': 'Customer statistics',
+                'verbose_name_plural': 'Customer statistics',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['customer', '-created_at', '-id'], name='sale_customer_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerstats',
+            index=models.Index(fields=['-lifetime_revenue'], name='customerstats_revenue_idx'),
+        ),
+        migrations.RunPython(backfill_customer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from main.sellers import seller_totals, stats_rows
+
+
+def backfill_seller_stats(apps, schema_editor):
+    """Mavjud (jonli va arxivlangan) sotuvlardan boshlang'ich qatorlar: rebuild_seller_stats bilan bir xil hisob"""
+    SellerMonthlyStats = apps.get_model('main', 'SellerMonthlyStats')
+    totals = seller_totals(apps.get_model('main', 'Sale'), apps.get_model('main', 'SaleArchive'))
+    SellerMonthlyStats.objects.bulk_create(stats_rows(SellerMonthlyStats, totals), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_customer_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Year')),
+                ('month', models.PositiveIntegerField(verbose_name='Month')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Units')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Revenue')),
+                ('sale_count', models.PositiveIntegerField(default=0, verbose_name='Sale count')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_sales_stats', to=settings.AUTH_USER_MODEL, verbose_name='Seller')),
+            ],
+            options={
+                'verbose_name': 'Seller monthly statistics',
+                'verbose_name_plural': 'Seller monthly statistics',
+                'indexes': [models.Index(fields=['year', 'month', '-revenue'], name='sellerstats_leaderboard_idx')],
+                'unique_together': {('seller', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_seller_stats, migrations.RunPython.noop),
+    ]
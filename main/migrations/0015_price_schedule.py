@@ -0,0 +1,74 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def init_effective_price(apps, schema_editor):
+    Product = apps.get_model('main', 'Product')
+    Product.objects.update(effective_price=Coalesce(F('discount_price'), F('price')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_seller_monthly_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Effective price'),
+        ),
+        migrations.CreateModel(
+            name='PriceSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=120, verbose_name='Title')),
+                ('discount_percentage', models.DecimalField(decimal_places=2, max_digits=5, verbose_name='Discount percentage')),
+                ('starts_at', models.DateTimeField(verbose_name='Starts at')),
+                ('ends_at', models.DateTimeField(verbose_name='Ends at')),
+                ('state', models.CharField(choices=[('PENDING', 'Pending'), ('ACTIVE', 'Active'), ('FINISHED', 'Finished')], default='PENDING', editable=False, max_length=10, verbose_name='State')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='main.category', verbose_name='Category')),
+                ('products', models.ManyToManyField(blank=True, related_name='price_schedules', to='main.product', verbose_name='Products')),
+            ],
+            options={
+                'verbose_name': 'Price schedule',
+                'verbose_name_plural': 'Price schedules',
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Price')),
+                ('discount_price', models.DecimalField(decimal_places=2, max_digits=14, null=True, verbose_name='Discount price')),
+                ('effective_price', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Effective price')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Created at')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='main.product', verbose_name='Product')),
+                ('schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='main.priceschedule', verbose_name='Schedule')),
+            ],
+            options={
+                'verbose_name': 'Price history',
+                'verbose_name_plural': 'Price history',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='priceschedule',
+            index=models.Index(fields=['state', 'starts_at'], name='main_prices_state_1c5d2a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priceschedule',
+            index=models.Index(fields=['state', 'ends_at'], name='main_prices_state_0c779c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['product', 'created_at'], name='main_priceh_product_79ea2e_idx'),
+        ),
+        migrations.RunPython(init_effective_price, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,17 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 from users.models import User
 from django_ckeditor_5.fields import CKEditor5Field
+from .content import render_content
+from .money import MONEY_MAX_DIGITS, MONEY_DECIMAL_PLACES, money
+
+
+def money_field(verbose_name, **kwargs):
+    return models.DecimalField(
+        verbose_name, max_digits=MONEY_MAX_DIGITS, decimal_places=MONEY_DECIMAL_PLACES, **kwargs
+    )
 
 
 
@@ -9,11 +19,22 @@ from django_ckeditor_5.fields import CKEditor5Field
 class MonthlyStats(models.Model):
     year = models.PositiveIntegerField("Year")
     month = models.PositiveIntegerField("Month")
-    total_sales = models.FloatField("Total sales", default=0)
-    total_purchases = models.FloatField("Total purchases", default=0)
-    total_salaries = models.FloatField("Total salaries", default=0)
-    net_profit = models.FloatField("Net profit", default=0)
-    expenses = models.FloatField("Expenses", default=0)
+    total_sales = money_field("Total sales", default=0)
+    total_purchases = money_field("Total purchases", default=0)
+    total_salaries = money_field("Total salaries", default=0)
+    net_profit = money_field("Net profit", default=0)
+    expenses = money_field("Expenses", default=0)
+    # har saqlashda oshadi; hisobot keshi shu versiya bilan bog'langan
+    version = models.PositiveIntegerField("Version", default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.version = 1
+            return super().save(*args, **kwargs)
+        # parallel saqlashlar bitta versiyani ikki marta bermasligi uchun DB ichida oshiriladi
+        self.version = models.F('version') + 1
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
 
     class Meta:
         unique_together = ('year', 'month')
@@ -40,10 +61,14 @@ class Salary(models.Model):
         limit_choices_to={"role": User.Role.ADMIN},
         verbose_name="Taken by"
     )
-    salary_price = models.FloatField("Salary price")
+    salary_price = money_field("Salary price")
     for_month = models.ForeignKey(MonthlyStats, on_delete=models.CASCADE)
     created_at = models.DateTimeField("Created at", auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.salary_price = money(self.salary_price)
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Salary"
         verbose_name_plural = "Salaries"
@@ -87,24 +112,86 @@ class Category(models.Model):
 
 # ------------------ Product ------------------
 class Product(models.Model):
+    # import_products uchun tabiiy kalit (upsert shu bo'yicha)
+    sku = models.CharField("SKU", max_length=64, unique=True, null=True, blank=True)
     title = models.CharField("Title", max_length=120)
     description = models.TextField("Description", blank=True, null=True)
     brand = models.CharField("Brand", max_length=120)
-    price = models.FloatField("Price")
-    discount_percentage = models.FloatField("Discount percentage", null=True, blank=True)
-    discount_price = models.FloatField("Discount price", null=True, blank=True, editable=False)
+    price = money_field("Price")
+    discount_percentage = models.DecimalField("Discount percentage", max_digits=5, decimal_places=2, null=True, blank=True)
+    discount_price = money_field("Discount price", null=True, blank=True, editable=False)
+    # hozirgi sotuv narxi: discount_price yoki faol PriceSchedule narxi (filter/ordering shu ustun bo'yicha)
+    effective_price = money_field("Effective price", default=0, editable=False, db_index=True)
     image = models.ImageField("Image", upload_to='products/', blank=True, null=True)
     amount = models.FloatField("Amount", default=1)
+    low_stock_threshold = models.FloatField("Low stock threshold", null=True, blank=True)
     created_at = models.DateTimeField("Created at", auto_now_add=True)
     updated_at = models.DateTimeField("Updated at", auto_now=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True,blank=True, verbose_name="Category", related_name="products")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_pricing = tuple(getattr(instance, name, None) for name in PRICING_FIELDS)
+        instance._loaded_facets = tuple(getattr(instance, name, None) for name in FACET_FIELDS)
+        return instance
+
     def save(self, *args, **kwargs):
+        self.price = money(self.price)
         if self.discount_percentage is not None:
-            self.discount_price = round(self.price - (self.price * self.discount_percentage / 100), 2)
+            self.discount_price = money(self.price * (100 - money(self.discount_percentage)) / 100)
         else:
             self.discount_price = self.price
+        creating = self.pk is None
+
+        # narx o'zgarmagan bo'lsa (masalan, faqat amount) effective_price ga tegmaymiz
+        pricing = tuple(getattr(self, name) for name in PRICING_FIELDS)
+        price_changed = creating or pricing != getattr(self, '_loaded_pricing', None)
+        if price_changed:
+            schedule = PriceSchedule.active_for(self)
+            self.effective_price = schedule.price_for(self) if schedule else self.discount_price
+
         super().save(*args, **kwargs)
+        if price_changed:
+            self._loaded_pricing = tuple(getattr(self, name) for name in PRICING_FIELDS)
+            PriceHistory.objects.create(
+                product=self, price=self.price, discount_price=self.discount_price,
+                effective_price=self.effective_price, schedule=schedule,
+            )
+        if creating and self.amount:
+            StockMovement.objects.create(
+                product=self, kind=StockMovement.Kind.ADJUSTMENT,
+                quantity=self.amount, balance=self.amount, note="Initial stock"
+            )
+
+    def adjust_stock(self, delta, kind, note="", require_available=False):
+        """
+        Omborni o'zgartirish: amount, ledger yozuvi va low-stock alert bitta joyda.
+        amount bitta UPDATE ... SET amount = amount + delta bilan o'zgaradi va qayta o'qiladi,
+        shuning uchun parallel sotuv/kirimlar bir-birini yo'qotmaydi. require_available bo'lsa
+        qoldiq tekshiruvi ham shu UPDATE ichida (amount >= -delta).
+        """
+        with transaction.atomic():
+            rows = Product.objects.filter(pk=self.pk)
+            guarded = rows.filter(amount__gte=-delta) if require_available else rows
+            if not guarded.update(amount=models.F('amount') + delta, updated_at=timezone.now()):
+                if require_available and rows.exists():
+                    raise ValueError("Not enough product in stock!")
+                raise Product.DoesNotExist(f"Product {self.pk} does not exist.")
+            self.amount = rows.values_list('amount', flat=True).get()
+            before = self.amount - delta
+
+            StockMovement.objects.create(
+                product=self, kind=kind, quantity=delta, balance=self.amount, note=note
+            )
+
+            threshold = self.low_stock_threshold
+            if threshold is None:
+                return
+            if before > threshold >= self.amount:
+                LowStockAlert.objects.create(product=self, amount=self.amount, threshold=threshold)
+            elif before <= threshold < self.amount:
+                LowStockAlert.objects.filter(product=self, resolved_at__isnull=True).update(resolved_at=timezone.now())
 
     def __str__(self):
         return self.title
@@ -114,6 +201,84 @@ class Product(models.Model):
         verbose_name_plural = "Products"
 
 
+PRICING_FIELDS = ('price', 'discount_percentage', 'category_id')
+# katalog fasetlari indeksiga ta'sir qiladigan maydonlar (main/facets.py)
+FACET_FIELDS = ('category_id', 'brand', 'effective_price')
+
+
+# ------------------ Pricing ------------------
+class PriceSchedule(models.Model):
+    """Belgilangan oraliqda (starts_at..ends_at) chegirma; apply_price_schedules buyrug'i yoqadi/o'chiradi"""
+    class State(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        ACTIVE = "ACTIVE", "Active"
+        FINISHED = "FINISHED", "Finished"
+
+    title = models.CharField("Title", max_length=120)
+    discount_percentage = models.DecimalField("Discount percentage", max_digits=5, decimal_places=2)
+    products = models.ManyToManyField(Product, blank=True, related_name="price_schedules", verbose_name="Products")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Category")
+    starts_at = models.DateTimeField("Starts at")
+    ends_at = models.DateTimeField("Ends at")
+    state = models.CharField("State", max_length=10, choices=State.choices, default=State.PENDING, editable=False)
+    created_at = models.DateTimeField("Created at", auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} (-{self.discount_percentage}%)"
+
+    def clean(self):
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError({"ends_at": "End must be after start."})
+
+    def target_q(self):
+        q = models.Q(price_schedules=self)
+        if self.category_id:
+            q |= models.Q(category_id=self.category_id)
+        return q
+
+    def price_for(self, product):
+        """Kampaniya narxi mahsulotning o'z chegirmasidan qimmat bo'lsa, o'z chegirmasi qoladi"""
+        scheduled = money(product.price * (100 - self.discount_percentage) / 100)
+        own = product.discount_price if product.discount_price is not None else product.price
+        return min(own, scheduled)
+
+    @classmethod
+    def active_for(cls, product):
+        if product.pk is None and product.category_id is None:
+            return None
+        q = models.Q(pk__in=[])
+        if product.pk:
+            q |= models.Q(products=product)
+        if product.category_id:
+            q |= models.Q(category_id=product.category_id)
+        return cls.objects.filter(q, state=cls.State.ACTIVE).order_by('-starts_at').first()
+
+    class Meta:
+        verbose_name = "Price schedule"
+        verbose_name_plural = "Price schedules"
+        indexes = [
+            models.Index(fields=["state", "starts_at"]),
+            models.Index(fields=["state", "ends_at"]),
+        ]
+
+
+class PriceHistory(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="price_history", verbose_name="Product")
+    price = money_field("Price")
+    discount_price = money_field("Discount price", null=True)
+    effective_price = money_field("Effective price")
+    schedule = models.ForeignKey(PriceSchedule, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Schedule")
+    created_at = models.DateTimeField("Created at", default=timezone.now, editable=False)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.effective_price} @ {self.created_at:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        verbose_name = "Price history"
+        verbose_name_plural = "Price history"
+        indexes = [models.Index(fields=["product", "created_at"])]
+
+
 # ------------------ Sale ------------------
 class Sale(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, verbose_name="Customer")
@@ -122,7 +287,7 @@ class Sale(models.Model):
     updated_at = models.DateTimeField("Updated at", auto_now=True)
     created_at = models.DateTimeField("Created at", auto_now_add=True)
     quantity = models.PositiveIntegerField("Quantity")
-    total_price = models.FloatField("Total price", editable=False)
+    total_price = money_field("Total price", editable=False)
     sale_date = models.DateTimeField("Sale date", auto_now_add=True)
     sold_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -132,17 +297,30 @@ class Sale(models.Model):
         verbose_name="Sold by"
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # CustomerStats / SellerMonthlyStats delta hisobi uchun DBdagi asl qiymatlar
+        instance._loaded = {
+            name: getattr(instance, name)
+            for name in ('customer_id', 'sold_by_id', 'quantity', 'total_price') if name in field_names
+        }
+        return instance
+
     def save(self, *args, **kwargs):
-        price_to_use = self.product.discount_price or self.product.price
-        self.total_price = round(price_to_use * self.quantity, 2)
+        price_to_use = self.product.effective_price or self.product.discount_price or self.product.price
+        self.total_price = money(price_to_use * self.quantity)
 
-        if self.pk is None:  # yangi sotuv
-            if self.product.amount < self.quantity:
-                raise ValueError("Not enough product in stock!")
-            self.product.amount -= self.quantity
-            self.product.save()
+        # ombor, sotuv va signallardagi hisoblagichlar bitta tranzaksiyada
+        with transaction.atomic():
+            if self.pk is None:  # yangi sotuv: qoldiq DB dagi joriy qiymat bo'yicha tekshiriladi
+                self.product.adjust_stock(-self.quantity, StockMovement.Kind.SALE, require_available=True)
 
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"Sale #{self.id} - {self.product.title if self.product else 'Deleted product'}"
@@ -150,24 +328,105 @@ class Sale(models.Model):
     class Meta:
         verbose_name = "Sale"
         verbose_name_plural = "Sales"
+        indexes = [models.Index(fields=["customer", "-created_at", "-id"], name="sale_customer_history_idx")]
+
+
+class SellerMonthlyStats(models.Model):
+    """Sotuvchi bo'yicha oylik hisoblagichlar, sotuv bilan bitta tranzaksiyada yangilanadi"""
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_sales_stats",
+        verbose_name="Seller"
+    )
+    year = models.PositiveIntegerField("Year")
+    month = models.PositiveIntegerField("Month")
+    units = models.PositiveIntegerField("Units", default=0)
+    revenue = money_field("Revenue", default=0)
+    sale_count = models.PositiveIntegerField("Sale count", default=0)
+
+    def __str__(self):
+        return f"{self.seller} {self.year}-{self.month:02d}: {self.revenue}"
+
+    class Meta:
+        unique_together = ('seller', 'year', 'month')
+        verbose_name = "Seller monthly statistics"
+        verbose_name_plural = "Seller monthly statistics"
+        indexes = [models.Index(fields=["year", "month", "-revenue"], name="sellerstats_leaderboard_idx")]
+
+
+class CustomerStats(models.Model):
+    """Mijoz bo'yicha yig'ma ko'rsatkichlar, Sale signallaridan inkremental yangilanadi"""
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name="stats", verbose_name="Customer")
+    lifetime_revenue = money_field("Lifetime revenue", default=0)
+    order_count = models.PositiveIntegerField("Order count", default=0)
+    first_sale_at = models.DateTimeField("First sale", null=True, blank=True)
+    last_sale_at = models.DateTimeField("Last sale", null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.customer_id}: {self.lifetime_revenue} / {self.order_count}"
+
+    class Meta:
+        verbose_name = "Customer statistics"
+        verbose_name_plural = "Customer statistics"
+        indexes = [models.Index(fields=["-lifetime_revenue"], name="customerstats_revenue_idx")]
+
+
+class SaleArchive(models.Model):
+    """Arxivlangan (Sale jadvalidan ko'chirilgan) bir oylik sotuvlar fayli haqida ma'lumot"""
+    year = models.PositiveIntegerField("Year")
+    month = models.PositiveIntegerField("Month")
+    path = models.CharField("File", max_length=255)
+    rows = models.PositiveIntegerField("Rows", default=0)
+    total_price = money_field("Total price", default=0)
+    checksum = models.CharField("SHA-256", max_length=64)
+    updated_at = models.DateTimeField("Updated at", auto_now=True)
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} ({self.rows} sales)"
+
+    class Meta:
+        unique_together = ('year', 'month')
+        verbose_name = "Sale archive"
+        verbose_name_plural = "Sale archives"
+
+
+# ------------------ Recommendations ------------------
+class RelatedProduct(models.Model):
+    """"Birga sotib olinadi": har mahsulot uchun top-K qo'shnilar (refresh_related_products)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="related_entries", verbose_name="Product")
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+", verbose_name="Related product")
+    score = models.FloatField("Score")
+    rank = models.PositiveSmallIntegerField("Rank")
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score:.3f})"
+
+    class Meta:
+        # /product/<pk>/related/ shu unique indeks bo'yicha bitta so'rov
+        unique_together = ('product', 'rank')
+        ordering = ['product', 'rank']
+        verbose_name = "Related product"
+        verbose_name_plural = "Related products"
 
 
 # ------------------ Purchase ------------------
 class Purchase(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name="Product")
     quantity = models.PositiveIntegerField("Quantity")
-    purchase_price = models.FloatField("Purchase price")
-    total_cost = models.FloatField("Total cost", editable=False)
+    purchase_price = money_field("Purchase price")
+    total_cost = money_field("Total cost", editable=False)
     purchase_date = models.DateTimeField("Purchase date", auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        self.total_cost = round(self.purchase_price * self.quantity, 2)
+        self.purchase_price = money(self.purchase_price)
+        self.total_cost = money(self.purchase_price * self.quantity)
 
-        if self.pk is None:  # yangi purchase bo‘lsa
-            self.product.amount += self.quantity
-            self.product.save()
+        with transaction.atomic():
+            if self.pk is None:  # yangi purchase bo‘lsa
+                self.product.adjust_stock(self.quantity, StockMovement.Kind.PURCHASE)
 
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Purchase of {self.product.title} - {self.total_cost}"
@@ -177,11 +436,64 @@ class Purchase(models.Model):
         verbose_name_plural = "Purchases"
 
 
+# ------------------ Inventory ledger ------------------
+class StockMovement(models.Model):
+    class Kind(models.TextChoices):
+        SALE = "SALE", "Sale"
+        PURCHASE = "PURCHASE", "Purchase"
+        ADJUSTMENT = "ADJUSTMENT", "Adjustment"
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_movements", verbose_name="Product")
+    kind = models.CharField("Kind", max_length=20, choices=Kind.choices)
+    quantity = models.FloatField("Quantity")
+    balance = models.FloatField("Balance after")
+    note = models.CharField("Note", max_length=255, blank=True)
+    created_at = models.DateTimeField("Created at", default=timezone.now, editable=False)
+
+    def __str__(self):
+        return f"{self.kind} {self.quantity:+g} ({self.product_id})"
+
+    class Meta:
+        verbose_name = "Stock movement"
+        verbose_name_plural = "Stock movements"
+        indexes = [models.Index(fields=["product", "created_at"])]
+
+
+class StockSnapshot(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_snapshots", verbose_name="Product")
+    amount = models.FloatField("Amount")
+    taken_at = models.DateTimeField("Taken at", default=timezone.now)
+
+    def __str__(self):
+        return f"{self.product_id} = {self.amount} @ {self.taken_at:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        verbose_name = "Stock snapshot"
+        verbose_name_plural = "Stock snapshots"
+        indexes = [models.Index(fields=["product", "taken_at"])]
+
+
+class LowStockAlert(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="low_stock_alerts", verbose_name="Product")
+    amount = models.FloatField("Amount")
+    threshold = models.FloatField("Threshold")
+    created_at = models.DateTimeField("Created at", auto_now_add=True)
+    resolved_at = models.DateTimeField("Resolved at", null=True, blank=True)
+
+    def __str__(self):
+        return f"Low stock: {self.product} ({self.amount} <= {self.threshold})"
+
+    class Meta:
+        verbose_name = "Low stock alert"
+        verbose_name_plural = "Low stock alerts"
+        indexes = [models.Index(fields=["resolved_at", "created_at"])]
+
+
 # ------------------ Expense ------------------
 class Expense(models.Model):
     description = models.TextField("Description", blank=True, null=True)
     created_at = models.DateTimeField("Created at", auto_now_add=True)
-    price = models.FloatField("Price")
+    price = money_field("Price")
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -189,6 +501,10 @@ class Expense(models.Model):
         verbose_name="Created by"
     )
 
+    def save(self, *args, **kwargs):
+        self.price = money(self.price)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.description or "Expense"
 
@@ -202,6 +518,8 @@ class Images(models.Model):
         related_name="images"
     )
     image = models.ImageField("Image", upload_to='products_images/', blank=True, null=True)
+    # katalog ETag i (main/caching.py) rasmlar o'zgarishini ham ko'radi
+    updated_at = models.DateTimeField("Updated at", auto_now=True)
 
     def __str__(self):
         return f"Image of {self.product.title}"
@@ -222,7 +540,14 @@ class Cart(models.Model):
 class About(models.Model):
     title = models.CharField("About title", max_length=255)
     description = CKEditor5Field('description')
+    description_html = models.TextField("Rendered description", blank=True, editable=False)
+    excerpt = models.CharField("Excerpt", max_length=300, blank=True, editable=False)
     image = models.ImageField("About images", upload_to='about/', blank=True, null=True)
+    updated_at = models.DateTimeField("Updated at", auto_now=True)
+
+    def save(self, *args, **kwargs):
+        self.description_html, self.excerpt = render_content(self.description)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -230,6 +555,7 @@ class About(models.Model):
 class AboutImage(models.Model):
     about = models.ForeignKey(About, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField("Image", upload_to='about_images/', blank=True, null=True)
+    updated_at = models.DateTimeField("Updated at", auto_now=True)
 
     def __str__(self):
         return str(self.image)
@@ -237,8 +563,15 @@ class AboutImage(models.Model):
 class Announcement(models.Model):
     title = models.CharField("Announcement title", max_length=255)
     description = CKEditor5Field('description')
+    description_html = models.TextField("Rendered description", blank=True, editable=False)
+    excerpt = models.CharField("Excerpt", max_length=300, blank=True, editable=False)
     image = models.ImageField("Announcement", upload_to='announcement/', blank=True, null=True)
     created_at = models.DateTimeField("Created at", auto_now_add=True)
+    updated_at = models.DateTimeField("Updated at", auto_now=True)
+
+    def save(self, *args, **kwargs):
+        self.description_html, self.excerpt = render_content(self.description)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -246,6 +579,7 @@ class Announcement(models.Model):
 class AnnouncementImage(models.Model):
      announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name="images")
      image = models.ImageField("Image", upload_to='announcement_images/', blank=True, null=True)
+     updated_at = models.DateTimeField("Updated at", auto_now=True)
 
      def __str__(self):
         return str(self.announcement)
\ No newline at end of file
@@ -0,0 +1,21 @@
+# main/money.py
+# Pul qiymatlari Decimal (2 xona) sifatida saqlanadi: float yig'indisidagi yaxlitlash xatolari bo'lmaydi.
+from decimal import Decimal, ROUND_HALF_UP
+
+MONEY_MAX_DIGITS = 14
+MONEY_DECIMAL_PLACES = 2
+CENT = Decimal('0.01')
+
+
+def money(value):
+    """int/float/str/Decimal -> 2 xonali Decimal"""
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value):
+    """Decimal -> butun tiyin (minor units), vektorli hisob uchun"""
+    return int(money(value or 0) * 100)
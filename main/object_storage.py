@@ -0,0 +1,374 @@
+# main/object_storage.py
+# S3-mos obyekt ombori uchun media backendi (STORAGES['default'], MEDIA_STORAGE='object').
+# Bir nechta web host bitta bucketdan foydalanadi: MEDIA_ROOT diski va static() ga bog'liqlik yo'q.
+#   S3ObjectStore    — boto3 orqali AWS S3 / MinIO / boshqa S3-mos endpoint
+#   LocalObjectStore — xuddi shu interfeys fayl tizimida (dev, testlar; BUCKET bo'sh bo'lsa)
+# Katta fayllar multipart bilan qismlab yuklanadi; URL lar imzolangan (yoki PUBLIC_URL orqali ochiq).
+# Metadata (hajm, vaqt) jarayon ichidagi LRU keshda: nomlar kontent-adresli (o'zgarmas), shuning
+# uchun ImageField.url / .size har safar omborga so'rov yubormaydi.
+import hashlib
+import hmac
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+
+from .storage import ContentAddressedMixin
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+ObjectInfo = namedtuple('ObjectInfo', 'key size modified')
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _signature(secret, key, expires):
+    return hmac.new(secret.encode(), f"{key}\n{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+# ---------------- fayl tizimi emulyatori ----------------
+class LocalObjectStore:
+    """S3 semantikasi diskda: atomik put, multipart (qismlar .multipart/<upload_id>/ da), HMAC imzoli URL"""
+
+    MULTIPART_DIR = '.multipart'
+
+    def __init__(self, root, base_url, secret):
+        self.root = Path(root).resolve()
+        self.base_url = base_url
+        self.secret = secret
+
+    def _path(self, key):
+        path = (self.root / key).resolve()
+        if self.root not in path.parents or key.startswith(self.MULTIPART_DIR):
+            raise SuspiciousFileOperation(f"Invalid object key {key!r}")
+        return path
+
+    def _info(self, key, path):
+        stat = path.stat()
+        return ObjectInfo(key, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc))
+
+    def _write(self, key, chunks):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return self._info(key, path)
+
+    def head(self, key):
+        try:
+            return self._info(key, self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def put(self, key, content, content_type=None):
+        return self._write(key, content.chunks())
+
+    def delete(self, key):
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def touch(self, key):
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def list(self, prefix=''):
+        stack = [self.root / prefix] if prefix else [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        key = Path(entry.path).relative_to(self.root).as_posix()
+                        stat = entry.stat()
+                        yield ObjectInfo(key, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc))
+
+    def create_multipart(self, key, content_type=None):
+        self._path(key)
+        upload_id = uuid.uuid4().hex
+        (self.root / self.MULTIPART_DIR / upload_id).mkdir(parents=True)
+        return upload_id
+
+    def upload_part(self, key, upload_id, number, data):
+        (self.root / self.MULTIPART_DIR / upload_id / f"{number:05d}").write_bytes(data)
+        return hashlib.md5(data).hexdigest()
+
+    def complete_multipart(self, key, upload_id, parts):
+        directory = self.root / self.MULTIPART_DIR / upload_id
+
+        def chunks():
+            for number, etag in parts:
+                data = (directory / f"{number:05d}").read_bytes()
+                if hashlib.md5(data).hexdigest() != etag:
+                    raise ValueError(f"Part {number} of {key} does not match its ETag")
+                yield data
+
+        info = self._write(key, chunks())
+        shutil.rmtree(directory, ignore_errors=True)
+        return info
+
+    def abort_multipart(self, key, upload_id):
+        shutil.rmtree(self.root / self.MULTIPART_DIR / upload_id, ignore_errors=True)
+
+    def presigned_url(self, key, expires):
+        query = urlencode({'expires': expires, 'signature': _signature(self.secret, key, expires)})
+        return f"{self.base_url}{key}?{query}"
+
+    def verify(self, key, expires, signature):
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        return expires >= time.time() and hmac.compare_digest(_signature(self.secret, key, expires), signature or '')
+
+
+# ---------------- S3 / MinIO ----------------
+class S3ObjectStore:
+    def __init__(self, bucket, endpoint_url=None, access_key=None, secret_key=None, region=None):
+        if boto3 is None:
+            raise RuntimeError("MEDIA_OBJECT_STORAGE['BUCKET'] requires boto3")
+        self.bucket = bucket
+        self.client = boto3.client(
+            's3', endpoint_url=endpoint_url or None, region_name=region or None,
+            aws_access_key_id=access_key or None, aws_secret_access_key=secret_key or None,
+        )
+
+    @staticmethod
+    def _missing(error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def head(self, key):
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if self._missing(e):
+                return None
+            raise
+        return ObjectInfo(key, response['ContentLength'], response['LastModified'])
+
+    def open(self, key):
+        body = self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+        spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        for chunk in body.iter_chunks(64 * 1024):
+            spooled.write(chunk)
+        spooled.seek(0)
+        return spooled
+
+    def put(self, key, content, content_type=None):
+        content.seek(0)
+        extra = {'ContentType': content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=content, **extra)
+        return self.head(key)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def touch(self, key):
+        # LastModified faqat nusxalash bilan yangilanadi (o'z ustiga, metadata REPLACE)
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket, Key=key, CopySource={'Bucket': self.bucket, 'Key': key},
+                MetadataDirective='REPLACE',
+            )
+        except ClientError as e:
+            if self._missing(e):
+                return False
+            raise
+        return True
+
+    def list(self, prefix=''):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get('Contents', []):
+                yield ObjectInfo(item['Key'], item['Size'], item['LastModified'])
+
+    def create_multipart(self, key, content_type=None):
+        extra = {'ContentType': content_type} if content_type else {}
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)['UploadId']
+
+    def upload_part(self, key, upload_id, number, data):
+        response = self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data)
+        return response['ETag'].strip('"')
+
+    def complete_multipart(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': f'"{etag}"'} for number, etag in parts]},
+        )
+        return self.head(key)
+
+    def abort_multipart(self, key, upload_id):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def presigned_url(self, key, expires):
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': key}, ExpiresIn=max(1, int(expires - time.time())),
+        )
+
+
+def build_store(options):
+    if options.get('BUCKET'):
+        return S3ObjectStore(
+            options['BUCKET'], options.get('ENDPOINT_URL'), options.get('ACCESS_KEY'),
+            options.get('SECRET_KEY'), options.get('REGION'),
+        )
+    return LocalObjectStore(options['LOCAL_ROOT'], settings.MEDIA_URL, options.get('SECRET_KEY') or settings.SECRET_KEY)
+
+
+# ---------------- Django storage ----------------
+@deconstructible
+class ObjectStorage(ContentAddressedMixin, Storage):
+    def __init__(self, options=None, store=None):
+        self.options = {**getattr(settings, 'MEDIA_OBJECT_STORAGE', {}), **(options or {})}
+        self._store = store
+        self.metadata = LRUCache(self.options.get('METADATA_CACHE_SIZE', 10_000))
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = build_store(self.options)
+        return self._store
+
+    def _head(self, name):
+        info = self.metadata.get(name)
+        if info is None:
+            # yo'q obyektlar keshlanmaydi: boshqa host yuklagan fayl darhol ko'rinadi
+            info = self.store.head(name)
+            if info is not None:
+                self.metadata.set(name, info)
+        return info
+
+    def _open(self, name, mode='rb'):
+        return File(self.store.open(name), name=name)
+
+    def _save(self, name, content):
+        content_type = mimetypes.guess_type(name)[0]
+        chunk_size = self.options.get('MULTIPART_CHUNK_SIZE', 8 * 1024 * 1024)
+        if content.size is not None and content.size >= self.options.get('MULTIPART_THRESHOLD', chunk_size):
+            upload_id = self.store.create_multipart(name, content_type)
+            try:
+                parts = [
+                    (number, self.store.upload_part(name, upload_id, number, chunk))
+                    for number, chunk in enumerate(content.chunks(chunk_size), start=1)
+                ]
+                info = self.store.complete_multipart(name, upload_id, parts)
+            except BaseException:
+                self.store.abort_multipart(name, upload_id)
+                raise
+        else:
+            info = self.store.put(name, content, content_type)
+        self.metadata.set(name, info)
+        return name
+
+    def touch(self, name):
+        touched = self.store.touch(name)
+        self.metadata.pop(name)
+        return touched
+
+    def delete(self, name):
+        self.store.delete(name)
+        self.metadata.pop(name)
+
+    def exists(self, name):
+        return self._head(name) is not None
+
+    def size(self, name):
+        return self._head(name).size
+
+    def get_modified_time(self, name):
+        return self._head(name).modified
+
+    def listdir(self, path):
+        prefix = f"{path.rstrip('/')}/" if path else ''
+        directories, files = set(), []
+        for info in self.store.list(prefix):
+            head, _, tail = info.key[len(prefix):].partition('/')
+            if tail:
+                directories.add(head)
+            else:
+                files.append(head)
+        return sorted(directories), files
+
+    def signing_window(self):
+        """(joriy oyna raqami, oyna uzunligi soniyada); URL lar imzolanmasa (PUBLIC_URL) None"""
+        if self.options.get('PUBLIC_URL'):
+            return None
+        seconds = self.options.get('SIGNED_URL_EXPIRE', 3600)
+        return int(time.time()) // seconds, seconds
+
+    def url(self, name):
+        window = self.signing_window()
+        if window is None:
+            return f"{self.options['PUBLIC_URL'].rstrip('/')}/{name}"
+        # N-oynada imzolangan URL (N+2)-oyna boshigacha amal qiladi, ya'ni kamida bitta to'liq oyna.
+        # LocalObjectStore URL i oyna ichida bir xil; S3 presigned URL imzo vaqtini (X-Amz-Date)
+        # o'z ichiga oladi va har chaqiruvda farq qiladi. Katalog validatorlari (main/caching.py)
+        # oyna raqamini ETag ga qo'shadi va max-age ni oynadan oshirmaydi: 304 faqat shu oynada
+        # olingan, URL lari hali amal qiladigan javobni tasdiqlaydi.
+        number, seconds = window
+        return self.store.presigned_url(name, (number + 2) * seconds)
@@ -0,0 +1,124 @@
+# main/pricing.py
+# PriceSchedule o'tishlarini qo'llash: har bir o'tish uchun bitta UPDATE + narx tarixi.
+# Jadval narxi = min(mahsulotning o'z chegirmasi, price * (100 - foiz) / 100).
+# Faol jadval tahrirlansa (foiz, kategoriya, mahsulotlar) yoki o'chirilsa, narxlar darhol
+# qayta hisoblanadi (refresh_active_schedules, main/signals.py).
+from django.db import transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Coalesce, Least, Round
+from django.utils import timezone
+
+from . import facets
+from .models import PriceHistory, PriceSchedule, Product
+
+
+def _targets(schedule):
+    return Product.objects.filter(pk__in=Product.objects.filter(schedule.target_q()).values('pk'))
+
+
+def record_history(products, now, schedule=None):
+    PriceHistory.objects.bulk_create(
+        [
+            PriceHistory(
+                product_id=pk, price=price, discount_price=discount_price,
+                effective_price=effective_price, schedule=schedule, created_at=now,
+            )
+            for pk, price, discount_price, effective_price in products.values_list(
+                'pk', 'price', 'discount_price', 'effective_price'
+            ).iterator(chunk_size=2000)
+        ],
+        batch_size=1000,
+    )
+
+
+def _base_price():
+    return Coalesce(F('discount_price'), F('price'))
+
+
+def _scheduled_price(schedule):
+    multiplier = Value((100 - schedule.discount_percentage) / 100, output_field=DecimalField())
+    return Least(_base_price(), Round(F('price') * multiplier, 2))
+
+
+def _apply(schedule, products, now):
+    products.update(effective_price=_scheduled_price(schedule), updated_at=now)
+    record_history(products, now, schedule)
+
+
+def start_schedule(schedule, now):
+    _apply(schedule, _targets(schedule), now)
+    schedule.state = PriceSchedule.State.ACTIVE
+    schedule.save(update_fields=['state'])
+
+
+def finish_schedule(schedule, now):
+    products = _targets(schedule)
+    ids = list(products.values_list('pk', flat=True))
+    schedule.state = PriceSchedule.State.FINISHED
+    schedule.save(update_fields=['state'])
+
+    affected = Product.objects.filter(pk__in=ids)
+    affected.update(effective_price=_base_price(), updated_at=now)
+    # ustma-ust tushgan, hali faol jadvallar qayta qo'llanadi
+    reapply_active_schedules(affected, now)
+    record_history(affected, now)
+
+
+def reapply_active_schedules(products, now):
+    """products ichidagi faol jadvalga tushadiganlar narxini qayta qo'llash (keyin boshlangani ustun)"""
+    for schedule in PriceSchedule.objects.filter(state=PriceSchedule.State.ACTIVE).order_by('starts_at'):
+        overlap = products.filter(pk__in=Product.objects.filter(schedule.target_q()).values('pk'))
+        overlap.update(effective_price=_scheduled_price(schedule), updated_at=now)
+
+
+def refresh_active_schedules(now=None):
+    """
+    Faol jadval o'zgargandan keyin narxlarni qayta hisoblash. Qamrov: hozir jadval narxida turgan
+    (effective_price != o'z narxi) mahsulotlar + faol jadvallarning hozirgi nishonlari, ya'ni
+    jadvaldan chiqarilgan mahsulotlar ham o'z narxiga qaytadi. Tarix faqat narxi o'zgarganlarga.
+    """
+    now = now or timezone.now()
+    ids = set(Product.objects.exclude(effective_price=_base_price()).values_list('pk', flat=True))
+    for schedule in PriceSchedule.objects.filter(state=PriceSchedule.State.ACTIVE):
+        ids.update(_targets(schedule).values_list('pk', flat=True))
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        affected = Product.objects.filter(pk__in=ids)
+        before = dict(affected.values_list('pk', 'effective_price'))
+        affected.update(effective_price=_base_price(), updated_at=now)
+        reapply_active_schedules(affected, now)
+        changed = [pk for pk, price in affected.values_list('pk', 'effective_price') if price != before.get(pk)]
+        record_history(Product.objects.filter(pk__in=changed), now)
+    if changed:
+        facets.invalidate()
+    return len(changed)
+
+
+def apply_due_schedules(now=None):
+    """Vaqti kelgan jadvallarni yoqadi/o'chiradi; (started, finished) sonini qaytaradi"""
+    now = now or timezone.now()
+    started = finished = 0
+
+    ending = PriceSchedule.objects.filter(state=PriceSchedule.State.ACTIVE, ends_at__lte=now).order_by('ends_at')
+    for schedule in ending:
+        with transaction.atomic():
+            finish_schedule(schedule, now)
+        finished += 1
+
+    # oynasi to'liq o'tib ketgan jadvallar qo'llanmaydi
+    PriceSchedule.objects.filter(state=PriceSchedule.State.PENDING, ends_at__lte=now).update(
+        state=PriceSchedule.State.FINISHED
+    )
+
+    starting = PriceSchedule.objects.filter(state=PriceSchedule.State.PENDING, starts_at__lte=now).order_by('starts_at')
+    for schedule in starting:
+        with transaction.atomic():
+            start_schedule(schedule, now)
+        started += 1
+
+    # queryset.update() signal yubormaydi: narx oraliqlari fasetlari qayta quriladi
+    if started or finished:
+        facets.invalidate()
+    return started, finished
@@ -0,0 +1,266 @@
+# main/recommendations.py
+# "Birga sotib olinadi": mahsulot x mahsulot co-occurrence matritsasi.
+# Savat (basket) = mijozning barcha sotuvlari yoki foydalanuvchining savatchasi (Cart).
+# Diskda faqat yig'ilgan holat JSON ko'rinishida saqlanadi: support, juftliklar soni (siyrak
+# matritsa) va lookback oynasidagi hisoblangan (savat, mahsulot) a'zoliklari — savatlarning o'zi
+# saqlanmaydi. Har ishga tushganda faqat watermark (oldingi ishga tushish vaqti -
+# RECOMMENDATIONS_LOOKBACK_MINUTES) dan keyin yaratilgan Sale/Cart qatorlari qo'shiladi: tegilgan
+# savatlarning oldingi tarkibi jonli jadvallardan (watermark dan oldingi qatorlar) va holatdagi
+# oyna a'zoliklaridan tiklanadi, shuning uchun lookback oynasini qayta o'qish matritsani
+# o'zgartirmaydi (idempotent). Faqat qatori o'zgargan mahsulotlarning top-K qo'shnilari
+# RelatedProduct jadvalida qayta yoziladi.
+# Inkremental yo'l faqat qo'shadi: o'chirilgan sotuv/savatlar, arxiv va holat fayli yo'qligi
+# to'liq qayta qurishda hisobga olinadi (holat yo'q/eskirgan bo'lsa yoki
+# RECOMMENDATIONS_FULL_REBUILD_HOURS o'tganda avtomatik).
+import json
+import math
+import os
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .archive import read_archive
+from .models import Cart, Product, RelatedProduct, Sale, SaleArchive
+
+STATE_VERSION = 3
+
+
+def state_path():
+    return Path(settings.RECOMMENDATIONS_DIR) / 'cooccurrence.json'
+
+
+def top_k():
+    return getattr(settings, 'RELATED_PRODUCTS_TOP_K', 10)
+
+
+def empty_state():
+    return {
+        'version': STATE_VERSION,
+        'built_at': None,    # oxirgi to'liq qayta qurish
+        'synced_at': None,   # oxirgi ishga tushish (so'rovlardan oldin olingan vaqt)
+        'recent': set(),     # lookback oynasida hisoblangan ('customer' | 'user', id, product_id)
+        'support': {},       # product_id -> nechta savatda bor
+        'matrix': {},        # product_id -> (array neighbours, array counts)
+    }
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def load_state():
+    path = state_path()
+    if not path.exists():
+        return empty_state()
+    with open(path) as fh:
+        raw = json.load(fh)
+    if raw.get('version') != STATE_VERSION:
+        return empty_state()
+    return {
+        'version': STATE_VERSION,
+        'built_at': _parse_time(raw['built_at']),
+        'synced_at': _parse_time(raw['synced_at']),
+        'recent': {tuple(item) for item in raw['recent']},
+        'support': {int(pid): count for pid, count in raw['support'].items()},
+        'matrix': {
+            int(pid): (array('q', neighbours), array('q', counts)) for pid, (neighbours, counts) in raw['matrix'].items()
+        },
+    }
+
+
+def save_state(state):
+    path = state_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    raw = {
+        'version': STATE_VERSION,
+        'built_at': state['built_at'].isoformat() if state['built_at'] else None,
+        'synced_at': state['synced_at'].isoformat() if state['synced_at'] else None,
+        'recent': sorted(state['recent']),
+        'support': state['support'],
+        'matrix': {pid: [list(neighbours), list(counts)] for pid, (neighbours, counts) in state['matrix'].items()},
+    }
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as fh:
+        json.dump(raw, fh, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+class CooccurrenceMatrix:
+    """Siyrak simmetrik matritsa: saqlashda arraylar, o'zgargan qatorlar xotirada Counter"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.dirty = {}
+
+    def row(self, product_id):
+        if product_id in self.dirty:
+            return self.dirty[product_id]
+        neighbours, counts = self.rows.get(product_id, ((), ()))
+        return Counter(dict(zip(neighbours, counts)))
+
+    def _writable(self, product_id):
+        if product_id not in self.dirty:
+            self.dirty[product_id] = self.row(product_id)
+        return self.dirty[product_id]
+
+    def add_pair(self, a, b):
+        self._writable(a)[b] += 1
+        self._writable(b)[a] += 1
+
+    def compact(self):
+        for product_id, counter in self.dirty.items():
+            self.rows[product_id] = (array('q', counter.keys()), array('q', counter.values()))
+        self.dirty = {}
+        return self.rows
+
+
+def _basket_rows():
+    return (
+        ('customer', Sale.objects.filter(customer_id__isnull=False, product_id__isnull=False), 'customer_id'),
+        ('user', Cart.objects.filter(user_id__isnull=False), 'user_id'),
+    )
+
+
+def _new_items(since):
+    """(basket_key, product_id, created_at) uchliklari; since None bo'lsa arxivlangan sotuvlar va barcha qatorlar"""
+    if since is None:
+        for archive in SaleArchive.objects.order_by('year', 'month'):
+            for sale in read_archive(archive):
+                if sale['customer_id'] and sale['product_id']:
+                    yield ('customer', sale['customer_id']), sale['product_id'], None
+
+    for kind, rows, owner in _basket_rows():
+        if since is not None:
+            rows = rows.filter(created_at__gte=since)
+        for owner_id, product_id, created_at in rows.order_by().values_list(owner, 'product_id', 'created_at').iterator(chunk_size=5000):
+            yield (kind, owner_id), product_id, created_at
+
+
+def _counted_baskets(state, keys, since):
+    """Tegilgan savatlarning allaqachon hisoblangan tarkibi: since dan oldingi jonli qatorlar + oyna a'zoliklari"""
+    baskets = defaultdict(set)
+    for kind, rows, owner in _basket_rows():
+        ids = [owner_id for key_kind, owner_id in keys if key_kind == kind]
+        rows = rows.filter(**{f'{owner}__in': ids}, created_at__lt=since)
+        for owner_id, product_id in rows.order_by().values_list(owner, 'product_id').distinct():
+            baskets[(kind, owner_id)].add(product_id)
+    for kind, owner_id, product_id in state['recent']:
+        if (kind, owner_id) in keys:
+            baskets[(kind, owner_id)].add(product_id)
+    return baskets
+
+
+def score(count, support_a, support_b):
+    # kosinus o'xshashlik: mashhur mahsulotlar hamma joyda birinchi chiqib qolmasligi uchun
+    return count / math.sqrt(support_a * support_b)
+
+
+def update_matrix(state, now, full=False):
+    """Yangi qatorlarni matritsaga qo'shadi; top-K si qayta hisoblanishi kerak bo'lgan id lar"""
+    lookback = timedelta(minutes=settings.RECOMMENDATIONS_LOOKBACK_MINUTES)
+    matrix = CooccurrenceMatrix(state['matrix'])
+    support = state['support']
+    touched, support_changed = set(), set()
+
+    if full:
+        # to'liq qayta qurishda savatlar faqat shu ishga tushish davomida xotirada
+        items, baskets = _new_items(None), defaultdict(set)
+    else:
+        since = state['synced_at'] - lookback
+        items = list(_new_items(since))
+        baskets = _counted_baskets(state, {key for key, _, _ in items}, since)
+
+    # keyingi ishga tushish watermark idan keyin yaratilgan qatorlar: ular qayta o'qiladi
+    recent = set()
+    for key, product_id, created_at in items:
+        if created_at is not None and created_at >= now - lookback:
+            recent.add((*key, product_id))
+        basket = baskets[key]
+        if product_id in basket:  # savatda bir mahsulot bir marta sanaladi
+            continue
+        for other in basket:
+            matrix.add_pair(product_id, other)
+            touched.add(other)
+        basket.add(product_id)
+        support[product_id] = support.get(product_id, 0) + 1
+        touched.add(product_id)
+        support_changed.add(product_id)
+
+    # support o'zgarsa, qo'shnilar qatoridagi ball ham o'zgaradi
+    for product_id in support_changed:
+        touched.update(matrix.row(product_id))
+
+    matrix.compact()
+    state['recent'] = recent
+    return touched
+
+
+def top_neighbours(state, product_id, limit):
+    neighbours, counts = state['matrix'].get(product_id, ((), ()))
+    support = state['support']
+    own = support.get(product_id, 1)
+    scored = [
+        (score(count, own, support.get(other, 1)), other)
+        for other, count in zip(neighbours, counts)
+    ]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored[:limit]
+
+
+def write_related(state, product_ids, batch_size=500):
+    """Berilgan mahsulotlar uchun RelatedProduct qatorlarini qayta yozadi"""
+    limit = top_k()
+    product_ids = sorted(product_ids)
+    written = 0
+    for start in range(0, len(product_ids), batch_size):
+        chunk = product_ids[start:start + batch_size]
+        neighbours = {pid: top_neighbours(state, pid, limit * 2) for pid in chunk}
+        wanted = set(chunk) | {other for rows in neighbours.values() for _, other in rows}
+        existing = set(Product.objects.filter(pk__in=wanted).values_list('pk', flat=True))
+
+        rows = []
+        for pid in chunk:
+            if pid not in existing:
+                continue
+            ranked = [(value, other) for value, other in neighbours[pid] if other in existing][:limit]
+            rows.extend(
+                RelatedProduct(product_id=pid, related_id=other, score=value, rank=rank)
+                for rank, (value, other) in enumerate(ranked, start=1)
+            )
+        with transaction.atomic():
+            RelatedProduct.objects.filter(product_id__in=chunk).delete()
+            RelatedProduct.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+    return written
+
+
+def needs_full_rebuild(state, now):
+    if state['synced_at'] is None or state['built_at'] is None:
+        return True
+    return now - state['built_at'] >= timedelta(hours=settings.RECOMMENDATIONS_FULL_REBUILD_HOURS)
+
+
+def refresh_related(full=False, now=None):
+    """
+    Inkremental yoki to'liq yangilash; (products, rows) qaytaradi. To'liq qayta qurish
+    matritsani almashtiradi, shuning uchun o'chirilgan sotuv/savatlar ham hisobdan chiqadi.
+    """
+    now = now or timezone.now()
+    state = load_state()
+    full = full or needs_full_rebuild(state, now)
+    if full:
+        state = empty_state()
+        state['built_at'] = now
+    touched = update_matrix(state, now, full=full)
+    state['synced_at'] = now
+    with transaction.atomic():
+        if full:
+            RelatedProduct.objects.all().delete()
+        written = write_related(state, touched)
+    save_state(state)
+    return len(touched), written
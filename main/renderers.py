@@ -0,0 +1,45 @@
+# main/renderers.py
+# Optional faster renderers, chosen by the Accept header through DRF content negotiation.
+# orjson and msgpack are optional: without them the JSON renderer falls back to the stdlib
+# encoder and the MessagePack renderer is left out of DEFAULT_RENDERER_CLASSES.
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _default(obj):
+    # DRF encoderi Decimal, UUID, lazy str va h.k.ni biladi
+    return JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer bilan bir xil natija, lekin orjson bo'lsa undan foydalanadi"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
@@ -0,0 +1,351 @@
+# main/reports.py
+# Oylik va yillik P&L (foyda-zarar) hisobotlari: CSV / XLSX / PDF.
+# Fayllar diskda MonthlyStats.version bo'yicha keshlanadi: o'zgarmagan oy qayta hisoblanmaydi,
+# yillik hisobot esa faqat versiyasi o'zgargan oylarni qayta yig'adi. Kategoriya va sotuvchi nomlari
+# ham hisobotga kiradi, shuning uchun kesh kalitida ularning versiyasi (labels_version) ham bor.
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Max, Sum
+
+from .archive import iter_sales, month_bounds
+from .models import Category, Expense, MonthlyStats, Product, Salary
+from .money import money
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS = ('csv', 'xlsx', 'pdf')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+TOTAL_LABELS = [
+    ('total_sales', 'Sales'),
+    ('total_purchases', 'Purchases'),
+    ('total_salaries', 'Salaries'),
+    ('expenses', 'Expenses'),
+    ('net_profit', 'Net profit'),
+]
+
+# admin fon yig'ishlari: executor birinchi kerak bo'lganda yaratiladi, bir xil hisobot qayta
+# navbatga qo'yilmaydi va navbat REPORTS_MAX_PENDING bilan cheklangan (manage.py generate_reports
+# esa shu kodni executorsiz, o'z jarayonida ishlatadi)
+_executor = None
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def reports_dir():
+    path = Path(settings.REPORTS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _atomic_write(path, data):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _drop_stale(pattern, keep):
+    """Eski versiyadagi kesh fayllarini o'chirish"""
+    for old in reports_dir().glob(pattern):
+        if old != keep:
+            old.unlink(missing_ok=True)
+
+
+def _user_name(user):
+    return f"{user.first_name} {user.last_name}".strip() or user.username
+
+
+# ------------------ Data ------------------
+def labels_version():
+    """Kategoriyalar (MAX(updated_at), soni) va sotuvchilar (ismlari) digesti: nom o'zgarsa kesh eskiradi"""
+    categories = Category.objects.aggregate(modified=Max('updated_at'), count=Count('pk'))
+    sellers = User.objects.filter(role=User.Role.ADMIN).order_by('pk').values_list(
+        'pk', 'username', 'first_name', 'last_name',
+    )
+    return hashlib.sha1(repr((categories, list(sellers))).encode()).hexdigest()[:12]
+
+
+def _compute_month_data(stats):
+    start, end = month_bounds(stats.year, stats.month)
+
+    categories = dict(Category.objects.values_list('id', 'title'))
+    product_category = dict(Product.objects.values_list('id', 'category_id'))
+    users = {u.id: _user_name(u) for u in User.objects.filter(role=User.Role.ADMIN)}
+
+    by_category = defaultdict(lambda: [0, Decimal(0)])
+    by_seller = defaultdict(lambda: [0, Decimal(0)])
+    for sale in iter_sales(start, end):  # jonli + arxiv
+        category = categories.get(product_category.get(sale['product_id']), 'Uncategorized')
+        seller = users.get(sale['sold_by_id'], 'Unknown')
+        for bucket in (by_category[category], by_seller[seller]):
+            bucket[0] += sale['quantity']
+            bucket[1] += sale['total_price']
+
+    salaries = (
+        Salary.objects.filter(for_month=stats)
+        .values('taken_by__username', 'taken_by__first_name', 'taken_by__last_name')
+        .annotate(total=Sum('salary_price')).order_by('-total')
+    )
+    expenses = (
+        Expense.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values('description').annotate(total=Sum('price')).order_by('-total')
+    )
+    return {
+        'year': stats.year,
+        'month': stats.month,
+        'version': stats.version,
+        'totals': {field: str(getattr(stats, field)) for field, _ in TOTAL_LABELS},
+        'sales_by_category': sorted(([k, q, str(money(t))] for k, (q, t) in by_category.items()), key=lambda r: -Decimal(r[2])),
+        'sales_by_seller': sorted(([k, q, str(money(t))] for k, (q, t) in by_seller.items()), key=lambda r: -Decimal(r[2])),
+        'salaries': [
+            [f"{r['taken_by__first_name']} {r['taken_by__last_name']}".strip() or r['taken_by__username'], str(money(r['total']))]
+            for r in salaries
+        ],
+        'expenses': [[r['description'] or 'Expense', str(money(r['total']))] for r in expenses],
+    }
+
+
+def month_data(stats, labels=None):
+    """Oy ma'lumotlari (JSON kesh, MonthlyStats.version va labels_version bo'yicha)"""
+    labels = labels or labels_version()
+    path = reports_dir() / f"pl-data-{stats.year}-{stats.month:02d}-v{stats.version}-{labels}.json"
+    if path.exists():
+        return json.loads(path.read_text())
+    data = _compute_month_data(stats)
+    _atomic_write(path, json.dumps(data).encode())
+    _drop_stale(f"pl-data-{stats.year}-{stats.month:02d}-v*.json", path)
+    return data
+
+
+# ------------------ Tables ------------------
+def _money_cell(value):
+    return float(Decimal(value))
+
+
+def _month_rows(data):
+    rows = [[f"Profit and loss {data['year']}-{data['month']:02d}"], []]
+    rows += [[label, _money_cell(data['totals'][field])] for field, label in TOTAL_LABELS]
+    sections = [
+        ('Sales by category', ['Category', 'Units', 'Revenue'], data['sales_by_category']),
+        ('Sales by seller', ['Seller', 'Units', 'Revenue'], data['sales_by_seller']),
+        ('Salaries', ['Employee', 'Amount'], data['salaries']),
+        ('Expenses', ['Description', 'Amount'], data['expenses']),
+    ]
+    for title, header, items in sections:
+        rows += [[], [title], header]
+        rows += [row[:-1] + [_money_cell(row[-1])] for row in items]
+    return rows
+
+
+def _year_rows(year, datas):
+    rows = [[f"Profit and loss {year}"], [], ['Month'] + [label for _, label in TOTAL_LABELS]]
+    sums = defaultdict(Decimal)
+    for data in datas:
+        rows.append([f"{year}-{data['month']:02d}"] + [_money_cell(data['totals'][f]) for f, _ in TOTAL_LABELS])
+        for field, _ in TOTAL_LABELS:
+            sums[field] += Decimal(data['totals'][field])
+    rows.append(['Total'] + [float(sums[f]) for f, _ in TOTAL_LABELS])
+    for data in datas:
+        rows += [[], []] + _month_rows(data)
+    return rows
+
+
+# ------------------ Writers ------------------
+def _write_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [f"{v:.2f}" if isinstance(v, float) else v for v in row] for row in rows
+    )
+    return buffer.getvalue().encode('utf-8-sig')
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _write_xlsx(rows):
+    """Minimal bitta varaqli XLSX (qo'shimcha kutubxonasiz)"""
+    sheet_rows = []
+    for r, row in enumerate(rows, start=1):
+        cells = []
+        for c, value in enumerate(row):
+            ref = f"{_column_letter(c)}{r}"
+            if isinstance(value, (int, float)):
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+            else:
+                cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+        sheet_rows.append(f'<row r="{r}">{"".join(cells)}</row>')
+
+    ns = 'http://schemas.openxmlformats.org'
+    files = {
+        '[Content_Types].xml': (
+            f'<?xml version="1.0" encoding="UTF-8"?><Types xmlns="{ns}/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'
+        ),
+        '_rels/.rels': (
+            f'<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="{ns}/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/workbook.xml': (
+            f'<?xml version="1.0" encoding="UTF-8"?><workbook xmlns="{ns}/spreadsheetml/2006/main" '
+            f'xmlns:r="{ns}/officeDocument/2006/relationships"><sheets>'
+            '<sheet name="P&amp;L" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            f'<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="{ns}/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/worksheets/sheet1.xml': (
+            f'<?xml version="1.0" encoding="UTF-8"?><worksheet xmlns="{ns}/spreadsheetml/2006/main">'
+            f'<sheetData>{"".join(sheet_rows)}</sheetData></worksheet>'
+        ),
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _write_pdf(rows, lines_per_page=64):
+    """Minimal matnli PDF (Courier, A4), qo'shimcha kutubxonasiz"""
+    lines = []
+    for row in rows:
+        cells = [f"{v:>14,.2f}" if isinstance(v, float) else f"{v:>14}" if isinstance(v, int) else str(v) for v in row]
+        lines.append((cells[0].ljust(32) + ''.join(cells[1:])) if len(cells) > 1 else ''.join(cells))
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    def pdf_text(text):
+        text = text.encode('latin-1', 'replace').decode('latin-1')
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>']
+    page_ids = []
+    for page in pages:
+        stream = 'BT /F1 9 Tf 11 TL 36 806 Td ' + ' '.join(f'({pdf_text(line)}) Tj T*' for line in page) + ' ET'
+        objects.append(f'<< /Length {len(stream.encode("latin-1"))} >>\nstream\n{stream}\nendstream')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>'
+        )
+        page_ids.append(len(objects))
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(f"{i} 0 R" for i in page_ids)}] /Count {len(page_ids)} >>'
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1'))
+    xref = out.tell()
+    out.write(f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode())
+    for offset in offsets:
+        out.write(f'{offset:010d} 00000 n \n'.encode())
+    out.write(f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+    return out.getvalue()
+
+
+WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'pdf': _write_pdf}
+
+
+# ------------------ Public API ------------------
+def month_report_path(stats, fmt, labels=None):
+    return reports_dir() / f"pl-{stats.year}-{stats.month:02d}-v{stats.version}-{labels or labels_version()}.{fmt}"
+
+
+def year_report_path(year, fmt, labels=None):
+    versions = MonthlyStats.objects.filter(year=year).order_by('month').values_list('month', 'version')
+    digest = hashlib.sha1(repr((list(versions), labels or labels_version())).encode()).hexdigest()[:12]
+    return reports_dir() / f"pl-year-{year}-{digest}.{fmt}"
+
+
+def build_month_report(year, month, fmt='xlsx'):
+    """Keshlangan fayl yo'lini qaytaradi; kerak bo'lsa yaratadi"""
+    stats = MonthlyStats.objects.get(year=year, month=month)
+    labels = labels_version()
+    path = month_report_path(stats, fmt, labels)
+    if not path.exists():
+        _atomic_write(path, WRITERS[fmt](_month_rows(month_data(stats, labels))))
+        _drop_stale(f"pl-{year}-{month:02d}-v*.{fmt}", path)
+    return path
+
+
+def build_year_report(year, fmt='xlsx'):
+    labels = labels_version()
+    path = year_report_path(year, fmt, labels)
+    if not path.exists():
+        stats = MonthlyStats.objects.filter(year=year).order_by('month')
+        datas = [month_data(s, labels) for s in stats]  # faqat o'zgargan oylar qayta hisoblanadi
+        _atomic_write(path, WRITERS[fmt](_year_rows(year, datas)))
+        _drop_stale(f"pl-year-{year}-*.{fmt}", path)
+    return path
+
+
+def _run_in_background(func, *args):
+    try:
+        return func(*args)
+    except Exception:
+        logger.exception("Report generation failed: %s%r", func.__name__, args)
+        raise
+    finally:
+        close_old_connections()
+
+
+def _forget(key, future):
+    with _pending_lock:
+        if _pending.get(key) is future:
+            del _pending[key]
+
+
+def _schedule(func, *args):
+    """Future yoki None (navbat to'la)"""
+    global _executor
+    key = (func.__name__, *args)
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is not None:
+            return future
+        if len(_pending) >= settings.REPORTS_MAX_PENDING:
+            return None
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.REPORTS_WORKERS, thread_name_prefix='reports')
+        future = _pending[key] = _executor.submit(_run_in_background, func, *args)
+    future.add_done_callback(lambda done: _forget(key, done))
+    return future
+
+
+def schedule_month_report(year, month, fmt='xlsx'):
+    return _schedule(build_month_report, year, month, fmt)
+
+
+def schedule_year_report(year, fmt='xlsx'):
+    return _schedule(build_year_report, year, fmt)
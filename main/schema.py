@@ -0,0 +1,112 @@
+# main/schema.py
+# OpenAPI sxemasi deploy vaqtida bir marta generatsiya qilinadi (manage.py generate_schema)
+# va /docs/openapi.json dan tayyor fayl sifatida beriladi: gzip/br oldindan siqilgan, ETag bilan.
+# Swagger UI (SWAGGER_SETTINGS['SPEC_URL']) ham shu faylni o'qiydi, drf_yasg har safar
+# viewlarni introspeksiya qilmaydi. Fayl repoda; main/tests.py uni jonli sxema bilan solishtiradi.
+import gzip
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from rest_framework import permissions
+
+from .middleware import brotli, choose_encoding
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def api_info():
+    return openapi.Info(
+        title="Prime-Tech",
+        default_version='v1',
+        description="e-commerce website",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="contact@snippets.local"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+def schema_view_kwargs():
+    return {'public': True, 'permission_classes': (permissions.AllowAny,)}
+
+
+def schema_path():
+    return Path(settings.OPENAPI_SCHEMA_PATH)
+
+
+def generate_schema():
+    """Jonli introspeksiya: barcha viewlar va swagger_auto_schema dekoratorlari"""
+    generator = OpenAPISchemaGenerator(api_info())
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[], pretty=True).encode(schema)
+
+
+def write_schema(content=None):
+    """Sxemani va uning .gz / .br nusxalarini yozadi (nginx gzip_static uchun ham)"""
+    content = content if content is not None else generate_schema()
+    path = schema_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    path.with_name(path.name + '.gz').write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + '.br').write_bytes(brotli.compress(content, quality=11))
+    return path
+
+
+def _variant(path, suffix, compress):
+    compressed = path.with_name(path.name + suffix)
+    if compressed.exists() and compressed.stat().st_mtime >= path.stat().st_mtime:
+        return compressed.read_bytes()
+    return compress(path.read_bytes())
+
+
+def load_schema():
+    """{encoding: bytes} va ETag; fayl o'zgarmaguncha jarayon xotirasida"""
+    path = schema_path()
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        mtime = None
+    with _lock:
+        if _cache.get('mtime') == mtime and 'variants' in _cache:
+            return _cache['variants'], _cache['etag']
+        if mtime is None:
+            logger.warning("%s is missing, falling back to live schema generation (run generate_schema)", path)
+            content = generate_schema()
+            variants = {'identity': content, 'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        else:
+            content = path.read_bytes()
+            variants = {
+                'identity': content,
+                'gzip': _variant(path, '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+            }
+            if brotli is not None:
+                variants['br'] = _variant(path, '.br', lambda data: brotli.compress(data, quality=11))
+        etag = 'W/"%s"' % hashlib.sha256(content).hexdigest()[:32]
+        _cache.update(mtime=mtime, variants=variants, etag=etag)
+        return variants, etag
+
+
+def serve_schema(request):
+    variants, etag = load_schema()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        available = tuple(name for name in ('br', 'gzip') if name in variants)
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), available) or 'identity'
+        response = HttpResponse(variants[encoding], content_type='application/json')
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=3600)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
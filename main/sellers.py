@@ -0,0 +1,89 @@
+# main/sellers.py
+# SellerMonthlyStats: sotuvchi bo'yicha oylik hisoblagichlar.
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .archive import read_archive
+from .models import Sale, SaleArchive, SellerMonthlyStats
+from .money import money
+
+
+def apply_delta(seller_id, created_at, units, revenue, count):
+    if not seller_id:
+        return
+    local = timezone.localtime(created_at)
+    key = {'seller_id': seller_id, 'year': local.year, 'month': local.month}
+    SellerMonthlyStats.objects.get_or_create(**key)
+    SellerMonthlyStats.objects.filter(**key).update(
+        units=F('units') + units,
+        revenue=F('revenue') + revenue,
+        sale_count=F('sale_count') + count,
+    )
+
+
+def leaderboard(year, month, limit=10):
+    """Oy bo'yicha reyting: (year, month, -revenue) indeksidan bitta so'rov"""
+    return (
+        SellerMonthlyStats.objects.filter(year=year, month=month)
+        .select_related('seller').order_by('-revenue')[:limit]
+    )
+
+
+def seller_totals(sale_model=Sale, archive_model=SaleArchive):
+    """
+    {(seller_id, year, month): [units, revenue, count]}: jonli sotuvlar va arxiv fayllari.
+    Modellar parametr: 0014 migratsiyasi tarixiy modellar bilan boshlang'ich qatorlarni to'ldiradi.
+    """
+    totals = defaultdict(lambda: [0, Decimal(0), 0])
+    live = (
+        sale_model.objects.filter(sold_by_id__isnull=False)
+        .annotate(y=ExtractYear('created_at'), m=ExtractMonth('created_at'))
+        .values('sold_by_id', 'y', 'm')
+        .annotate(units=Sum('quantity'), revenue=Sum('total_price'), count=Count('id'))
+        .order_by()
+    )
+    for row in live:
+        bucket = totals[(row['sold_by_id'], row['y'], row['m'])]
+        bucket[0] += row['units']
+        bucket[1] += row['revenue']
+        bucket[2] += row['count']
+    for archive in archive_model.objects.all():
+        for sale in read_archive(archive):
+            if sale['sold_by_id'] is not None:
+                bucket = totals[(sale['sold_by_id'], archive.year, archive.month)]
+                bucket[0] += sale['quantity']
+                bucket[1] += sale['total_price']
+                bucket[2] += 1
+    return totals
+
+
+def stats_rows(stats_model, totals):
+    return [
+        stats_model(seller_id=seller_id, year=y, month=m, units=units, revenue=money(revenue), sale_count=count)
+        for (seller_id, y, m), (units, revenue, count) in totals.items()
+    ]
+
+
+def rebuild_seller_stats():
+    """
+    Hisoblash va yozish bitta tranzaksiyada: mavjud qatorlar avval qulflanadi, shuning uchun
+    parallel sotuvning apply_delta si qayta qurishdan keyin (yangi qiymat ustiga) qo'llanadi.
+    """
+    with transaction.atomic():
+        list(SellerMonthlyStats.objects.select_for_update().values_list('pk', flat=True))
+        totals = seller_totals()
+        SellerMonthlyStats.objects.bulk_create(
+            stats_rows(SellerMonthlyStats, totals), batch_size=1000, update_conflicts=True, unique_fields=['seller', 'year', 'month'],
+            update_fields=['units', 'revenue', 'sale_count'],
+        )
+        stale = [
+            pk for pk, seller_id, y, m in SellerMonthlyStats.objects.values_list('pk', 'seller_id', 'year', 'month')
+            if (seller_id, y, m) not in totals
+        ]
+        SellerMonthlyStats.objects.filter(pk__in=stale).delete()
+    return len(totals)
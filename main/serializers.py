@@ -18,7 +18,7 @@ class ProductSerializer(serializers.ModelSerializer):
     images = ImagesSerializer(many=True, read_only=True)  # 🔑 related_name="images" orqali
     class Meta:
         model = Product
-        fields = ['id','title', 'description', 'brand','price','discount_percentage','discount_price','image','category','images']
+        fields = ['id','title', 'description', 'brand','price','discount_percentage','discount_price','effective_price','image','category','images']
 
 
 class CartSerializer(serializers.ModelSerializer):
@@ -36,6 +36,7 @@ class AboutImageSerializer(serializers.ModelSerializer):
 
 class AboutSerializer(serializers.ModelSerializer):
     images = AboutImageSerializer(many=True, read_only=True)
+    description = serializers.CharField(source='description_html', read_only=True)  # saqlashda tozalangan HTML
     class Meta:
         model = About
         fields = ['id','title','description','image','images']
@@ -48,6 +49,48 @@ class AnnouncementImageSerializer(serializers.ModelSerializer):
 
 class AnnouncementSerializer(serializers.ModelSerializer):
     images = AnnouncementImageSerializer(many=True, read_only=True)
+    description = serializers.CharField(source='description_html', read_only=True)  # saqlashda tozalangan HTML
     class Meta:
         model = Announcement
-        fields = ['id','title','description','image','images']
\ No newline at end of file
+        fields = ['id','title','description','image','images']
+
+
+class AnnouncementListSerializer(serializers.ModelSerializer):
+    """Ro'yxat uchun: to'liq HTML o'rniga qisqa matn (excerpt)"""
+    images = AnnouncementImageSerializer(many=True, read_only=True)
+    class Meta:
+        model = Announcement
+        fields = ['id','title','excerpt','image','images']
+
+
+class CustomerSaleSerializer(serializers.ModelSerializer):
+    product_title = serializers.CharField(source='product.title', read_only=True, default=None)
+    class Meta:
+        model = Sale
+        fields = ['id','product','product_title','quantity','total_price','created_at','sold_by']
+
+
+class CustomerStatsSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='customer.name', read_only=True)
+    class Meta:
+        model = CustomerStats
+        fields = ['customer','name','lifetime_revenue','order_count','first_sale_at','last_sale_at']
+
+
+class SellerMonthlyStatsSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='seller.username', read_only=True)
+    class Meta:
+        model = SellerMonthlyStats
+        fields = ['seller','username','year','month','units','revenue','sale_count']
+
+
+class RelatedProductSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='related.id', read_only=True)
+    title = serializers.CharField(source='related.title', read_only=True)
+    brand = serializers.CharField(source='related.brand', read_only=True)
+    price = serializers.DecimalField(source='related.price', max_digits=14, decimal_places=2, read_only=True)
+    effective_price = serializers.DecimalField(source='related.effective_price', max_digits=14, decimal_places=2, read_only=True)
+    image = serializers.ImageField(source='related.image', read_only=True)
+    class Meta:
+        model = RelatedProduct
+        fields = ['id','title','brand','price','effective_price','image','score']
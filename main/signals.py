@@ -1,42 +1,60 @@
 # main/signals.py
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.db.models import Sum
 from django.dispatch import receiver
-from .models import Sale, Purchase, Expense, Salary, MonthlyStats
+from .models import Sale, SaleArchive, Purchase, Expense, Salary, MonthlyStats, Product, Category, PriceSchedule, FACET_FIELDS
+from . import facets
+from .pricing import refresh_active_schedules
+from .money import money
+from .suppression import is_suppressed
+from .customers import add_sale as add_customer_sale, change_revenue as change_customer_revenue, remove_sale as remove_customer_sale
+from .sellers import apply_delta as apply_seller_delta
 
 
-def update_monthly_stats(year, month):
-    """Oylik statistikani yangilash"""
-    total_sales = Sale.objects.filter(
+def compute_month_totals(year, month):
+    """Bitta oy yig'indilari manba jadvallaridan (rebuild_stats tekshiruvi ham shundan foydalanadi)"""
+    total_sales = money(Sale.objects.filter(
         created_at__year=year, created_at__month=month
-    ).aggregate(total=Sum('total_price'))['total'] or 0
+    ).aggregate(total=Sum('total_price'))['total'] or 0)
+    # arxivga ko'chirilgan sotuvlar ham oy yig'indisida qoladi
+    total_sales += SaleArchive.objects.filter(
+        year=year, month=month
+    ).values_list('total_price', flat=True).first() or 0
 
-    total_purchases = Purchase.objects.filter(
+    total_purchases = money(Purchase.objects.filter(
         purchase_date__year=year, purchase_date__month=month
-    ).aggregate(total=Sum('total_cost'))['total'] or 0
+    ).aggregate(total=Sum('total_cost'))['total'] or 0)
 
-    total_salaries = Salary.objects.filter(
+    total_salaries = money(Salary.objects.filter(
         for_month__year=year, for_month__month=month
-    ).aggregate(total=Sum('salary_price'))['total'] or 0
+    ).aggregate(total=Sum('salary_price'))['total'] or 0)
 
-    total_expenses = Expense.objects.filter(
+    total_expenses = money(Expense.objects.filter(
         created_at__year=year, created_at__month=month
-    ).aggregate(total=Sum('price'))['total'] or 0
+    ).aggregate(total=Sum('price'))['total'] or 0)
+
+    return {
+        'total_sales': total_sales,
+        'total_purchases': total_purchases,
+        'total_salaries': total_salaries,
+        'expenses': total_expenses,
+        'net_profit': total_sales - (total_purchases + total_salaries + total_expenses),
+    }
 
-    net_profit = total_sales - (total_purchases + total_salaries + total_expenses)
 
+def update_monthly_stats(year, month):
+    """Oylik statistikani yangilash"""
     stats, created = MonthlyStats.objects.get_or_create(year=year, month=month)
-    stats.total_sales = total_sales
-    stats.total_purchases = total_purchases
-    stats.total_salaries = total_salaries
-    stats.expenses = total_expenses  # ✅ yangi qo‘shildi
-    stats.net_profit = net_profit
+    for field, value in compute_month_totals(year, month).items():
+        setattr(stats, field, value)
     stats.save()
 
 
 # -------- SALE --------
 @receiver([post_save, post_delete], sender=Sale)
 def update_stats_on_sale(sender, instance, **kwargs):
+    if is_suppressed():
+        return
     update_monthly_stats(instance.created_at.year, instance.created_at.month)
 
 
@@ -56,3 +74,100 @@ def update_stats_on_expense(sender, instance, **kwargs):
 @receiver([post_save, post_delete], sender=Salary)
 def update_stats_on_salary(sender, instance, **kwargs):
     update_monthly_stats(instance.for_month.year, instance.for_month.month)
+
+
+# -------- CUSTOMER / SELLER STATS --------
+@receiver(post_save, sender=Sale)
+def update_sale_aggregates_on_save(sender, instance, created, **kwargs):
+    if is_suppressed():
+        return
+    loaded = getattr(instance, '_loaded', {})
+    if created:
+        _apply_customer(instance, created, loaded)
+        apply_seller_delta(instance.sold_by_id, instance.created_at, instance.quantity, instance.total_price, 1)
+    elif loaded:
+        _apply_customer(instance, created, loaded)
+        old_seller = loaded['sold_by_id']
+        if old_seller != instance.sold_by_id:
+            apply_seller_delta(old_seller, instance.created_at, -loaded['quantity'], -loaded['total_price'], -1)
+            apply_seller_delta(instance.sold_by_id, instance.created_at, instance.quantity, instance.total_price, 1)
+        elif loaded['quantity'] != instance.quantity or loaded['total_price'] != instance.total_price:
+            apply_seller_delta(
+                instance.sold_by_id, instance.created_at,
+                instance.quantity - loaded['quantity'], instance.total_price - loaded['total_price'], 0,
+            )
+    # DBdan yuklanmagan obyekt uchun avvalgi qiymat noma'lum: hisoblagichlar o'zgarmaydi
+    instance._loaded = {
+        'customer_id': instance.customer_id, 'sold_by_id': instance.sold_by_id,
+        'quantity': instance.quantity, 'total_price': instance.total_price,
+    }
+
+
+def _apply_customer(instance, created, loaded):
+    if created:
+        if instance.customer_id:
+            add_customer_sale(instance.customer_id, instance.total_price, instance.created_at)
+        return
+    old_customer_id, old_total = loaded['customer_id'], loaded['total_price']
+    if old_customer_id != instance.customer_id:
+        if old_customer_id:
+            remove_customer_sale(old_customer_id, old_total, instance.created_at)
+        if instance.customer_id:
+            add_customer_sale(instance.customer_id, instance.total_price, instance.created_at)
+    elif instance.customer_id and old_total != instance.total_price:
+        change_customer_revenue(instance.customer_id, instance.total_price - old_total)
+
+
+@receiver(post_delete, sender=Sale)
+def update_sale_aggregates_on_delete(sender, instance, **kwargs):
+    if is_suppressed():
+        return
+    if instance.customer_id:
+        remove_customer_sale(instance.customer_id, instance.total_price, instance.created_at)
+    apply_seller_delta(instance.sold_by_id, instance.created_at, -instance.quantity, -instance.total_price, -1)
+
+
+
+# -------- PRODUCT FACETS --------
+@receiver(post_save, sender=Product)
+def update_facets_on_product_save(sender, instance, created, **kwargs):
+    current = tuple(getattr(instance, name) for name in FACET_FIELDS)
+    # faqat amount/description o'zgarsa (masalan, har sotuvda) indeks qayta qurilmaydi
+    if created or current != getattr(instance, '_loaded_facets', None):
+        facets.invalidate()
+    instance._loaded_facets = current
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def update_facets_on_delete(sender, instance, **kwargs):
+    # Category o'chirilganda mahsulotlar SET_NULL bilan signalsiz yangilanadi
+    facets.invalidate()
+
+
+# -------- PRICE SCHEDULES --------
+@receiver(post_save, sender=PriceSchedule)
+def reprice_on_active_schedule_save(sender, instance, update_fields=None, **kwargs):
+    # start/finish_schedule faqat state ni yozadi va narxlarni o'zi qo'llaydi
+    if instance.state == PriceSchedule.State.ACTIVE and set(update_fields or ()) != {'state'}:
+        refresh_active_schedules()
+
+
+@receiver(post_delete, sender=PriceSchedule)
+def reprice_on_active_schedule_delete(sender, instance, **kwargs):
+    if instance.state == PriceSchedule.State.ACTIVE:
+        refresh_active_schedules()
+
+
+@receiver(m2m_changed, sender=PriceSchedule.products.through)
+def reprice_on_schedule_products_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # product.price_schedules.add(...): pk_set — jadvallar (clear da None)
+        schedules = PriceSchedule.objects.filter(state=PriceSchedule.State.ACTIVE)
+        active = schedules.filter(pk__in=pk_set).exists() if pk_set is not None else True
+    else:
+        active = instance.state == PriceSchedule.State.ACTIVE
+    if active:
+        refresh_active_schedules()
@@ -0,0 +1,108 @@
+# main/stats.py
+# Ko'p oylik MonthlyStats hisoblash: har bir manba jadval uchun bitta GROUP BY (year, month) so'rovi.
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import Expense, MonthlyStats, Purchase, Salary, Sale, SaleArchive
+from .money import money
+
+STATS_FIELDS = ['total_sales', 'total_purchases', 'total_salaries', 'expenses', 'net_profit']
+
+
+def month_key(year, month):
+    return year * 12 + (month - 1)
+
+
+def key_to_month(key):
+    return key // 12, key % 12 + 1
+
+
+def _grouped(queryset, date_field, amount_field, start, end):
+    """{(year, month): summa} — bitta GROUP BY so'rovi"""
+    rows = (
+        queryset
+        .annotate(y=ExtractYear(date_field), m=ExtractMonth(date_field))
+        .filter(**{f'{date_field}__year__gte': start[0], f'{date_field}__year__lte': end[0]})
+        .values('y', 'm')
+        .annotate(total=Sum(amount_field))
+        .order_by()
+        .values_list('y', 'm', 'total')
+    )
+    lo, hi = month_key(*start), month_key(*end)
+    return {(y, m): total or 0 for y, m, total in rows if lo <= month_key(y, m) <= hi}
+
+
+def monthly_totals(start, end):
+    """
+    ``start``..``end`` (ikkalasi ham (year, month), kiritilgan) oralig'idagi barcha oylar uchun
+    {(year, month): {field: Decimal}} qaytaradi. Har bir manbaga bitta so'rov.
+    """
+    sales = _grouped(Sale.objects.all(), 'created_at', 'total_price', start, end)
+    purchases = _grouped(Purchase.objects.all(), 'purchase_date', 'total_cost', start, end)
+    expenses = _grouped(Expense.objects.all(), 'created_at', 'price', start, end)
+
+    lo, hi = month_key(*start), month_key(*end)
+    salaries = {
+        (y, m): total or 0
+        for y, m, total in Salary.objects
+        .filter(for_month__year__gte=start[0], for_month__year__lte=end[0])
+        .values('for_month__year', 'for_month__month')
+        .annotate(total=Sum('salary_price'))
+        .order_by()
+        .values_list('for_month__year', 'for_month__month', 'total')
+        if lo <= month_key(y, m) <= hi
+    }
+    for y, m, total in SaleArchive.objects.values_list('year', 'month', 'total_price'):
+        if lo <= month_key(y, m) <= hi:
+            sales[(y, m)] = sales.get((y, m), 0) + total
+
+    result = {}
+    for key in set(sales) | set(purchases) | set(expenses) | set(salaries):
+        row = {
+            'total_sales': money(sales.get(key, 0)),
+            'total_purchases': money(purchases.get(key, 0)),
+            'total_salaries': money(salaries.get(key, 0)),
+            'expenses': money(expenses.get(key, 0)),
+        }
+        row['net_profit'] = row['total_sales'] - (row['total_purchases'] + row['total_salaries'] + row['expenses'])
+        result[key] = row
+    return result
+
+
+def compute_range(bounds):
+    """ProcessPool worker: (start, end) -> monthly_totals"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:  # spawn start method
+        django.setup()
+    return monthly_totals(*bounds)
+
+
+def split_range(start, end, parts):
+    lo, hi = month_key(*start), month_key(*end)
+    size = max(1, -(-(hi - lo + 1) // parts))
+    return [
+        (key_to_month(k), key_to_month(min(k + size - 1, hi)))
+        for k in range(lo, hi + 1, size)
+    ]
+
+
+def upsert_monthly_stats(totals, start, end):
+    """Hisoblangan oylarni bulk upsert qiladi; ma'lumoti yo'q mavjud oylar nolga tushiriladi"""
+    lo, hi = month_key(*start), month_key(*end)
+    zero = {field: 0 for field in STATS_FIELDS}
+    existing = {
+        (y, m): version for y, m, version in MonthlyStats.objects
+        .filter(year__gte=start[0], year__lte=end[0]).values_list('year', 'month', 'version')
+        if lo <= month_key(y, m) <= hi
+    }
+    rows = [
+        MonthlyStats(year=y, month=m, version=existing.get((y, m), 0) + 1, **totals.get((y, m), zero))
+        for y, m in sorted(set(totals) | set(existing))
+    ]
+    MonthlyStats.objects.bulk_create(
+        rows, batch_size=500,
+        update_conflicts=True, unique_fields=['year', 'month'], update_fields=STATS_FIELDS + ['version'],
+    )
+    return rows
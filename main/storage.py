@@ -0,0 +1,121 @@
+# main/storage.py
+import abc
+import hashlib
+import io
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# photo.3f2a9c1b7d4e.jpg (eski nomlar) yoki content/ab/<sha256>.jpg (kontent-adresli)
+HASHED_NAME_RE = re.compile(r'(\.[0-9a-f]{12}|/[0-9a-f]{64})\.[^./]+$')
+# faqat shu storage yozgan nom: <MEDIA_CONTENT_DIR>/ab/ab...(64 hex).ext
+CONTENT_NAME_RE = re.compile(r'^(?P<dir>.+)/(?P<prefix>[0-9a-f]{2})/(?P<digest>[0-9a-f]{64})\.[^./]+$')
+
+# qayta kodlash parametrlari (EXIF berilmaydi -> metadata tushib qoladi)
+SAVE_PARAMS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85, 'method': 6},
+}
+
+
+def file_digest(content, chunk_size=64 * 1024):
+    """Faylni bir marta oqim bilan o'qib sha256 hisoblash"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks(chunk_size):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_name(name):
+    match = CONTENT_NAME_RE.match(name)
+    return bool(
+        match and match['dir'] == getattr(settings, 'MEDIA_CONTENT_DIR', 'content')
+        and match['digest'].startswith(match['prefix'])
+    )
+
+
+def normalize_image(content, max_dimension):
+    """
+    EXIF (GPS, kamera) ni olib tashlaydi va max_dimension dan katta rasmni kichraytiradi.
+    Tozalash kerak bo'lmasa yoki rasm emas/animatsiya bo'lsa, kontent o'zgarmasdan qaytadi.
+    """
+    try:
+        image = Image.open(content)
+        image_format = image.format
+        has_exif = bool(image.getexif()) or 'exif' in image.info
+    except (UnidentifiedImageError, OSError):
+        content.seek(0)
+        return content
+
+    oversized = max(image.size) > max_dimension
+    if image_format not in SAVE_PARAMS or getattr(image, 'is_animated', False) or not (has_exif or oversized):
+        content.seek(0)
+        return content
+
+    # orientatsiya EXIF bilan birga yo'qolmasligi uchun avval piksellarga qo'llanadi
+    image = ImageOps.exif_transpose(image)
+    if oversized:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L', 'CMYK'):
+        image = image.convert('RGB')
+
+    params = dict(SAVE_PARAMS[image_format])
+    if image.info.get('icc_profile'):
+        params['icc_profile'] = image.info['icc_profile']
+    output = io.BytesIO()
+    image.save(output, image_format, **params)
+    return ContentFile(output.getvalue(), name=content.name)
+
+
+class ContentAddressedMixin(metaclass=abc.ABCMeta):
+    """
+    Kontent-adresli media: fayl bir marta oqim bilan o'qilib sha256 hisoblanadi va
+    ``content/ab/<sha256>.jpg`` nomi bilan saqlanadi. Bir xil fayl qayta yuklansa
+    mavjud nom qaytadi (disk va qayta ishlash yo'q). Rasmlar saqlashdan oldin
+    normalize_image dan o'tadi. Nom kontent bilan birga o'zgaradi, shuning uchun
+    media uzoq muddat (immutable) keshlanadi.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        # mijoz yuborgan nomga ishonilmaydi: faqat shu storage yozgan, mavjud fayl qayta ishlanmaydi
+        if is_content_name(name) and self.exists(name) and self.touch(name):
+            return name
+
+        # hash asl yuklangan fayldan: dublikat qayta ishlanmasdan aniqlanadi
+        digest = file_digest(content)
+        ext = os.path.splitext(name)[1].lower()
+        content_dir = getattr(settings, 'MEDIA_CONTENT_DIR', 'content')
+        name = f"{content_dir}/{digest[:2]}/{digest}{ext}"
+        if self.exists(name) and self.touch(name):
+            return name
+        content = normalize_image(content, getattr(settings, 'IMAGE_MAX_DIMENSION', 2048))
+        return super().save(name, content, max_length=max_length)
+
+    @abc.abstractmethod
+    def touch(self, name):
+        """
+        gc_media grace davri: qayta ishlatilgan fayl yangi yuklangan deb hisoblanadi.
+        Fayl yo'qolgan bo'lsa False (kontent qayta yoziladi).
+        """
+
+
+class HashedMediaStorage(ContentAddressedMixin, FileSystemStorage):
+    def touch(self, name):
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        except OSError:
+            pass
+        return True
@@ -0,0 +1,19 @@
+# main/suppression.py
+import threading
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+@contextmanager
+def stats_updates_suppressed():
+    """Arxivlash kabi ommaviy ko'chirishlarda MonthlyStats va yig'ma hisoblagichlar qayta hisoblanmasin"""
+    _state.suppressed = getattr(_state, 'suppressed', 0) + 1
+    try:
+        yield
+    finally:
+        _state.suppressed -= 1
+
+
+def is_suppressed():
+    return getattr(_state, 'suppressed', 0) > 0
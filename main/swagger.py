@@ -0,0 +1,27 @@
+# main/swagger.py
+# Viewlardagi drf_yasg dekoratorlari: drf_yasg o'rnatilgan profilda (full) haqiqiy
+# swagger_auto_schema / openapi, boshqalarida (api) drf_yasg umuman import qilinmaydi —
+# dekorator viewni o'zgarishsiz qaytaradi, openapi.Parameter(...) va h.k. hech narsa qilmaydi.
+from django.apps import apps
+
+__all__ = ['openapi', 'swagger_auto_schema']
+
+
+class _NoOpenAPI:
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+def _no_schema(*args, **kwargs):
+    return lambda view: view
+
+
+if apps.is_installed('drf_yasg'):
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    openapi = _NoOpenAPI()
+    swagger_auto_schema = _no_schema
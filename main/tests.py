@@ -1,3 +1,1069 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.admin import site as admin_site
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.base import BaseHandler
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, router, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.conf import settings
+from asgiref.sync import SyncToAsync, async_to_sync, iscoroutinefunction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from main import (
+    archive, async_views, columnar, customers, facets, importer, media_gc, metrics, pricing, recommendations, reports,
+    sellers,
+)
+from main.admin import _pl_year_report_action
+from main.content import render_content
+from main.db_router import STICKY_COOKIE, ReplicaRoutingMiddleware, RoutingState, _client_key, _state
+from main.middleware import CompressionMiddleware, choose_encoding
+from main.management.commands import rebuild_stats
+from main.models import (
+    About, Category, Customer, CustomerStats, Images, LowStockAlert, MonthlyStats, PriceSchedule, Product, Purchase,
+    Sale, SaleArchive, RelatedProduct, SellerMonthlyStats, StockMovement,
+)
+from main.money import money, to_cents
+from main.object_storage import LocalObjectStore, ObjectStorage
+from main.schema import generate_schema, schema_path
+from main.storage import ContentAddressedMixin, HashedMediaStorage, is_content_name
+from users.models import User
+
+
+class OpenAPISchemaTests(TestCase):
+    def test_saved_schema_matches_live_introspection(self):
+        saved = json.loads(schema_path().read_bytes())
+        live = json.loads(generate_schema())
+        self.assertEqual(saved, live, "main/openapi.json is out of date, run manage.py generate_schema")
+
+    def test_schema_is_served_compressed_with_etag(self):
+        url = reverse('openapi-schema')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), json.loads(schema_path().read_bytes()))
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_api_profile_does_not_import_drf_yasg(self):
+        code = (
+            "import sys, django; django.setup(); from django.urls import get_resolver; "
+            "get_resolver().url_patterns; print('main.views' in sys.modules, 'drf_yasg' in sys.modules)"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'core.settings', 'DJANGO_SETTINGS_PROFILE': 'api'}
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ['True', 'False'])
+
+
+class CompressionNegotiationTests(TestCase):
+    def test_q_zero_refuses_encoding(self):
+        self.assertIsNone(choose_encoding('gzip;q=0', ('br', 'gzip')))
+        self.assertEqual(choose_encoding('br;q=0, gzip', ('br', 'gzip')), 'gzip')
+        self.assertEqual(choose_encoding('*;q=0.5, br;q=0', ('br', 'gzip')), 'gzip')
+        self.assertIsNone(choose_encoding('*, gzip;q=0', ('gzip',)))
+
+    def test_highest_q_wins_and_ties_prefer_brotli(self):
+        self.assertEqual(choose_encoding('br;q=0.2, gzip;q=0.8', ('br', 'gzip')), 'gzip')
+        self.assertEqual(choose_encoding('gzip, br', ('br', 'gzip')), 'br')
+        self.assertEqual(choose_encoding('GZIP ; Q=0.5', ('gzip',)), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=abc', ('gzip',)))
+
+    def test_middleware_stays_async_for_async_handlers(self):
+        async def get_response(request):
+            return HttpResponse(b'x' * 4096)
+
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = async_to_sync(middleware)(request)
+        self.assertEqual(gzip.decompress(response.content), b'x' * 4096)
+        self.assertFalse(iscoroutinefunction(CompressionMiddleware(lambda request: HttpResponse())))
+
+    @override_settings(ROOT_URLCONF='main.async_urls')
+    def test_async_view_is_compressed_through_middleware_stack(self):
+        for number in range(20):
+            Product.objects.create(title=f"Phone {number}", brand="Apple", price=100)
+        response = async_to_sync(self.async_client.get)(reverse('api-product-list'), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 20)
+
+    def test_middleware_respects_gzip_q_zero(self):
+        response = self.client.get(reverse('openapi-schema'), HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content), json.loads(schema_path().read_bytes()))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Ikkita SQLite bazasi: replikatsiya yo'q, shuning uchun qaysi alias o'qilgani ko'rinadi.
+    Replika aliasi test runner tekshiruvlaridan keyin qo'shiladi (settings da faqat env orqali).
+    TestCase emas: uning tranzaksiyasi ichida router hamma o'qishni primaryga yuboradi.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        default = connections.settings[DEFAULT_DB_ALIAS]
+        name = os.path.join(cls.replica_dir, 'replica.sqlite3')
+        connections.settings['replica'] = {**default, 'NAME': name, 'TEST': {**default['TEST'], 'NAME': name}}
+        call_command('migrate', database='replica', verbosity=0)
+        cls.databases = {DEFAULT_DB_ALIAS, 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        Product.objects.create(title="Phone", brand="Apple", price=100)
+
+    def test_public_catalogue_reads_go_to_replica(self):
+        response = self.client.get(reverse('api-product-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.client.post(reverse('register'), {'username': 'buyer', 'password': 'S3cure-pass-123'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        response = self.client.get(reverse('api-product-list'))
+        self.assertEqual([product['title'] for product in response.json()], ["Phone"])
+
+    @override_settings(ROOT_URLCONF='main.async_urls')
+    def test_async_reads_after_write_stay_on_primary(self):
+        url = reverse('api-product-list')
+        self.assertEqual(async_to_sync(self.async_client.get)(url).json(), [])
+
+        with override_settings(ROOT_URLCONF='core.urls'):
+            response = self.client.post(reverse('register'), {'username': 'buyer', 'password': 'S3cure-pass-123'})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.async_client.cookies = self.client.cookies
+        self.assertEqual([product['title'] for product in async_to_sync(self.async_client.get)(url).json()], ["Phone"])
+
+        # cookie saqlamaydigan JWT mijoz: kesh kaliti bo'yicha
+        self.async_client.cookies.clear()
+        cache.set(_client_key(SimpleNamespace(META={'HTTP_AUTHORIZATION': 'Bearer x'})), 1, 5)
+        response = async_to_sync(self.async_client.get)(url, headers={'Authorization': 'Bearer x'})
+        self.assertEqual([product['title'] for product in response.json()], ["Phone"])
+
+    @override_settings(DEBUG=True)
+    def test_async_middleware_chain_has_no_thread_hops(self):
+        handler = BaseHandler()
+        # sync-only middleware bo'lsa Django zanjirni sync_to_async bilan o'raydi va shuni loglaydi
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            handler.load_middleware(is_async=True)
+        wrapped = [
+            hook.func.__self__ for hook in handler._view_middleware
+            if isinstance(hook, SyncToAsync) and hasattr(hook.func, '__self__')
+        ]
+        self.assertFalse([middleware for middleware in wrapped if isinstance(middleware, ReplicaRoutingMiddleware)])
+
+    def test_writes_and_transactions_use_primary(self):
+        state = RoutingState()
+        state.replica = 'replica'
+        token = _state.set(state)
+        try:
+            self.assertEqual(router.db_for_read(Product), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Product), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_write(Product), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(Product), DEFAULT_DB_ALIAS)
+        finally:
+            _state.reset(token)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(Product), DEFAULT_DB_ALIAS)
+
+
+def _jpeg(size=(64, 48), exif=True):
+    image = Image.new('RGB', size, 'red')
+    output = io.BytesIO()
+    if exif:
+        data = Image.Exif()
+        data[0x010f] = 'Canon'
+        image.save(output, 'JPEG', exif=data)
+    else:
+        image.save(output, 'JPEG')
+    return output.getvalue()
+
+
+class HashedMediaStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = HashedMediaStorage(location=self.root)
+
+    def test_identical_uploads_share_one_file(self):
+        data = _jpeg()
+        first = self.storage.save('products/a.jpg', SimpleUploadedFile('a.jpg', data))
+        second = self.storage.save('about_images/b.JPG', SimpleUploadedFile('b.JPG', data))
+        self.assertEqual(first, second)
+        self.assertTrue(is_content_name(first))
+
+    @override_settings(IMAGE_MAX_DIMENSION=32)
+    def test_crafted_hashed_name_is_still_processed(self):
+        for name in ('products/photo.0123456789ab.jpg', 'content/00/' + '0' * 64 + '.jpg'):
+            stored = self.storage.save(name, SimpleUploadedFile(os.path.basename(name), _jpeg()))
+            self.assertNotEqual(stored, name)
+            self.assertTrue(is_content_name(stored))
+            with Image.open(self.storage.path(stored)) as image:
+                self.assertEqual(dict(image.getexif()), {})
+                self.assertLessEqual(max(image.size), 32)
+
+    def test_storage_without_touch_cannot_be_instantiated(self):
+        class NoTouchStorage(ContentAddressedMixin, FileSystemStorage):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoTouchStorage(location=self.root)
+
+
+class ProductImportTests(TestCase):
+    header = "sku,title,brand,price,amount\n"
+
+    def run_import(self, body, **kwargs):
+        rows = importer.read_csv(io.StringIO(self.header + body))
+        return list(importer.import_products(rows, **kwargs))
+
+    def errors(self, events):
+        return {event['line']: event['message'] for event in events if event['event'] == 'error'}
+
+    def test_non_finite_numbers_are_row_errors(self):
+        events = self.run_import("A,Phone,Apple,nan,1\nB,Phone,Apple,inf,1\nC,Phone,Apple,-inf,1\nD,Laptop,Dell,10,2\n")
+        self.assertEqual(set(self.errors(events)), {2, 3, 4})
+        self.assertEqual(events[-1], {'event': 'done', 'processed': 4, 'created': 1, 'updated': 0, 'errors': 3})
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['D'])
+
+    def test_blank_amount_keeps_existing_stock(self):
+        self.run_import("A,Phone,Apple,10,7\n")
+        events = self.run_import("A,Phone 2,Apple,12,\nB,New,Apple,5,\n")
+        self.assertEqual(events[-1]['errors'], 0)
+        phone = Product.objects.get(sku='A')
+        self.assertEqual((phone.title, phone.amount), ("Phone 2", 7))
+        self.assertEqual(Product.objects.get(sku='B').amount, 0)
+
+    def test_sale_during_import_is_not_lost(self):
+        self.run_import("A,Phone,Apple,10,7\n")
+        phone = Product.objects.get(sku='A')
+        discount_prices = importer.discount_prices
+
+        def sell_then_price(*args):
+            # snapshot o'qilgandan keyin, mahsulot yozilishidan oldin parallel sotuv
+            phone.adjust_stock(-2, StockMovement.Kind.SALE)
+            return discount_prices(*args)
+
+        with mock.patch.object(importer, 'discount_prices', side_effect=sell_then_price):
+            self.run_import("A,Phone,Apple,10,10\n")
+        phone.refresh_from_db()
+        self.assertEqual(phone.amount, 8)
+        movements = list(StockMovement.objects.filter(product=phone).order_by('pk').values_list('quantity', 'balance'))
+        self.assertEqual(movements, [(7, 7), (-2, 5), (3, 8)])
+
+    def test_xlsx_rows_are_read_with_shared_strings(self):
+        ns = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('xl/sharedStrings.xml', (
+                f'<sst xmlns="{ns}"><si><t>sku</t></si><si><t>title</t></si><si><t>Phone</t></si></sst>'
+            ))
+            archive.writestr('xl/worksheets/sheet1.xml', (
+                f'<worksheet xmlns="{ns}"><sheetData>'
+                '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>'
+                '<row r="2"><c r="A2"><v>17</v></c><c r="B2" t="s"><v>2</v></c></row>'
+                '<row r="3"><c r="A3" t="inlineStr"><is><t>B</t></is></c></row>'
+                '</sheetData></worksheet>'
+            ))
+        buffer.seek(0)
+        self.assertEqual(list(importer.read_xlsx(buffer)), [
+            {'sku': '17', 'title': 'Phone'}, {'sku': 'B', 'title': ''},
+        ])
+
+    def test_database_errors_are_reported_per_row(self):
+        upsert = importer._upsert
+
+        def failing(rows, columns, now):
+            if any(row['sku'] == 'BAD' for row in rows):
+                raise IntegrityError("constraint failed")
+            return upsert(rows, columns, now)
+
+        with mock.patch.object(importer, '_upsert', side_effect=failing):
+            events = self.run_import("A,Phone,Apple,10,1\nBAD,Phone,Apple,10,1\nC,Phone,Apple,10,1\n")
+        self.assertEqual(list(self.errors(events)), [3])
+        self.assertEqual(events[-1]['created'], 2)
+        self.assertEqual(set(Product.objects.values_list('sku', flat=True)), {'A', 'C'})
+
+
+class MetricsRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics._known.clear()
+
+    def test_concurrent_registrations_are_not_lost(self):
+        start = threading.Barrier(8)
+
+        def worker(n):
+            start.wait()
+            metrics.incr('test_events_total', kind=f"k{n}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        kinds = {dict(labels)['kind'] for name, labels, value in metrics.snapshot() if name == 'test_events_total'}
+        self.assertEqual(kinds, {f"k{n}" for n in range(8)})
+
+
+class PriceScheduleTests(TestCase):
+    def setUp(self):
+        self.phone = Product.objects.create(title="Phone", brand="Apple", price=100, discount_percentage=30)
+        self.laptop = Product.objects.create(title="Laptop", brand="Dell", price=200)
+        now = timezone.now()
+        self.schedule = PriceSchedule.objects.create(
+            title="Sale", discount_percentage=10,
+            starts_at=now - timezone.timedelta(hours=1), ends_at=now + timezone.timedelta(hours=1),
+        )
+        self.schedule.products.set([self.phone, self.laptop])
+        pricing.apply_due_schedules()
+        self.schedule.refresh_from_db()
+
+    def prices(self):
+        return dict(Product.objects.values_list('title', 'effective_price'))
+
+    def test_campaign_never_raises_own_discount(self):
+        self.assertEqual(self.prices(), {"Phone": 70, "Laptop": 180})
+        self.phone.refresh_from_db()
+        self.phone.price = 110
+        self.phone.save()
+        self.assertEqual(self.phone.effective_price, 77)
+
+    def test_editing_active_schedule_reprices(self):
+        self.schedule.discount_percentage = 50
+        self.schedule.save()
+        self.assertEqual(self.prices(), {"Phone": 50, "Laptop": 100})
+
+        self.schedule.products.remove(self.laptop)
+        self.assertEqual(self.prices(), {"Phone": 50, "Laptop": 200})
+
+        self.schedule.delete()
+        self.assertEqual(self.prices(), {"Phone": 70, "Laptop": 200})
+
+
+class DataMigrationTests(TransactionTestCase):
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_legacy_float_rows_are_quantized(self):
+        apps = self.migrate([('main', '0009_rendered_description')])
+        Product = apps.get_model('main', 'Product')
+        Product.objects.create(title="Phone", brand="Apple", price=0.1 + 0.2, discount_price=10.006, discount_percentage=12.346)
+
+        self.migrate([('main', '0010_money_decimal')])
+        # ORM o'qishda o'zi yaxlitlaydi, shuning uchun ustundagi xom qiymat tekshiriladi
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT price, discount_price, discount_percentage FROM main_product")
+            self.assertEqual(cursor.fetchone(), (0.3, 10.01, 12.35))
+
+    def test_existing_stock_gets_an_opening_movement(self):
+        apps = self.migrate([('main', '0006_announcementimage')])
+        Product = apps.get_model('main', 'Product')
+        phone = Product.objects.create(title="Phone", brand="Apple", price=100, amount=7)
+        Product.objects.create(title="Empty", brand="Apple", price=100, amount=0)
+
+        apps = self.migrate([('main', '0007_stock_ledger')])
+        movements = apps.get_model('main', 'StockMovement').objects.values_list('product_id', 'kind', 'quantity', 'balance')
+        self.assertEqual(list(movements), [(phone.pk, 'ADJUSTMENT', 7, 7)])
+
+    def test_customer_stats_are_backfilled_from_existing_sales(self):
+        apps = self.migrate([('main', '0012_monthlystats_version')])
+        admin = apps.get_model('users', 'User').objects.create(username="admin")
+        customer = apps.get_model('main', 'Customer').objects.create(name="Ali", created_by=admin)
+        product = apps.get_model('main', 'Product').objects.create(title="Phone", brand="Apple", price=100)
+        Sale = apps.get_model('main', 'Sale')
+        sales = [Sale.objects.create(customer=customer, product=product, quantity=1, total_price=price) for price in (100, 250)]
+        Sale.objects.filter(pk=sales[0].pk).update(created_at=timezone.now() - timezone.timedelta(days=800))
+        Sale.objects.create(product=product, quantity=1, total_price=5)
+
+        apps = self.migrate([('main', '0013_customer_stats')])
+        first = Sale.objects.get(pk=sales[0].pk).created_at
+        stats = apps.get_model('main', 'CustomerStats').objects.values_list(
+            'customer_id', 'lifetime_revenue', 'order_count', 'first_sale_at', 'last_sale_at',
+        )
+        self.assertEqual(list(stats), [(customer.pk, Decimal('350.00'), 2, first, sales[1].created_at)])
+
+    def test_seller_stats_are_backfilled_from_existing_sales(self):
+        apps = self.migrate([('main', '0013_customer_stats')])
+        seller = apps.get_model('users', 'User').objects.create(username="seller")
+        product = apps.get_model('main', 'Product').objects.create(title="Phone", brand="Apple", price=100)
+        Sale = apps.get_model('main', 'Sale')
+        for quantity in (1, 2):
+            Sale.objects.create(product=product, quantity=quantity, total_price=100 * quantity, sold_by=seller)
+        Sale.objects.create(product=product, quantity=5, total_price=500)
+
+        apps = self.migrate([('main', '0014_seller_monthly_stats')])
+        now = timezone.localtime()
+        stats = apps.get_model('main', 'SellerMonthlyStats').objects.values_list(
+            'seller_id', 'year', 'month', 'units', 'revenue', 'sale_count',
+        )
+        self.assertEqual(list(stats), [(seller.pk, now.year, now.month, 3, Decimal('300.00'), 2)])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(title="Phone", brand="Apple", price=100)
+
+    def test_image_changes_invalidate_product_etags(self):
+        for url in (reverse('api-product-list'), reverse('api-product-detail', args=[self.product.pk])):
+            with self.subTest(url):
+                etags = [self.client.get(url)['ETag']]
+                image = Images.objects.create(product=self.product, image='products_images/a.jpg')
+                etags.append(self.client.get(url)['ETag'])
+                image.image = 'products_images/b.jpg'
+                image.save()
+                etags.append(self.client.get(url)['ETag'])
+                image.delete()
+                etags.append(self.client.get(url)['ETag'])
+                # o'chirilgandan keyin javob boshlang'ich holat bilan bir xil
+                self.assertEqual(len(set(etags[:3])), 3)
+                self.assertEqual(etags[3], etags[0])
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[-1]).status_code, 304)
+
+
+    def test_signed_media_urls_expire_with_validators(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.enterContext(override_settings(
+            STORAGES={**settings.STORAGES, 'default': {'BACKEND': 'main.object_storage.ObjectStorage'}},
+            MEDIA_OBJECT_STORAGE={'LOCAL_ROOT': root, 'PUBLIC_URL': '', 'SIGNED_URL_EXPIRE': 30},
+        ))
+        Images.objects.create(product=self.product, image='content/aa/a.jpg')
+        url = reverse('api-product-detail', args=[self.product.pk])
+        clock = self.enterContext(mock.patch('main.object_storage.time'))
+
+        start = (int(time.time()) // 30 + 1) * 30
+        clock.time.return_value = start
+        response = self.client.get(url)
+        self.assertIn(f'expires={start + 60}', response.json()['images'][0]['image'])
+        self.assertIn('max-age=30', response['Cache-Control'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # keyingi oynada eski javob (URL lari muddati yaqin) 304 bilan tasdiqlanmaydi
+        clock.time.return_value = start + 30
+        for header in ({'HTTP_IF_NONE_MATCH': response['ETag']}, {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}):
+            with self.subTest(header):
+                fresh = self.client.get(url, **header)
+                self.assertEqual(fresh.status_code, 200)
+                self.assertIn(f'expires={start + 90}', fresh.json()['images'][0]['image'])
+
+
+class AsyncCatalogueParityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(title="Phones")
+        self.product = Product.objects.create(title="Phone", brand="Apple", price=100, discount_percentage=10, category=category)
+
+    def both(self, name, view, headers=None, **kwargs):
+        url = reverse(name, kwargs=kwargs)
+        headers = {'HTTP_ACCEPT': 'application/json', **(headers or {})}
+        sync = self.client.get(url, **headers)
+        request = RequestFactory().get(url, **headers)
+        return sync, async_to_sync(view)(request, **kwargs)
+
+    def test_payload_and_validators_match_sync_views(self):
+        cases = [
+            ('api-product-list', async_views.product_list, {}),
+            ('api-product-detail', async_views.product_detail, {'pk': self.product.pk}),
+            ('api-category-list', async_views.category_list, {}),
+            ('announcement-list', async_views.announcement_list, {}),
+        ]
+        for name, view, kwargs in cases:
+            with self.subTest(name):
+                sync, async_ = self.both(name, view, **kwargs)
+                self.assertEqual(async_.status_code, sync.status_code)
+                self.assertEqual(json.loads(async_.content), sync.json())
+                self.assertEqual(async_['Content-Type'], sync['Content-Type'])
+                self.assertEqual(async_['ETag'], sync['ETag'])
+
+                sync, cached = self.both(name, view, headers={'HTTP_IF_NONE_MATCH': async_['ETag']}, **kwargs)
+                self.assertEqual((cached.status_code, sync.status_code), (304, 304))
+
+    def test_money_is_rendered_as_number(self):
+        sync, async_ = self.both('api-product-detail', async_views.product_detail, pk=self.product.pk)
+        self.assertEqual(json.loads(async_.content)['discount_price'], 90.0)
+
+    def test_errors_match_sync_views(self):
+        sync, async_ = self.both('api-product-detail', async_views.product_detail, pk=0)
+        self.assertEqual((async_.status_code, json.loads(async_.content)), (404, sync.json()))
+
+        sync, async_ = self.both('api-product-list', async_views.product_list, headers={'HTTP_ACCEPT': 'image/png'})
+        self.assertEqual((async_.status_code, json.loads(async_.content)), (406, sync.json()))
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(title="Phone", brand="Apple", price=100, amount=5, low_stock_threshold=2)
+
+    def test_stale_instances_cannot_oversell(self):
+        first, second = Product.objects.get(), Product.objects.get()
+        Sale.objects.create(product=first, quantity=4)
+        with self.assertRaisesMessage(ValueError, "Not enough product in stock!"):
+            Sale.objects.create(product=second, quantity=4)
+
+        Purchase.objects.create(product=second, quantity=3, purchase_price=50)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.amount, second.amount), (4, 4))
+        self.assertEqual(Sale.objects.count(), 1)
+        self.assertEqual(
+            list(StockMovement.objects.order_by('pk').values_list('quantity', 'balance')),
+            [(5, 5), (-4, 1), (3, 4)],
+        )
+        alert = LowStockAlert.objects.get()
+        self.assertEqual(alert.amount, 1)
+        self.assertIsNotNone(alert.resolved_at)
+
+    def test_stale_save_does_not_undo_stock_change(self):
+        stale = Product.objects.get()
+        Sale.objects.create(product=self.product, quantity=2)
+        stale.adjust_stock(1, StockMovement.Kind.ADJUSTMENT)
+        self.assertEqual(stale.amount, 4)
+        self.assertEqual(Product.objects.get().amount, 4)
+
+
+class SellerStatsRebuildTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(username="seller", password="x")
+        product = Product.objects.create(title="Phone", brand="Apple", price=100, amount=10)
+        Sale.objects.create(product=product, quantity=2, sold_by=self.seller)
+        self.now = timezone.localtime()
+
+    def stats(self):
+        return list(SellerMonthlyStats.objects.values_list('seller_id', 'year', 'month', 'units', 'revenue', 'sale_count'))
+
+    def test_rebuild_fixes_drift_and_drops_stale_months(self):
+        expected = [(self.seller.pk, self.now.year, self.now.month, 2, 200, 1)]
+        self.assertEqual(self.stats(), expected)
+        SellerMonthlyStats.objects.update(units=99)
+        SellerMonthlyStats.objects.create(seller=self.seller, year=2000, month=1, units=1, revenue=1, sale_count=1)
+
+        self.assertEqual(sellers.rebuild_seller_stats(), 1)
+        self.assertEqual(self.stats(), expected)
+
+    def test_failed_rebuild_leaves_counters_untouched(self):
+        SellerMonthlyStats.objects.update(units=99)
+        SellerMonthlyStats.objects.create(seller=self.seller, year=2000, month=1, units=1, revenue=1, sale_count=1)
+        before = self.stats()
+        for target in ('bulk_create', 'delete'):
+            with self.subTest(target), mock.patch(
+                f'django.db.models.query.QuerySet.{target}', side_effect=IntegrityError("boom")
+            ):
+                with self.assertRaises(IntegrityError):
+                    sellers.rebuild_seller_stats()
+                self.assertEqual(self.stats(), before)
+
+
+class CustomerStatsTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin", password="x")
+        self.customer = Customer.objects.create(name="Ali", created_by=admin)
+        product = Product.objects.create(title="Phone", brand="Apple", price=100, amount=10)
+        self.sales = [Sale.objects.create(product=product, quantity=n, customer=self.customer) for n in (1, 2, 3)]
+
+    def stats(self):
+        return CustomerStats.objects.get(customer=self.customer)
+
+    def test_deleting_boundary_sales_recomputes_first_and_last(self):
+        first, middle, last = self.sales
+        last.delete()
+        stats = self.stats()
+        self.assertEqual((stats.order_count, stats.lifetime_revenue), (2, 300))
+        self.assertEqual((stats.first_sale_at, stats.last_sale_at), (first.created_at, middle.created_at))
+
+        first.delete()
+        stats = self.stats()
+        self.assertEqual((stats.order_count, stats.lifetime_revenue), (1, 200))
+        self.assertEqual((stats.first_sale_at, stats.last_sale_at), (middle.created_at, middle.created_at))
+
+        middle.delete()
+        stats = self.stats()
+        self.assertEqual((stats.order_count, stats.lifetime_revenue, stats.first_sale_at, stats.last_sale_at), (0, 0, None, None))
+
+    def test_failed_rebuild_leaves_counters_untouched(self):
+        other = Customer.objects.create(name="Vali", created_by=self.customer.created_by)
+        CustomerStats.objects.create(customer=other, lifetime_revenue=5, order_count=1)
+        before = list(CustomerStats.objects.order_by('pk').values_list('pk', 'lifetime_revenue', 'order_count'))
+        with mock.patch('django.db.models.query.QuerySet.bulk_create', side_effect=IntegrityError("boom")):
+            with self.assertRaises(IntegrityError):
+                customers.rebuild_customer_stats()
+        self.assertEqual(list(CustomerStats.objects.order_by('pk').values_list('pk', 'lifetime_revenue', 'order_count')), before)
+
+        customers.rebuild_customer_stats()
+        self.assertEqual(list(CustomerStats.objects.values_list('pk', 'lifetime_revenue', 'order_count')), [(self.customer.pk, 600, 3)])
+
+
+class MonthlyReportTests(TestCase):
+    def test_stale_saves_get_distinct_versions(self):
+        MonthlyStats.objects.create(year=2026, month=1)
+        first, second = MonthlyStats.objects.get(), MonthlyStats.objects.get()
+        first.save()
+        second.save()
+        self.assertEqual((first.version, second.version, MonthlyStats.objects.get().version), (2, 3, 3))
+
+    @override_settings(REPORTS_MAX_PENDING=2)
+    def test_background_builds_are_deduplicated_and_capped(self):
+        release, calls = threading.Event(), []
+
+        def build_month_report(year, month, fmt):
+            calls.append((year, month, fmt))
+            release.wait(5)
+
+        with mock.patch.object(reports, 'build_month_report', build_month_report):
+            first = reports.schedule_month_report(2026, 1, 'csv')
+            self.assertIs(reports.schedule_month_report(2026, 1, 'csv'), first)
+            second = reports.schedule_month_report(2026, 2, 'csv')
+            self.assertIsNone(reports.schedule_month_report(2026, 3, 'csv'))
+            release.set()
+            first.result(5)
+            second.result(5)
+        self.assertEqual(sorted(calls), [(2026, 1, 'csv'), (2026, 2, 'csv')])
+
+    def test_renamed_category_rebuilds_cached_report(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(REPORTS_DIR=directory))
+        category = Category.objects.create(title="Phones")
+        Sale.objects.create(product=Product.objects.create(title="Phone", brand="Apple", price=100, category=category), quantity=1)
+        stats = MonthlyStats.objects.get()
+
+        first = reports.build_month_report(stats.year, stats.month, 'csv')
+        category.title = "Smartphones"
+        category.save()
+        second = reports.build_month_report(stats.year, stats.month, 'csv')
+        self.assertNotEqual(first, second)
+        self.assertIn("Smartphones", second.read_text('utf-8-sig'))
+        self.assertNotEqual(reports.year_report_path(stats.year, 'csv'), reports.year_report_path(stats.year, 'csv', 'old'))
+
+    def test_admin_queues_yearly_report(self):
+        for month in (1, 2):
+            MonthlyStats.objects.create(year=2026, month=month)
+        model_admin = admin_site._registry[MonthlyStats]
+        action = _pl_year_report_action('csv')
+        with mock.patch.object(reports, 'schedule_year_report') as schedule, \
+                mock.patch.object(model_admin, 'message_user'):
+            action(model_admin, RequestFactory().get('/'), MonthlyStats.objects.all())
+        schedule.assert_called_once_with(2026, 'csv')
+
+
+class RebuildStatsTests(TestCase):
+    def setUp(self):
+        product = Product.objects.create(title="Phone", brand="Apple", price=100, amount=10)
+        Sale.objects.create(product=product, quantity=2)
+        now = timezone.localtime()
+        self.month = f"{now.year}-{now.month:02d}"
+
+    def rebuild(self):
+        call_command('rebuild_stats', '--from', self.month, '--to', self.month, stdout=io.StringIO())
+
+    def test_rebuild_matches_per_month_aggregates(self):
+        MonthlyStats.objects.update(total_sales=1)
+        self.rebuild()
+        self.assertEqual(MonthlyStats.objects.get().total_sales, 200)
+
+    def test_wrong_grouped_totals_fail_verification(self):
+        monthly_totals = rebuild_stats.monthly_totals
+
+        def broken(start, end):
+            totals = monthly_totals(start, end)
+            for row in totals.values():
+                row['total_sales'] += 1
+            return totals
+
+        with mock.patch.object(rebuild_stats, 'monthly_totals', broken):
+            with self.assertRaisesMessage(CommandError, "Verification failed for 1 month(s)"):
+                self.rebuild()
+
+
+    def test_reconcile_fails_on_mismatch_until_fixed(self):
+        self.rebuild()
+        MonthlyStats.objects.update(total_sales=1)
+        with self.assertRaisesMessage(CommandError, "1 mismatched, run with --fix"):
+            call_command('reconcile_stats', stdout=io.StringIO())
+        call_command('reconcile_stats', '--fix', stdout=io.StringIO())
+        self.assertEqual(MonthlyStats.objects.get().total_sales, 200)
+        call_command('reconcile_stats', stdout=io.StringIO())
+
+
+@override_settings(PRODUCT_PRICE_BUCKETS=[0, 100, 500])
+class FacetCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        phones, laptops = Category.objects.create(title="Phones"), Category.objects.create(title="Laptops")
+        for title, brand, price, category in [
+            ("iPhone", "Apple", 900, phones), ("Galaxy", "Samsung", 400, phones), ("A10", "Samsung", 50, phones),
+            ("MacBook", "Apple", 2000, laptops), ("Cable", "Apple", 10, None),
+        ]:
+            Product.objects.create(title=title, brand=brand, price=price, category=category)
+        self.phones, self.laptops = phones.pk, laptops.pk
+
+    def counts(self, facet, **filters):
+        result = facets.facet_counts(**filters)[facet]
+        return {item.get('id', item.get('value', item.get('label'))): item['count'] for item in result}
+
+    def test_counts_exclude_own_facet_filter(self):
+        self.assertEqual(self.counts('brand'), {"Apple": 3, "Samsung": 2})
+        self.assertEqual(self.counts('brand', categories=[self.phones]), {"Apple": 1, "Samsung": 2})
+        self.assertEqual(
+            self.counts('category', categories=[self.phones], brands=["Apple"]),
+            {self.phones: 1, self.laptops: 1, None: 1},
+        )
+        self.assertEqual(self.counts('price', brands=["Apple"]), {"0-100": 1, "100-500": 0, "500+": 2})
+
+    def test_search_and_price_filters_are_counted_in_sql(self):
+        search = Product.objects.filter(title__icontains="a")
+        self.assertEqual(self.counts('brand', queryset=search), {"Apple": 2, "Samsung": 2})
+        self.assertEqual(self.counts('brand', min_price=100, max_price=1000), {"Apple": 1, "Samsung": 1})
+
+    def test_cached_cells_need_no_queries_until_products_change(self):
+        self.counts('brand')
+        with self.assertNumQueries(0):
+            self.counts('brand', brands=["Apple"])
+        Product.objects.create(title="Pixel", brand="Google", price=300)
+        self.assertEqual(self.counts('brand')["Google"], 1)
+
+
+class RelatedProductsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(RECOMMENDATIONS_DIR=directory))
+        admin = User.objects.create_user(username="admin", password="x")
+        self.customer = Customer.objects.create(name="Ali", created_by=admin)
+        self.phone, self.case, self.cable = (
+            Product.objects.create(title=title, brand="Apple", price=10, amount=100) for title in ("Phone", "Case", "Cable")
+        )
+        self.now = timezone.now()
+
+    def sell(self, product, **kwargs):
+        return Sale.objects.create(product=product, quantity=1, customer=self.customer, **kwargs)
+
+    def related(self, product):
+        return list(RelatedProduct.objects.filter(product=product).values_list('related__title', flat=True))
+
+    def test_late_committed_rows_inside_lookback_are_picked_up(self):
+        self.sell(self.phone, pk=100)
+        recommendations.refresh_related(now=self.now)
+        # pk watermark (100) dan kichik, lekin run dan keyin commit bo'lgan sotuv
+        self.sell(self.case, pk=50)
+        recommendations.refresh_related(now=self.now + timezone.timedelta(minutes=1))
+        self.assertEqual(self.related(self.phone), ["Case"])
+
+    def test_periodic_full_rebuild_forgets_deleted_sales(self):
+        self.sell(self.phone)
+        case_sale = self.sell(self.case)
+        recommendations.refresh_related(now=self.now)
+        self.assertEqual(self.related(self.phone), ["Case"])
+
+        case_sale.delete()
+        self.sell(self.cable)
+        recommendations.refresh_related(now=self.now + timezone.timedelta(hours=1))
+        self.assertEqual(set(self.related(self.phone)), {"Case", "Cable"})
+
+        recommendations.refresh_related(now=self.now + timezone.timedelta(hours=25))
+        self.assertEqual(self.related(self.phone), ["Cable"])
+
+    def test_state_stores_pair_counts_not_baskets(self):
+        old = self.sell(self.phone)
+        Sale.objects.filter(pk=old.pk).update(created_at=self.now - timezone.timedelta(hours=2))
+        recommendations.refresh_related(now=self.now)
+        self.sell(self.case)
+        # ikkinchi ishga tushish lookback oynasini qayta o'qiydi: juftlik ikki marta sanalmaydi
+        for minutes in (1, 2):
+            recommendations.refresh_related(now=self.now + timezone.timedelta(minutes=minutes))
+
+        state = json.loads(recommendations.state_path().read_text())
+        self.assertNotIn('baskets', state)
+        phone, case = str(self.phone.pk), str(self.case.pk)
+        self.assertEqual(state['support'], {phone: 1, case: 1})
+        self.assertEqual(state['matrix'], {phone: [[self.case.pk], [1]], case: [[self.phone.pk], [1]]})
+        self.assertEqual(self.related(self.phone), ["Case"])
+
+
+class MoneyTests(TestCase):
+    def test_rounding_is_half_up_on_decimal_value(self):
+        self.assertEqual(money(0.1 + 0.2), Decimal('0.30'))
+        self.assertEqual(money(2.675), Decimal('2.68'))
+        self.assertEqual(money('19.995'), Decimal('20.00'))
+        self.assertIsNone(money(None))
+        self.assertEqual((to_cents(Decimal('19.995')), to_cents(None), to_cents(3)), (2000, 0, 300))
+
+    def test_sale_total_has_no_float_error(self):
+        product = Product.objects.create(title="Cable", brand="Anker", price=0.1, amount=10)
+        sale = Sale.objects.create(product=product, quantity=3)
+        self.assertEqual(Sale.objects.get(pk=sale.pk).total_price, Decimal('0.30'))
+
+
+class ContentRenderingTests(TestCase):
+    def test_unsafe_markup_is_removed(self):
+        html, excerpt = render_content(
+            '<p onclick="x()">Hi <script>alert(1)</script><a href="javascript:alert(1)" target="_blank">link</a></p>'
+            '<iframe src="x">bad</iframe><span style="color:red;background:url(x)">c</span><ul><li>one<li>two</ul>'
+            '<div>tail'
+        )
+        self.assertEqual(html, (
+            '<p>Hi <a target="_blank" rel="noopener noreferrer">link</a></p><span style="color:red">c</span>'
+            '<ul><li>one<li>two</li></li></ul>tail'
+        ))
+        self.assertEqual(excerpt, 'Hi link c one two tail')
+
+    def test_whitespace_is_collapsed_outside_pre(self):
+        self.assertEqual(
+            render_content('<pre>a\n   b</pre>\n\n<p>x   <b>y</b></p>'),
+            ('<pre>a\n   b</pre><p>x <b>y</b></p>', 'a b x y'),
+        )
+
+    def test_excerpt_is_cut_on_word_boundary_and_stored_on_save(self):
+        self.assertEqual(render_content('<p>' + 'word ' * 100 + '</p>', excerpt_length=20)[1], 'word word word…')
+        about = About.objects.create(title="About", description='<h2>Biz</h2><script>x</script>')
+        self.assertEqual((about.description_html, about.excerpt), ('<h2>Biz</h2>', 'Biz'))
+
+
+def _sale_at(product, quantity, when, **kwargs):
+    sale = Sale.objects.create(product=product, quantity=quantity, **kwargs)
+    Sale.objects.filter(pk=sale.pk).update(created_at=when, sale_date=when)
+    return sale.pk
+
+
+class SalesArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(SALES_ARCHIVE_DIR=directory))
+        self.directory = directory
+        self.product = Product.objects.create(title="Phone", brand="Apple", price=100, amount=100)
+        self.tz = timezone.get_current_timezone()
+        for day, quantity in ((10, 1), (12, 2), (14, 3)):
+            _sale_at(self.product, quantity, datetime(2020, 1, day, 12, tzinfo=self.tz), description="x")
+        self.current = _sale_at(self.product, 1, timezone.now(), description="x")
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_archived_month_reads_back_identically(self):
+        before = list(archive.iter_sales())
+        partial = (datetime(2020, 1, 11, tzinfo=self.tz), datetime(2020, 1, 13, tzinfo=self.tz))
+        totals = (archive.sales_total(*archive.month_bounds(2020, 1)), archive.sales_total(*partial))
+        stats = list(MonthlyStats.objects.values_list('year', 'month', 'total_sales'))
+        self.assertEqual(archive.months_to_archive(archive.archive_cutoff(now=timezone.now())), [(2020, 1)])
+
+        self.assertEqual(archive.archive_month(2020, 1), 3)
+        self.assertEqual(list(Sale.objects.values_list('pk', flat=True)), [self.current])
+        self.assertEqual(SaleArchive.objects.values_list('rows', 'total_price').get(), (3, Decimal('600.00')))
+        self.assertEqual(list(archive.iter_sales()), before)
+        self.assertEqual((archive.sales_total(*archive.month_bounds(2020, 1)), archive.sales_total(*partial)), totals)
+        self.assertEqual(totals, (Decimal('600.00'), Decimal('200.00')))
+        self.assertEqual(list(MonthlyStats.objects.values_list('year', 'month', 'total_sales')), stats)
+
+    def test_failed_archive_keeps_live_rows_and_retry_does_not_duplicate(self):
+        with mock.patch('django.db.models.query.QuerySet.delete', side_effect=IntegrityError("boom")):
+            with self.assertRaises(IntegrityError):
+                archive.archive_month(2020, 1)
+        self.assertEqual(Sale.objects.count(), 4)
+        self.assertFalse(SaleArchive.objects.exists())
+
+        self.assertEqual(archive.archive_month(2020, 1), 3)
+        late = _sale_at(self.product, 4, datetime(2020, 1, 20, tzinfo=self.tz), description="x")
+        previous = SaleArchive.objects.get().path
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.archive_month(2020, 1), 1)
+
+        saved = SaleArchive.objects.get()
+        self.assertEqual((saved.rows, saved.total_price), (4, Decimal('1000.00')))
+        self.assertNotIn(previous, self.files())
+        self.assertIn(saved.path, self.files())
+        ids = [sale['id'] for sale in archive.read_archive(saved)]
+        self.assertEqual((len(ids), len(set(ids)), ids[-1]), (4, 4, late))
+
+
+@skipUnless(columnar.np is not None, "numpy is not installed")
+class ColumnarSnapshotTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.enterContext(override_settings(SALES_ARCHIVE_DIR=os.path.join(root, 'archive')))
+        self.directory = os.path.join(root, 'columnar')
+        product = Product.objects.create(title="Phone", brand="Apple", price=100, amount=100)
+        _sale_at(product, 2, datetime(2020, 1, 10, tzinfo=timezone.get_current_timezone()))
+        archive.archive_month(2020, 1)
+        Sale.objects.create(product=product, quantity=1)
+
+    def test_archived_and_live_sales_are_summed_in_cents(self):
+        self.assertEqual(columnar.export(self.directory)['sale'], 2)
+        now = timezone.localtime()
+        self.assertEqual(
+            columnar.group_sum('sale', 'month', 'total_price', self.directory),
+            {202001: 20000, now.year * 100 + now.month: 10000},
+        )
+
+    def test_multi_column_keys_with_mask(self):
+        columnar.export(self.directory)
+        now = timezone.localtime()
+        product = Product.objects.get().pk
+        self.assertEqual(columnar.group_sum('sale', ('month', 'product_id'), 'quantity', self.directory), {
+            (202001, product): 2, (now.year * 100 + now.month, product): 1,
+        })
+        self.assertEqual(
+            columnar.group_sum('sale', ('product_id', 'month'), 'quantity', self.directory, where=lambda c: c['quantity'] > 1),
+            {(product, 202001): 2},
+        )
+        self.assertEqual(columnar.group_sum('sale', 'month', 'quantity', self.directory, where=lambda c: c['quantity'] > 5), {})
+
+    def test_failed_export_keeps_previous_snapshot(self):
+        columnar.export(self.directory)
+        with mock.patch.dict(columnar.ROW_SOURCES, {'salary': mock.Mock(side_effect=IntegrityError("boom"))}):
+            with self.assertRaises(IntegrityError):
+                columnar.export(self.directory)
+        self.assertEqual(len(columnar.load('sale', self.directory)['id']), 2)
+
+
+class MediaGarbageCollectorTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.root, MEDIA_GC_EXCLUDE=[]))
+        product = Product.objects.create(title="Phone", brand="Apple", price=100)
+        Images.objects.create(product=product, image=self.write('content/aa/used.jpg'))
+        About.objects.create(title="About", description='<img src="/media/about_images/inline%20photo.png">')
+        self.write('about_images/inline photo.png')
+        self.write('products_images/orphan.jpg')
+        self.write('products_images/fresh.jpg', age=0)
+
+    def write(self, name, age=48 * 3600):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(name.encode())
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return name
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.root, name))
+
+    def test_only_old_orphans_are_removed(self):
+        stats = media_gc.collect_garbage(dry_run=True, grace_hours=24)
+        self.assertEqual((stats['scanned'], stats['orphans'], stats['recent']), (4, 1, 1))
+        self.assertTrue(self.exists('products_images/orphan.jpg'))
+
+        removed = []
+        media_gc.collect_garbage(grace_hours=24, log=removed.append)
+        self.assertEqual(removed, ['products_images/orphan.jpg'])
+        self.assertFalse(self.exists('products_images/orphan.jpg'))
+        for name in ('content/aa/used.jpg', 'about_images/inline photo.png', 'products_images/fresh.jpg'):
+            self.assertTrue(self.exists(name), name)
+
+    def test_file_reused_during_sweep_is_kept(self):
+        def reuse(name):
+            os.utime(os.path.join(self.root, name))
+
+        stats = media_gc.collect_garbage(grace_hours=24, log=reuse)
+        self.assertEqual(stats['orphans'], 1)
+        self.assertTrue(self.exists('products_images/orphan.jpg'))
+
+    def test_quarantine_moves_orphans_out_of_later_scans(self):
+        quarantine = os.path.join(self.root, 'quarantine')
+        media_gc.collect_garbage(grace_hours=24, quarantine=quarantine)
+        self.assertTrue(os.path.exists(os.path.join(quarantine, 'products_images/orphan.jpg')))
+        self.assertFalse(self.exists('products_images/orphan.jpg'))
+        self.assertEqual(media_gc.collect_garbage(grace_hours=24, quarantine=quarantine)['orphans'], 0)
+
+
+class ObjectStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.store = LocalObjectStore(self.root, '/media/', 'secret')
+        self.storage = ObjectStorage({'MULTIPART_THRESHOLD': 10, 'MULTIPART_CHUNK_SIZE': 4}, store=self.store)
+
+    def uploads_left(self):
+        directory = os.path.join(self.root, LocalObjectStore.MULTIPART_DIR)
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    def test_multipart_upload_is_assembled_and_cached(self):
+        data = b'0123456789abcdefghij-'
+        name = self.storage.save('files/a.bin', ContentFile(data, name='a.bin'))
+        self.assertTrue(is_content_name(name))
+        with self.storage.open(name) as fh:
+            self.assertEqual(fh.read(), data)
+        self.assertEqual(self.uploads_left(), [])
+        with mock.patch.object(self.store, 'head') as head:
+            self.assertEqual(self.storage.size(name), len(data))
+            self.assertTrue(self.storage.exists(name))
+        head.assert_not_called()
+        self.assertEqual(self.storage.save('other/b.bin', ContentFile(data, name='b.bin')), name)
+        self.assertEqual(self.storage.listdir('content'), ([name.split('/')[1]], []))
+
+    def test_failed_part_aborts_upload(self):
+        upload_part = self.store.upload_part
+
+        def failing(key, upload_id, number, data):
+            if number == 3:
+                raise OSError("connection reset")
+            return upload_part(key, upload_id, number, data)
+
+        with mock.patch.object(self.store, 'upload_part', side_effect=failing):
+            with self.assertRaises(OSError):
+                self.storage.save('files/a.bin', ContentFile(b'x' * 20, name='a.bin'))
+        self.assertEqual(self.uploads_left(), [])
+        self.assertEqual(list(self.store.list()), [])
+
+    def test_keys_cannot_escape_the_bucket(self):
+        for key in ('../outside.txt', '.multipart/x/00001', 'a/../../outside.txt'):
+            with self.subTest(key), self.assertRaises(SuspiciousFileOperation):
+                self.store.put(key, ContentFile(b'x'))
+
+    def test_signed_urls_are_stable_and_verified(self):
+        name = self.storage.save('files/a.txt', ContentFile(b'hello', name='a.txt'))
+        url = self.storage.url(name)
+        self.assertEqual(self.storage.url(name), url)
+        query = dict(part.split('=') for part in url.split('?')[1].split('&'))
+        self.assertTrue(self.store.verify(name, query['expires'], query['signature']))
+        self.assertFalse(self.store.verify('content/other.txt', query['expires'], query['signature']))
+        self.assertFalse(self.store.verify(name, int(query['expires']) + 1, query['signature']))
+        self.assertFalse(self.store.verify(name, int(time.time()) - 1, query['signature']))
@@ -11,6 +11,11 @@ urlpatterns = [
     path("cart/<int:pk>/delete/", CartDeleteAPIView.as_view(), name="cart-delete"),
     path("about/",AboutRetrieveAPIView.as_view(), name="about"),
     path("announcements/", AnnouncementListAPIView.as_view(), name="announcement-list"),
+    path("product/<int:pk>/related/", RelatedProductListAPIView.as_view(), name="product-related"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("customers/top/", TopCustomersAPIView.as_view(), name="customer-top"),
+    path("customer/<int:pk>/sales/", CustomerSaleListAPIView.as_view(), name="customer-sales"),
+    path("sellers/leaderboard/", SellerLeaderboardAPIView.as_view(), name="seller-leaderboard"),
     path("announcement/<int:pk>/",AnnouncementRetrieveAPIView.as_view(), name="announcement-detail"),
 
 ]
@@ -4,11 +4,92 @@ from users.permissions import *
 from .serializers import *
 from rest_framework.generics import RetrieveAPIView, ListAPIView, CreateAPIView
 from rest_framework.response import Response
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
-
-
-class CategoryListAPIView(ListAPIView):
+from rest_framework.pagination import CursorPagination
+from .swagger import openapi, swagger_auto_schema
+from django.views.static import serve
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.conf import settings
+from . import metrics
+from .caching import ConditionalGetMixin
+from .storage import HASHED_NAME_RE
+from .sellers import leaderboard
+from .facets import facet_counts
+from django.utils import timezone
+
+
+def filter_categories(categories, params):
+    search = params.get('search')
+    if search:
+        categories = categories.filter(title__icontains=search) | categories.filter(description__icontains=search)
+
+    ordering = params.get('ordering')
+    if ordering in ['title', '-title']:
+        categories = categories.order_by(ordering)
+    return categories
+
+
+def multi_param(params, name):
+    """?brand=A&brand=B yoki ?brand=A,B -> ['A', 'B']"""
+    values = params.getlist(name) if hasattr(params, 'getlist') else [params.get(name) or '']
+    return [value.strip() for raw in values for value in raw.split(',') if value.strip()]
+
+
+def category_ids(params):
+    ids = []
+    for value in multi_param(params, 'category'):
+        try:
+            ids.append(int(value))
+        except ValueError:
+            pass
+    return ids
+
+
+def price_param(params, name):
+    value = params.get(name)
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return None
+
+
+def search_products(products, params):
+    search = params.get('search')
+    if search:
+        products = products.filter(title__icontains=search) | products.filter(
+            description__icontains=search) | products.filter(brand__icontains=search)
+    return products
+
+
+def filter_products(products, params):
+    products = search_products(products, params)
+
+    min_price = price_param(params, 'min_price')
+    if min_price is not None:
+        products = products.filter(effective_price__gte=min_price)
+
+    max_price = price_param(params, 'max_price')
+    if max_price is not None:
+        products = products.filter(effective_price__lte=max_price)
+
+    categories = category_ids(params)
+    if categories:
+        products = products.filter(category_id__in=categories)
+
+    brands = multi_param(params, 'brand')
+    if brands:
+        products = products.filter(brand__in=brands)
+
+    ordering = params.get('ordering')
+    if ordering in ['price', '-price', 'title', '-title']:
+        # narx bo'yicha saralash indekslangan effective_price ustunida
+        products = products.order_by(ordering.replace('price', 'effective_price'))
+    return products
+
+
+class CategoryListAPIView(ConditionalGetMixin, ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
@@ -28,22 +109,17 @@ class CategoryListAPIView(ListAPIView):
         ]
     )
     def get(self, request):
-        categories = Category.objects.all()
-
-        search = request.GET.get('search')
-        if search:
-            categories = categories.filter(title__icontains=search) | categories.filter(description__icontains=search)
-
-        ordering = request.GET.get('ordering')
-        if ordering in ['title', '-title']:
-            categories = categories.order_by(ordering)
-
+        categories = filter_categories(Category.objects.all(), request.GET)
+        not_modified = self.check_not_modified(request, categories)
+        if not_modified is not None:
+            return not_modified
         serializer = CategorySerializer(categories, many=True)
         return Response(serializer.data)
 
 
-class ProductListAPIView(ListAPIView):
+class ProductListAPIView(ConditionalGetMixin, ListAPIView):
     queryset = Product.objects.all()
+    related_validators = ('images',)
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
@@ -56,8 +132,15 @@ class ProductListAPIView(ListAPIView):
                               type=openapi.TYPE_NUMBER),
             openapi.Parameter('max_price', openapi.IN_QUERY, description='Filter by maximum price',
                               type=openapi.TYPE_NUMBER),
-            openapi.Parameter('category', openapi.IN_QUERY, description='Filter by category id',
-                              type=openapi.TYPE_INTEGER),
+            openapi.Parameter('category', openapi.IN_QUERY, description='Filter by category ids (comma separated or repeated)',
+                              type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_INTEGER),
+                              collection_format='multi'),
+            openapi.Parameter('brand', openapi.IN_QUERY, description='Filter by brands (comma separated or repeated)',
+                              type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_STRING),
+                              collection_format='multi'),
+            openapi.Parameter('facets', openapi.IN_QUERY,
+                              description='Return {"results": [...], "facets": {...}} with category, brand and price counts',
+                              type=openapi.TYPE_BOOLEAN),
             openapi.Parameter(
                 name='ordering',
                 in_=openapi.IN_QUERY,
@@ -68,63 +151,53 @@ class ProductListAPIView(ListAPIView):
         ]
     )
     def get(self, request):
-        products = Product.objects.all()
-
-        search = request.GET.get('search')
-        if search:
-            products = products.filter(title__icontains=search) | products.filter(
-                description__icontains=search) | products.filter(brand__icontains=search)
-
-        min_price = request.GET.get('min_price')
-        if min_price:
-            try:
-                products = products.filter(price__gte=float(min_price))
-            except ValueError:
-                pass
-
-        max_price = request.GET.get('max_price')
-        if max_price:
-            try:
-                products = products.filter(price__lte=float(max_price))
-            except ValueError:
-                pass
-
-        category_id = request.GET.get('category')
-        if category_id:
-            try:
-                products = products.filter(category_id=int(category_id))
-            except ValueError:
-                pass
-
-        ordering = request.GET.get('ordering')
-        if ordering in ['price', '-price', 'title', '-title']:
-            products = products.order_by(ordering)
-
+        products = filter_products(Product.objects.all(), request.GET)
+        # fasetlar tanlangan filtrdan tashqaridagi mahsulotlarni ham sanaydi
+        validated = search_products(Product.objects.all(), request.GET) if wants_facets(request.GET) else products
+        not_modified = self.check_not_modified(request, validated)
+        if not_modified is not None:
+            return not_modified
         serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        if not wants_facets(request.GET):
+            return Response(serializer.data)
+        return Response({'results': serializer.data, 'facets': product_facets(request.GET)})
+
 
+def wants_facets(params):
+    return params.get('facets', '').lower() in ('1', 'true', 'yes')
 
-class CategoryDetailAPIView(RetrieveAPIView):
+
+def product_facets(params):
+    """Fasetlar keshlangan kataklardan; qidiruv bo'lsa shu qidiruv bilan GROUP BY so'rovidan"""
+    queryset = search_products(Product.objects.all(), params) if params.get('search') else None
+    return facet_counts(
+        queryset=queryset,
+        categories=category_ids(params),
+        brands=multi_param(params, 'brand'),
+        min_price=price_param(params, 'min_price'),
+        max_price=price_param(params, 'max_price'),
+    )
+
+
+class CategoryDetailAPIView(ConditionalGetMixin, RetrieveAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
 
-class ProductDetailAPIView(RetrieveAPIView):
+class ProductDetailAPIView(ConditionalGetMixin, RetrieveAPIView):
     queryset = Product.objects.all()
+    related_validators = ('images',)
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
-class ImageListAPIView(ListAPIView):
-    queryset = Images.objects.all()
-    serializer_class = ImagesSerializer
-    permission_classes = [AllowAny]
-
 class CartListAPIView(generics.ListAPIView):
     serializer_class = CartSerializer
     permission_classes = [IsUser]
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):  # drf_yasg sxema generatsiyasi
+            return Cart.objects.none()
         return Cart.objects.filter(user=self.request.user)
 
 
@@ -141,31 +214,143 @@ class CartDeleteAPIView(generics.DestroyAPIView):
     permission_classes = [IsUser]
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Cart.objects.none()
         return Cart.objects.filter(user=self.request.user)
 
-class AboutRetrieveAPIView(generics.RetrieveAPIView):
+class AboutRetrieveAPIView(ConditionalGetMixin, generics.RetrieveAPIView):
     serializer_class = AboutSerializer
     permission_classes = [AllowAny]
+    related_validators = ('images',)
+
+    def get_conditional_queryset(self):
+        return About.objects.all()
 
     def get_object(self):
         return About.objects.first()
 
-class AnnouncementListAPIView(generics.ListAPIView):
-    queryset = Announcement.objects.all()
-    serializer_class = AnnouncementSerializer
+class AnnouncementListAPIView(ConditionalGetMixin, generics.ListAPIView):
+    queryset = Announcement.objects.defer('description', 'description_html')
+    related_validators = ('images',)
+    serializer_class = AnnouncementListSerializer
     permission_classes = [AllowAny]
 
 
 
-class AnnouncementRetrieveAPIView(generics.RetrieveAPIView):
+class AnnouncementRetrieveAPIView(ConditionalGetMixin, generics.RetrieveAPIView):
     queryset = Announcement.objects.all()
+    related_validators = ('images',)
     serializer_class = AnnouncementSerializer
     permission_classes = [AllowAny]
 
 
+class CustomerSalePagination(CursorPagination):
+    # keyset pagination: (customer, -created_at, -id) indeksi bo'yicha, OFFSET yo'q
+    page_size = 50
+    ordering = ('-created_at', '-id')
 
 
+class CustomerSaleListAPIView(generics.ListAPIView):
+    serializer_class = CustomerSaleSerializer
+    permission_classes = [IsAdmin]
+    pagination_class = CustomerSalePagination
 
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Sale.objects.none()
+        return Sale.objects.filter(customer_id=self.kwargs['pk']).select_related('product')
 
 
+class RelatedProductListAPIView(generics.ListAPIView):
+    """Birga sotib olinadigan mahsulotlar (refresh_related_products natijasi)"""
+    serializer_class = RelatedProductSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
 
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return RelatedProduct.objects.none()
+        # (product, rank) unique indeksi bo'yicha bitta JOIN so'rovi
+        return RelatedProduct.objects.filter(product_id=self.kwargs['pk']).select_related('related').order_by('rank')
+
+
+class TopCustomersAPIView(generics.ListAPIView):
+    serializer_class = CustomerStatsSerializer
+    permission_classes = [IsAdmin]
+
+    @swagger_auto_schema(
+        operation_description="Top customers by lifetime revenue (reads the CustomerStats aggregate table)",
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, description='Number of customers (1-100, default 10)',
+                              type=openapi.TYPE_INTEGER),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        try:
+            limit = min(max(int(self.request.GET.get('limit', 10)), 1), 100)
+        except ValueError:
+            limit = 10
+        return CustomerStats.objects.select_related('customer').order_by('-lifetime_revenue')[:limit]
+
+
+class SellerLeaderboardAPIView(generics.ListAPIView):
+    serializer_class = SellerMonthlyStatsSerializer
+    permission_classes = [IsAdmin | IsManager]
+
+    @swagger_auto_schema(
+        operation_description="Sellers ranked by revenue for a month (reads SellerMonthlyStats)",
+        manual_parameters=[
+            openapi.Parameter('year', openapi.IN_QUERY, description='Year (default: current)', type=openapi.TYPE_INTEGER),
+            openapi.Parameter('month', openapi.IN_QUERY, description='Month (default: current)', type=openapi.TYPE_INTEGER),
+            openapi.Parameter('limit', openapi.IN_QUERY, description='Number of sellers (1-100, default 10)',
+                              type=openapi.TYPE_INTEGER),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        now = timezone.localtime()
+        params = self.request.GET
+        try:
+            year = int(params.get('year', now.year))
+            month = int(params.get('month', now.month))
+            limit = min(max(int(params.get('limit', 10)), 1), 100)
+        except ValueError:
+            year, month, limit = now.year, now.month, 10
+        return leaderboard(year, month, limit)
+
+
+def serve_media(request, path, document_root=None):
+    """static() orqali media: hashlangan nomlar o'zgarmaydi, shuning uchun 1 yil immutable"""
+    response = serve(request, path, document_root=document_root)
+    if HASHED_NAME_RE.search(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+def serve_object_media(request, path):
+    """LocalObjectStore imzoli URL lari (S3 da URL to'g'ridan-to'g'ri bucketga ketadi)"""
+    store = default_storage.store
+    if not default_storage.options.get('PUBLIC_URL') and not store.verify(
+        path, request.GET.get('expires'), request.GET.get('signature')
+    ):
+        return HttpResponseForbidden()
+    try:
+        response = FileResponse(store.open(path))
+    except FileNotFoundError:
+        raise Http404(path)
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (counterlar umumiy keshdan)"""
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', []):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4')
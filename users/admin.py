@@ -1,7 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import User
+from .models import RevokedToken, User
+from .revocation import revoke_user_tokens
 
 
 @admin.register(User)
@@ -13,6 +14,7 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ("role", "is_staff", "is_superuser", "is_active")
     search_fields = ("username", "first_name", "last_name", "phone_number")
     ordering = ("-date_joined",)
+    actions = ("revoke_tokens",)
 
     fieldsets = (
         (None, {"fields": ("username", "password")}),
@@ -22,8 +24,9 @@ class UserAdmin(BaseUserAdmin):
                 "role", "is_active", "is_staff", "is_superuser", "groups", "user_permissions"
             )
         }),
-        ("Important dates", {"fields": ("last_login", "date_joined")}),
+        ("Important dates", {"fields": ("last_login", "date_joined", "tokens_revoked_at")}),
     )
+    readonly_fields = ("tokens_revoked_at",)
 
     add_fieldsets = (
         (None, {
@@ -34,3 +37,18 @@ class UserAdmin(BaseUserAdmin):
             ),
         }),
     )
+
+
+    @admin.action(description="Revoke all JWT tokens")
+    def revoke_tokens(self, request, queryset):
+        for user in queryset:
+            revoke_user_tokens(user)
+        self.message_user(request, f"Tokens revoked for {queryset.count()} user(s)", messages.SUCCESS)
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ("jti", "user", "expires_at", "created_at")
+    search_fields = ("jti", "user__username")
+    ordering = ("-created_at",)
+    list_select_related = ("user",)
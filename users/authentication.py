@@ -0,0 +1,23 @@
+# users/authentication.py
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import issued_before_revocation, revocations
+
+
+class RevocationAwareJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication + bekor qilingan JTI (Bloom filtr) va User.tokens_revoked_at tekshiruvi"""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocations.is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token has been revoked"))
+        return token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if issued_before_revocation(validated_token, user.tokens_revoked_at):
+            raise InvalidToken(_("Token has been revoked"))
+        return user
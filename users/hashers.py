@@ -0,0 +1,90 @@
+# users/hashers.py
+# settings.PASSWORD_HASHING dan parametr oladigan argon2 / scrypt hasherlar va
+# eski hashlarni login yo'lidan tashqarida (fon threadida) qayta hashlash.
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher, make_password
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class TunedHasherMixin:
+    """PASSWORD_HASHING[<algorithm>] qiymatlari klass atributlarini almashtiradi"""
+    tunable = ()
+
+    def __init__(self, **params):
+        conf = {**getattr(settings, 'PASSWORD_HASHING', {}).get(self.algorithm, {}), **params}
+        for name in self.tunable:
+            if name in conf:
+                setattr(self, name, conf[name])
+
+    def describe(self):
+        return ', '.join(f"{name}={getattr(self, name)}" for name in self.tunable)
+
+
+class TunedArgon2PasswordHasher(TunedHasherMixin, Argon2PasswordHasher):
+    tunable = ('time_cost', 'memory_cost', 'parallelism')
+
+
+class TunedScryptPasswordHasher(TunedHasherMixin, ScryptPasswordHasher):
+    tunable = ('work_factor', 'block_size', 'parallelism')
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        # OpenSSL standart maxmem (32 MB) katta work_factor uchun yetmaydi
+        self.maxmem = 2 * 128 * self.work_factor * self.block_size + 1024 * 1024
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rehash')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _rehash(user_model, user_id, encoded, raw_password):
+    try:
+        # parol shu orada o'zgargan bo'lsa (boshqa login/reset) yangisini bosib ketmaymiz
+        user_model._default_manager.filter(pk=user_id, password=encoded).update(
+            password=make_password(raw_password)
+        )
+    except Exception:
+        logger.exception("Password rehash failed for user %s", user_id)
+    finally:
+        with _pending_lock:
+            _pending.discard(user_id)
+        close_old_connections()
+
+
+_local = threading.local()
+
+
+@contextmanager
+def deferred_rehash():
+    """
+    Shu blok ichida User.check_password eskirgan hashni fonda yangilaydi.
+    Faqat JWT login uchun: sessiyali loginda hash darhol o'zgarishi kerak,
+    aks holda sessiyadagi auth hash keyingi so'rovda mos kelmay qoladi.
+    """
+    previous = getattr(_local, 'active', False)
+    _local.active = True
+    try:
+        yield
+    finally:
+        _local.active = previous
+
+
+def rehash_deferred():
+    return getattr(_local, 'active', False)
+
+
+def schedule_rehash(user, raw_password):
+    """Eskirgan hashni (algoritm yoki parametrlar o'zgargan) fonda yangilash"""
+    with _pending_lock:
+        if user.pk in _pending:
+            return None
+        _pending.add(user.pk)
+    return _executor.submit(_rehash, type(user), user.pk, user.password, raw_password)
@@ -0,0 +1,86 @@
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from users.hashers import TunedArgon2PasswordHasher, TunedScryptPasswordHasher
+from users.models import User
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+PASSWORD = "Bench-password-2024"
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _path(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark password hashers: hashes/sec (single thread and across cores) and "
+        "p50/p99 latency of /auth/token/ for each configuration. "
+        "The test user is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hashes", type=int, default=20, help="Hashes per measurement")
+        parser.add_argument("--logins", type=int, default=20, help="Token requests per configuration")
+        parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        configs = [("pbkdf2 (django default)", PBKDF2PasswordHasher), ("scrypt", TunedScryptPasswordHasher)]
+        if argon2 is not None:
+            configs.append(("argon2", TunedArgon2PasswordHasher))
+        else:
+            self.stdout.write("argon2-cffi is not installed, skipping argon2")
+
+        parallel_label = f"hash/s x{options['threads']}"
+        self.stdout.write(f"{'hasher':<24} {'hash/s':>8} {parallel_label:>12} {'p50 ms':>8} {'p99 ms':>8}  params")
+        for name, cls in configs:
+            hasher = cls()
+            single = self._throughput(hasher, options["hashes"], 1)
+            parallel = self._throughput(hasher, options["hashes"] * options["threads"], options["threads"])
+            p50, p99 = self._login_latency(cls, options["logins"])
+            params = hasher.describe() if hasattr(hasher, "describe") else f"iterations={hasher.iterations}"
+            self.stdout.write(f"{name:<24} {single:>8.1f} {parallel:>12.1f} {p50:>8.1f} {p99:>8.1f}  {params}")
+
+    def _throughput(self, hasher, count, threads):
+        salt = hasher.salt()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: hasher.encode(PASSWORD, salt), range(count)))
+        return count / (time.perf_counter() - started)
+
+    def _login_latency(self, cls, logins):
+        timings = []
+        # throttling o'chiriladi, faqat shu hasher ishlatiladi
+        with override_settings(PASSWORD_HASHERS=[_path(cls)], AUTH_RATE_LIMITS={}, ALLOWED_HOSTS=["*"]):
+            try:
+                with transaction.atomic():
+                    User.objects.create(username="bench-hashers", password=make_password(PASSWORD))
+                    client = Client()
+                    url = reverse("token_obtain_pair")
+                    for _ in range(logins):
+                        started = time.perf_counter()
+                        response = client.post(url, {"username": "bench-hashers", "password": PASSWORD},
+                                               content_type="application/json")
+                        timings.append((time.perf_counter() - started) * 1000)
+                        assert response.status_code == 200, response.content
+                    raise _Rollback
+            except _Rollback:
+                pass
+        timings.sort()
+        return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.99))]
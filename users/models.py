@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.hashers import check_password
+
+from .hashers import rehash_deferred, schedule_rehash
 
 
 
@@ -14,7 +17,29 @@ class User(AbstractUser):
     role = models.CharField(max_length=20, choices=Role.choices,default=Role.USER)
     phone_number = models.CharField(max_length=13, unique=True, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
+    # shu vaqtgacha berilgan JWT lar bekor (users/revocation.py)
+    tokens_revoked_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.first_name} - {self.last_name} ({self.role})"
 
+    def check_password(self, raw_password):
+        if not rehash_deferred():
+            return super().check_password(raw_password)
+        # eskirgan hash login javobini kutdirmaydi: yangi hash fon threadida yoziladi
+        return check_password(raw_password, self.password, lambda raw: schedule_rehash(self, raw))
+
+
+class RevokedToken(models.Model):
+    """Bekor qilingan JWT (jti); muddati o'tgach purge_revoked_tokens o'chiradi"""
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="revoked_tokens")
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
+
+    class Meta:
+        verbose_name = "Revoked token"
+        verbose_name_plural = "Revoked tokens"
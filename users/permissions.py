@@ -10,4 +10,10 @@ class IsUser(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.user and  request.user.is_authenticated and request.user.role == "USER":
             return True
-        return False
\ No newline at end of file
+        return False
+
+class IsManager(permissions.BasePermission):
+    def has_permission(self, request, view):
+        if request.user and request.user.is_authenticated and request.user.role == "MANAGER":
+            return True
+        return False
@@ -0,0 +1,126 @@
+# users/revocation.py
+# JWT bekor qilish (revocation) ro'yxati.
+# Bekor qilingan JTI lar RevokedToken jadvalida, har jarayonda esa Bloom filtrda:
+# "bekor qilinmagan" javobi (deyarli barcha so'rovlar) I/O siz. Filtr "bor" desa
+# (haqiqiy yoki false positive) jadvaldan tekshiriladi. Boshqa jarayonlardagi
+# yangi yozuvlar TOKEN_REVOCATION_SYNC_SECONDS da bir marta (id > oxirgi id) olinadi, ya'ni
+# logout (revoke_token) boshqa workerlarda shu oraliqqacha (standart 30 s) kechikib ko'rinadi;
+# bekor qilgan jarayonning o'zida darhol.
+# Foydalanuvchining barcha tokenlari User.tokens_revoked_at orqali bekor qilinadi:
+# JWTAuthentication userni baribir o'qiydi, shuning uchun qo'shimcha so'rov yo'q va bu
+# barcha workerlarda darhol amal qiladi. Solishtirish mikrosekundlarda (users/tokens.py).
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+from .tokens import ISSUED_AT_CLAIM, to_microseconds
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        return ((a + i * b) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._rebuilt_at = 0.0
+
+    def _new_filter(self):
+        return BloomFilter(
+            getattr(settings, 'TOKEN_REVOCATION_BLOOM_CAPACITY', 100_000),
+            getattr(settings, 'TOKEN_REVOCATION_BLOOM_ERROR_RATE', 0.001),
+        )
+
+    def sync(self, full=False):
+        with self._lock:
+            now = time.monotonic()
+            bloom = self._filter
+            # muddati o'tgan JTI lar filtrdan faqat qayta qurishda tushadi
+            if full or bloom is None or now - self._rebuilt_at > 3600 or bloom.count > bloom.capacity:
+                bloom, last_id = self._new_filter(), 0
+                rows = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+                self._rebuilt_at = now
+            else:
+                last_id = self._last_id
+                rows = RevokedToken.objects.filter(pk__gt=last_id)
+            for pk, jti in rows.order_by('pk').values_list('pk', 'jti').iterator():
+                bloom.add(jti)
+                last_id = max(last_id, pk)
+            self._filter, self._last_id, self._synced_at = bloom, last_id, now
+
+    def _maybe_sync(self):
+        interval = getattr(settings, 'TOKEN_REVOCATION_SYNC_SECONDS', 30)
+        if self._filter is None or time.monotonic() - self._synced_at >= interval:
+            self.sync()
+
+    def add(self, jti):
+        self._maybe_sync()
+        self._filter.add(jti)
+
+    def is_revoked(self, jti):
+        if not jti:
+            return False
+        self._maybe_sync()
+        if jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revocations = RevocationList()
+
+
+def _claim_time(token, claim):
+    return datetime.fromtimestamp(token[claim], tz=dt_timezone.utc)
+
+
+def revoke_token(token):
+    """Bitta tokenni (access yoki refresh) muddati tugaguncha bekor qilish"""
+    jti = token[api_settings.JTI_CLAIM]
+    RevokedToken.objects.get_or_create(
+        jti=jti, defaults={'user_id': token.get(api_settings.USER_ID_CLAIM), 'expires_at': _claim_time(token, 'exp')}
+    )
+    revocations.add(jti)
+
+
+def revoke_user_tokens(user):
+    """Foydalanuvchiga shu paytgacha berilgan barcha tokenlarni bekor qilish"""
+    user.tokens_revoked_at = timezone.now()
+    user.save(update_fields=['tokens_revoked_at'])
+
+
+def issued_before_revocation(token, revoked_at):
+    if revoked_at is None:
+        return False
+    if ISSUED_AT_CLAIM in token:
+        return token[ISSUED_AT_CLAIM] <= to_microseconds(revoked_at)
+    # ISSUED_AT_CLAIM siz (eski) tokenlar: butun soniyali iat, shubhali holatda bekor qilingan
+    return 'iat' in token and token['iat'] <= revoked_at.timestamp()
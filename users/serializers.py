@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from .models import *
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .revocation import issued_before_revocation, revocations
+from .tokens import RefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -23,4 +28,36 @@ class RegisterSerializer(serializers.ModelSerializer):
         user.is_active = True
         user.set_password(password)
         user.save()
-        return user
\ No newline at end of file
+        return user
+
+
+class PreciseTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+    class Meta:
+        ref_name = 'TokenObtainPair'
+
+
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocations.is_revoked(refresh.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken("Token has been revoked")
+        revoked_at = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).values_list('tokens_revoked_at', flat=True).first()
+        if issued_before_revocation(refresh, revoked_at):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError as e:
+            raise serializers.ValidationError(str(e))
@@ -1,3 +1,156 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.cache import cache, caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users import hashers
+from users.models import User
+from users.revocation import issued_before_revocation, revoke_user_tokens
+from users.throttling import IPTokenBucketThrottle, TokenBucketThrottle
+from users.tokens import ISSUED_AT_CLAIM, RefreshToken
+
+
+@override_settings(AUTH_RATE_LIMITS={'login': {'ip': (3, 1)}})
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_forwarded_for_header_does_not_reset_ip_bucket(self):
+        url = reverse('token_obtain_pair')
+        statuses = [
+            self.client.post(url, {'username': 'x', 'password': 'y'}, HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code
+            for i in range(5)
+        ]
+        self.assertEqual(statuses.count(429), 2)
+
+    @override_settings(AUTH_RATE_LIMITS={'login': {'username': (2, 1)}})
+    def test_username_bucket_is_shared_across_addresses(self):
+        url = reverse('token_obtain_pair')
+        responses = [
+            self.client.post(url, {'username': f" Ali{suffix}", 'password': 'y'}, REMOTE_ADDR=f"10.0.0.{i}")
+            for i, suffix in enumerate(('', ' ', ''))
+        ]
+        self.assertEqual([response.status_code for response in responses], [401, 401, 429])
+        self.assertEqual(responses[-1]['Retry-After'], '60')
+        other = self.client.post(url, {'username': 'vali', 'password': 'y'}, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(other.status_code, 401)
+
+    def test_concurrent_requests_cannot_spend_the_same_token(self):
+        view = SimpleNamespace(throttle_scope='login')
+        request = SimpleNamespace(META={'REMOTE_ADDR': '10.1.1.1'})
+        results, start = [], threading.Barrier(10)
+        backend = type(caches['default'])
+        get = backend.get
+
+        def slow_get(self, *args, **kwargs):
+            # o'qish va yozish orasidagi oynani kengaytiradi (kesh obyekti har threadda alohida)
+            value = get(self, *args, **kwargs)
+            threading.Event().wait(0.005)
+            return value
+
+        def worker():
+            start.wait()
+            results.append(IPTokenBucketThrottle().allow_request(request, view))
+
+        with mock.patch.object(backend, 'get', slow_get):
+            threads = [threading.Thread(target=worker) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(True), 3)
+
+    def test_expired_lock_taken_by_another_request_is_not_released(self):
+        view = SimpleNamespace(throttle_scope='login')
+        request = SimpleNamespace(META={'REMOTE_ADDR': '10.1.1.2'})
+        backend = type(caches['default'])
+        get = backend.get
+        lock_keys = []
+
+        def get_after_expiry(self, key, *args, **kwargs):
+            # bucket o'qilayotganda qulf muddati o'tdi va uni boshqa so'rov oldi
+            if not key.endswith(':lock') and not lock_keys:
+                lock_keys.append(f"{key}:lock")
+                cache.set(lock_keys[0], 'other-request', 2)
+            return get(self, key, *args, **kwargs)
+
+        with mock.patch.object(backend, 'get', get_after_expiry):
+            self.assertTrue(IPTokenBucketThrottle().allow_request(request, view))
+        self.assertEqual(cache.get(lock_keys[0]), 'other-request')
+
+    def test_bucket_without_ident_cannot_be_instantiated(self):
+        class NoIdentThrottle(TokenBucketThrottle):
+            bucket = 'ip'
+
+        with self.assertRaises(TypeError):
+            NoIdentThrottle()
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='ali', password='parol-123456')
+
+    def _token(self, at):
+        with mock.patch('rest_framework_simplejwt.tokens.aware_utcnow', return_value=at):
+            return RefreshToken.for_user(self.user)
+
+    def test_same_second_tokens_are_split_by_revocation_time(self):
+        second = timezone.now().replace(microsecond=0)
+        before, after = self._token(second + timedelta(microseconds=100)), self._token(second + timedelta(microseconds=900))
+        self.assertEqual(before['iat'], after['iat'])
+        revoked_at = second + timedelta(microseconds=500)
+        self.assertTrue(issued_before_revocation(before, revoked_at))
+        self.assertFalse(issued_before_revocation(after, revoked_at))
+
+    def test_access_token_gets_its_own_issued_at(self):
+        refresh = self._token(timezone.now() - timedelta(hours=1))
+        self.assertGreater(refresh.access_token[ISSUED_AT_CLAIM], refresh[ISSUED_AT_CLAIM])
+
+    def test_tokens_without_precise_claim_fall_back_to_whole_seconds(self):
+        token = self._token(timezone.now())
+        del token[ISSUED_AT_CLAIM]
+        self.assertTrue(issued_before_revocation(token, timezone.now() + timedelta(seconds=1)))
+        self.assertFalse(issued_before_revocation(token, timezone.now() - timedelta(seconds=5)))
+
+    def test_revoke_user_tokens_rejects_earlier_tokens_and_accepts_new_login(self):
+        old = self.client.post(reverse('token_obtain_pair'), {'username': 'ali', 'password': 'parol-123456'}).json()
+        revoke_user_tokens(self.user)
+        new = self.client.post(reverse('token_obtain_pair'), {'username': 'ali', 'password': 'parol-123456'}).json()
+        url = reverse('user-crud')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {old['access']}").status_code, 401)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {new['access']}").status_code, 200)
+        refresh = reverse('token_refresh')
+        self.assertEqual(self.client.post(refresh, {'refresh': old['refresh']}).status_code, 401)
+        self.assertEqual(self.client.post(refresh, {'refresh': new['refresh']}).status_code, 200)
+
+
+class DeferredRehashTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='ali', password=make_password('parol-123456', hasher='pbkdf2_sha256'))
+
+    def drain(self):
+        hashers._executor.submit(lambda: None).result()
+
+    def test_login_rehashes_legacy_hash_in_background(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'ali', 'password': 'parol-123456'})
+        self.assertEqual(response.status_code, 200)
+        self.drain()
+        self.user.refresh_from_db()
+        self.assertNotEqual(identify_hasher(self.user.password).algorithm, 'pbkdf2_sha256')
+        self.assertTrue(self.user.check_password('parol-123456'))
+
+    def test_rehash_does_not_overwrite_a_newer_password(self):
+        stale = self.user.password
+        self.user.set_password('yangi-parol-1')
+        self.user.save()
+        hashers._rehash(User, self.user.pk, stale, 'parol-123456')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('yangi-parol-1'))
+        self.assertFalse(self.user.check_password('parol-123456'))
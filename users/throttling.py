@@ -0,0 +1,118 @@
+# users/throttling.py
+# Login / ro'yxatdan o'tish uchun token-bucket cheklovlari (IP va username bo'yicha).
+# DRF throttle lari view ichida serializer (validate_password, parol hashlash) dan oldin
+# ishlaydi, shuning uchun cheklangan so'rov CPU sarflamaydi. Holat umumiy keshda.
+import abc
+import hashlib
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from main import metrics
+
+
+class TokenBucketThrottle(BaseThrottle, metaclass=abc.ABCMeta):
+    """
+    Har bir kalit uchun (tokens, vaqt) juftligi: so'rov 1 token oladi, bucket
+    settings.AUTH_RATE_LIMITS[view.throttle_scope][bucket] = (sig'im, daqiqada to'ladigan token)
+    tezligida to'ladi. Token qolmasa 429 + Retry-After.
+    """
+    bucket = None
+
+    def __init__(self):
+        self._wait = None
+
+    @abc.abstractmethod
+    def get_bucket_ident(self, request):
+        """Bucket kaliti (IP, username, ...); None yoki bo'sh bo'lsa so'rov cheklanmaydi"""
+
+    def get_limit(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        return getattr(settings, 'AUTH_RATE_LIMITS', {}).get(scope, {}).get(self.bucket)
+
+    def allow_request(self, request, view):
+        limit = self.get_limit(view)
+        ident = self.get_bucket_ident(request)
+        if limit is None or not ident:
+            return True
+
+        capacity, per_minute = limit
+        refill = per_minute / 60
+        digest = hashlib.sha1(ident.encode()).hexdigest()
+        key = f"throttle:{view.throttle_scope}:{self.bucket}:{digest}"
+        labels = {'endpoint': view.throttle_scope, 'bucket': self.bucket}
+
+        # o'qish-hisoblash-yozish bitta kalit qulfi ostida: parallel so'rovlar bir xil tokenni olmaydi
+        token = self._lock(key)
+        if token is None:
+            self._wait = 1
+            metrics.incr('auth_throttle_requests_total', result='throttled', **labels)
+            return False
+        try:
+            now = time.time()
+            tokens, stamp = cache.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + (now - stamp) * refill)
+            # bucket to'liq to'lgandan keyin kalit kerak emas
+            timeout = math.ceil(capacity / refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self._wait = (1 - tokens) / refill
+            cache.set(key, (tokens, now), timeout)
+        finally:
+            self._unlock(key, token)
+
+        metrics.incr('auth_throttle_requests_total', result='allowed' if allowed else 'throttled', **labels)
+        return allowed
+
+    @staticmethod
+    def _lock(key, attempts=50):
+        """
+        cache.add atomar (Redis SET NX): qulf 2 s da o'zi tushadi; olinmasa so'rov cheklanadi (None).
+        Qulf qiymati — shu so'rovning noyob tokeni, _unlock faqat o'z qulfini o'chiradi.
+        """
+        token = uuid.uuid4().hex
+        for _ in range(attempts):
+            if cache.add(f"{key}:lock", token, 2):
+                return token
+            time.sleep(0.002)
+        return None
+
+    @staticmethod
+    def _unlock(key, token):
+        """Qulf muddati o'tib boshqa so'rov olgan bo'lsa, uning qulfi o'chirilmaydi"""
+        if cache.get(f"{key}:lock") == token:
+            cache.delete(f"{key}:lock")
+
+    def wait(self):
+        return self._wait
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    bucket = 'ip'
+
+    def get_bucket_ident(self, request):
+        # NUM_PROXIES berilmasa DRF X-Forwarded-For ga ishonadi: har so'rovda yangi bucket.
+        # Shuning uchun proksi soni aniq bo'lmasa faqat REMOTE_ADDR
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR')
+        return self.get_ident(request)
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    bucket = 'username'
+
+    def get_bucket_ident(self, request):
+        try:
+            username = request.data.get('username')
+        except AttributeError:
+            return None
+        if not isinstance(username, str):
+            return None
+        return username.strip().lower()
@@ -0,0 +1,28 @@
+# users/tokens.py
+# simplejwt "iat" ni butun soniyalarda yozadi: User.tokens_revoked_at bilan solishtirishda
+# bekor qilishdan keyin o'sha soniyada berilgan token ham rad etilardi (yoki aksincha).
+# Shuning uchun har token qo'shimcha ISSUED_AT_CLAIM (mikrosekundlarda) bilan chiqariladi.
+from rest_framework_simplejwt import tokens
+
+ISSUED_AT_CLAIM = 'iat_us'
+
+
+def to_microseconds(value):
+    return round(value.timestamp() * 1_000_000)
+
+
+class PreciseIssuedAtMixin:
+    def set_iat(self, claim='iat', at_time=None):
+        super().set_iat(claim, at_time)
+        if claim == 'iat':
+            self.payload[ISSUED_AT_CLAIM] = to_microseconds(at_time or self.current_time)
+
+
+class AccessToken(PreciseIssuedAtMixin, tokens.AccessToken):
+    pass
+
+
+class RefreshToken(PreciseIssuedAtMixin, tokens.RefreshToken):
+    # access token o'zining berilgan vaqtini oladi, refreshnikini emas
+    no_copy_claims = tokens.RefreshToken.no_copy_claims + (ISSUED_AT_CLAIM,)
+    access_token_class = AccessToken
@@ -1,10 +1,10 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import *
 
 urlpatterns = [
-    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/',TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/', ThrottledTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/',RevocationAwareTokenRefreshView.as_view(), name='token_refresh'),
+    path('token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
     path('register/', RegisterView.as_view(), name='register'),
     path('user-crud/',UserRetrieveUpdateDeleteView.as_view(), name='user-crud'),
 
@@ -3,10 +3,43 @@ from .serializers import *
 from .models import *
 from .permissions import IsAdmin,IsUser
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .throttling import IPTokenBucketThrottle, UsernameTokenBucketThrottle
+from .hashers import deferred_rehash
+from .revocation import revoke_token
 
 class RegisterView(generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
+    throttle_classes = [IPTokenBucketThrottle, UsernameTokenBucketThrottle]
+    throttle_scope = 'register'
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    serializer_class = PreciseTokenObtainPairSerializer
+    throttle_classes = [IPTokenBucketThrottle, UsernameTokenBucketThrottle]
+    throttle_scope = 'login'
+
+    def post(self, request, *args, **kwargs):
+        with deferred_rehash():
+            return super().post(request, *args, **kwargs)
+
+class RevocationAwareTokenRefreshView(TokenRefreshView):
+    serializer_class = RevocationAwareTokenRefreshSerializer
+
+class TokenRevokeView(generics.GenericAPIView):
+    """Logout: refresh token (va so'rovdagi access token) muddati tugaguncha bekor qilinadi"""
+    permission_classes = (permissions.AllowAny,)
+    serializer_class = TokenRevokeSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_token(serializer.validated_data['refresh'])
+        if request.auth is not None:
+            revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class UserRetrieveUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer